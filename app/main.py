@@ -7,7 +7,7 @@ import os
 import sys
 import argparse
 from src.poker.card import Card
-from src.poker.table import Table, Seat, Action
+from src.poker.table import Table, Action
 
 def main(arguments):
 
@@ -32,8 +32,7 @@ def main(arguments):
                 table.action(action=Action.BetRaise)
 
 def print_table(table: Table):
-    for seat in [Seat.One, Seat.Two]:    
-        p = table.seats[seat]
+    for seat, p in table.seats.items():
         p.hole_cards.sort(reverse=True)
         button_str = "B" if seat == table.button else ""
         print(f"{seat}: Chips {p.chips} Cards {cards_str(p.hole_cards)} {button_str}")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""Hosts a bot-vs-bot match over many tables, see src/poker/server.py for
+the protocol. Without --bots the server waits for two bots to connect.
+
+    python -m app.serve --tables 1000 --hands 10 --port 9999
+    python -m app.serve --tables 1000 --hands 10 --unix /tmp/poker.sock --bots random call
+"""
+
+import sys
+import argparse
+import asyncio
+import random
+from src.poker.table import Action
+from src.poker.server import GameServer, run_bot, ACTION_TIMEOUT
+
+BOTS = {
+    "random": lambda rng: lambda decision: rng.choice(list(Action)),
+    "call": lambda rng: lambda decision: Action.CheckCall,
+    "raise": lambda rng: lambda decision: Action.BetRaise,
+}
+
+def main(arguments):
+
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=100, help="Tables played at once")
+    parser.add_argument('--hands', type=int, default=10, help="Hands per table")
+    parser.add_argument('--timeout', type=float, default=ACTION_TIMEOUT, help="Seconds per decision")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--unix', help="Listen on this unix socket instead of TCP")
+    parser.add_argument('--bots', nargs=2, choices=list(BOTS), help="Run two built-in bots in process")
+    args = parser.parse_args(arguments)
+
+    result = asyncio.run(serve(args))
+    for player in range(2):
+        print(f"player {player}: {result.chips_per_hand(player):+.3f} chips/hand, {result.timeouts[player]} timeouts")
+    print(f"{result.hands} hands, {result.showdowns} showdowns")
+
+async def serve(args):
+    server = GameServer(tables=args.tables, hands=args.hands, timeout=args.timeout, seed=args.seed)
+    address = await server.start(host=args.host, port=args.port, path=args.unix)
+    if not args.bots:
+        print(f"listening on {address}", flush=True)
+        return await server.run()
+    rng = random.Random(args.seed)
+    port = None if args.unix else address[1]
+    bots = [run_bot(BOTS[name](rng), host=args.host, port=port, path=args.unix) for name in args.bots]
+    result, *_ = await asyncio.gather(server.run(), *bots)
+    return result
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
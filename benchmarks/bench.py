@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+"""Micro benchmarks for the hot paths of src/poker.
+
+Every benchmark replays fixed, seeded inputs, so runs are comparable. Results
+are printed and can be saved as JSON; given a baseline file, benchmarks that
+got slower by more than the tolerance are reported and the exit code is 1.
+
+    python -m benchmarks.bench --save baseline.json
+    python -m benchmarks.bench --baseline baseline.json
+"""
+
+from __future__ import annotations
+from typing import Callable, Optional
+from dataclasses import dataclass, asdict
+from pathlib import Path
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from src.poker.card import Card
+from src.poker.hand import Hand
+from src.poker.hand_state import HandState
+from src.poker.evaluator import evaluate, evaluate_mask
+from src.poker.table import Table, Action, STARTING_STACK
+from src.poker.deck import Deck
+
+SEED = 0
+# inputs cycled through by each benchmark
+INPUTS = 1000
+
+@dataclass
+class Result:
+    ops_per_sec : float
+    # bytes allocated at the peak of one call, measured with tracemalloc
+    peak_bytes : int
+
+# A benchmark builds its seeded inputs once and returns the operation to time.
+Benchmark = Callable[[random.Random], Callable[[], None]]
+
+def hand_from_cards(n : int) -> Benchmark:
+    def setup(rng : random.Random) -> Callable[[], None]:
+        hands = [rng.sample(Card.deck(), n) for _ in range(INPUTS)]
+        it = _cycle(hands)
+        return lambda: Hand.from_cards(next(it))
+    return setup
+
+def card_deck(rng : random.Random) -> Callable[[], None]:
+    return lambda: Card.deck(rng)
+
+def card_from_str(rng : random.Random) -> Callable[[], None]:
+    it = _cycle([str(c) for c in Card.deck(rng)])
+    return lambda: Card.from_str(next(it))
+
+def table_start(rng : random.Random) -> Callable[[], None]:
+    return lambda: Table.start(rng=rng)
+
+def table_hand(seats : int) -> Benchmark:
+    # one full hand of random betting per call, without folds, with the
+    # stacks topped up again afterwards
+    def setup(rng : random.Random) -> Callable[[], None]:
+        actions = _cycle([rng.choice([Action.CheckCall, Action.BetRaise]) for _ in range(INPUTS)])
+        table = Table.start(deck=Deck(rng=rng), seats=seats)
+        def play():
+            hands = table.hands_played
+            while table.hands_played == hands:
+                table.action(next(actions))
+            for p in table.seats.values():
+                p.chips = STARTING_STACK - p.round_committed
+        return play
+    return setup
+
+def showdown(rng : random.Random) -> Callable[[], None]:
+    table = Table.start(deck=Deck(rng=rng))
+    boards = _cycle([Card.deck(rng)[:9] for _ in range(INPUTS)])
+    def run():
+        cards = next(boards)
+        for i, p in enumerate(table.seats.values()):
+            p.hole_cards = cards[2 * i:2 * i + 2]
+            p.chips = 100
+            p.hand_committed = 5
+        table.board = cards[4:]
+        table.pot = 10
+        table._showdown()
+    return run
+
+def evaluation(cached : bool) -> Benchmark:
+    # seven card strengths over the same INPUTS sets again and again, where
+    # the cache keeps every set after the first pass
+    def setup(rng : random.Random) -> Callable[[], None]:
+        hands = [rng.sample(Card.deck(), 7) for _ in range(INPUTS)]
+        if cached:
+            it = _cycle([Card.to_mask(cards) for cards in hands])
+            return lambda: evaluate_mask(next(it))
+        it = _cycle(hands)
+        return lambda: evaluate(next(it))
+    return setup
+
+def streets(incremental : bool) -> Benchmark:
+    # one player's strength on the flop, turn and river, from scratch or
+    # kept up to date as cards arrive, which also reads the draws
+    def setup(rng : random.Random) -> Callable[[], None]:
+        it = _cycle([rng.sample(Card.deck(), 7) for _ in range(INPUTS)])
+        def scratch():
+            cards = next(it)
+            for n in (5, 6, 7):
+                Hand.from_cards(cards[:n], describe=False)
+        def incremental_run():
+            cards = next(it)
+            state = HandState.from_cards(cards[:4])
+            for c in cards[4:]:
+                state.add(c.index)
+                state.strength()
+                state.draws()
+        return incremental_run if incremental else scratch
+    return setup
+
+BENCHMARKS : dict[str, Benchmark] = {
+    "hand_from_cards_5": hand_from_cards(5),
+    "hand_from_cards_6": hand_from_cards(6),
+    "hand_from_cards_7": hand_from_cards(7),
+    "card_deck": card_deck,
+    "card_from_str": card_from_str,
+    "table_start": table_start,
+    "table_hand": table_hand(2),
+    "table_hand_9": table_hand(9),
+    "showdown": showdown,
+    "evaluate_7": evaluation(False),
+    "evaluate_mask_repeated_7": evaluation(True),
+    "streets_from_cards": streets(False),
+    "streets_incremental": streets(True),
+}
+
+def measure(benchmark : Benchmark, seconds : float = 0.5, seed : int = SEED) -> Result:
+    op = benchmark(random.Random(seed))
+    # batch calls so timer overhead stays small, keep the fastest batch
+    calls = 1
+    while True:
+        elapsed = _time(op, calls)
+        if elapsed > 0.01:
+            break
+        calls *= 10
+    best = elapsed
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        best = min(best, _time(op, calls))
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(ops_per_sec=calls / best, peak_bytes=peak - start)
+
+def run(names : Optional[list[str]] = None, seconds : float = 0.5, seed : int = SEED) -> dict[str, Result]:
+    return {name: measure(BENCHMARKS[name], seconds, seed) for name in names or BENCHMARKS}
+
+def compare(results : dict[str, Result], baseline : dict[str, Result], tolerance : float) -> list[str]:
+    # names of benchmarks whose throughput fell more than tolerance
+    return [
+        name for name, result in results.items()
+        if name in baseline and result.ops_per_sec < baseline[name].ops_per_sec * (1 - tolerance)
+    ]
+
+def save(results : dict[str, Result], path : Path):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {name: asdict(result) for name, result in results.items()},
+    }
+    Path(path).write_text(json.dumps(data, indent=2) + "\n")
+
+def load(path : Path) -> dict[str, Result]:
+    data = json.loads(Path(path).read_text())
+    return {name: Result(**result) for name, result in data["benchmarks"].items()}
+
+def main(arguments):
+
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', help=f"Benchmarks to run, all by default: {', '.join(BENCHMARKS)}")
+    parser.add_argument('-s', '--seconds', type=float, default=0.5, help="Time spent per benchmark")
+    parser.add_argument('--save', type=Path, help="Write results as JSON")
+    parser.add_argument('--baseline', type=Path, help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed throughput loss against the baseline")
+    args = parser.parse_args(arguments)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run(args.names, args.seconds)
+    baseline = load(args.baseline) if args.baseline else {}
+    for name, result in results.items():
+        line = f"{name:20} {result.ops_per_sec:14,.0f} ops/s {result.peak_bytes:10,} B peak"
+        if name in baseline:
+            line += f"  {result.ops_per_sec / baseline[name].ops_per_sec:6.2f}x baseline"
+        print(line)
+    if args.save:
+        save(results, args.save)
+    regressions = compare(results, baseline, args.tolerance)
+    for name in regressions:
+        print(f"regression: {name}")
+    return 1 if regressions else 0
+
+def _cycle(items : list):
+    while True:
+        yield from items
+
+def _time(op : Callable[[], None], calls : int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        op()
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import numpy as np
+from src.poker import evaluator
+
+# NumPy versions of the tables in evaluator.py. Rank multiset keys are too
+# sparse to index directly, so each key is split into the base 5 digits of
+# the low seven ranks and of the high six ranks; both halves are mapped to
+# dense indices that address a two dimensional strength table.
+_LOW_BASE = evaluator.RANK_KEY_BASE ** 7
+_HIGH_BASE = evaluator.RANK_KEY_BASE ** 6
+
+def _rank_tables() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    keys = np.array(list(evaluator.RANK_STRENGTHS), dtype=np.int64)
+    strengths = np.array(list(evaluator.RANK_STRENGTHS.values()), dtype=np.int32)
+    high, low = np.divmod(keys, _LOW_BASE)
+    lows = np.unique(low)
+    highs = np.unique(high)
+    low_index = np.zeros(_LOW_BASE, dtype=np.int64)
+    low_index[lows] = np.arange(len(lows))
+    high_offset = np.zeros(_HIGH_BASE, dtype=np.int64)
+    high_offset[highs] = np.arange(len(highs)) * len(lows)
+    table = np.zeros(len(lows) * len(highs), dtype=np.int32)
+    table[high_offset[high] + low_index[low]] = strengths
+    return low_index, high_offset, table
+
+_CARD_KEYS = np.array(evaluator.CARD_KEYS, dtype=np.int64)
+_FLUSH_SUIT = np.array(evaluator.FLUSH_SUIT, dtype=np.int8)
+_FLUSH_STRENGTHS = np.array(evaluator.FLUSH_STRENGTHS, dtype=np.int32)
+_LOW_INDEX, _HIGH_OFFSET, _RANK_STRENGTHS = _rank_tables()
+_CARD_SUIT = np.arange(52, dtype=np.int8) & 3
+_CARD_RANK_BIT = (1 << (np.arange(52) >> 2)).astype(np.int32)
+
+def evaluate_batch(cards : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError("cards must have shape (N, 5), (N, 6) or (N, 7)")
+    if cards.size and cards.max() > 51:
+        raise ValueError("card indices must be in the range 0-51")
+    keys = _CARD_KEYS[cards[:, 0]]
+    for i in range(1, cards.shape[1]):
+        keys += _CARD_KEYS[cards[:, i]]
+    high, low = np.divmod(keys >> evaluator.SUIT_BITS, _LOW_BASE)
+    strengths = _RANK_STRENGTHS[_HIGH_OFFSET[high] + _LOW_INDEX[low]]
+    suits = _FLUSH_SUIT[keys & evaluator.SUIT_FIELD_MASK]
+    flush = suits >= 0
+    if flush.any():
+        flush_cards = cards[flush]
+        in_suit = _CARD_SUIT[flush_cards] == suits[flush][:, None]
+        masks = np.where(in_suit, _CARD_RANK_BIT[flush_cards], 0).sum(axis=1)
+        strengths[flush] = _FLUSH_STRENGTHS[masks]
+    return strengths, strengths >> evaluator.RANKING_SHIFT
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+from src.poker.table import Action, Round, RAISE_LIMIT, STARTING_STACK, SMALL_BLIND, BIG_BLIND
+from src.poker.batch_evaluator import evaluate_batch
+
+_BET_SIZES = np.array([r.bet_size() for r in Round], dtype=np.int32)
+
+# K independent heads-up games stored as arrays. Seat arrays are indexed by
+# seat (0 for Seat.One, 1 for Seat.Two) and rounds by Round.value. The
+# betting rules mirror Table.action, Table._next and Table._bet_size; unlike
+# Table every hand starts from fresh stacks, so a finished game reports
+# its chip deltas and is dealt a new hand straight away.
+class BatchTable:
+
+    def __init__(self, size: int, rng: Optional[np.random.Generator] = None):
+        self.size = size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.chips = np.zeros((size, 2), dtype=np.int32)
+        self.round_committed = np.zeros((size, 2), dtype=np.int32)
+        self.acted = np.zeros((size, 2), dtype=bool)
+        self.pot = np.zeros(size, dtype=np.int32)
+        self.round = np.zeros(size, dtype=np.int8)
+        self.round_outstanding = np.zeros(size, dtype=np.int32)
+        self.round_raises = np.zeros(size, dtype=np.int8)
+        # the first hand of every game has Seat.One on the button
+        self.button = np.ones(size, dtype=np.int8)
+        self.turn = np.zeros(size, dtype=np.int8)
+        self.hole_cards = np.zeros((size, 2, 2), dtype=np.uint8)
+        self.board = np.zeros((size, 5), dtype=np.uint8)
+        self.hands_played = np.zeros(size, dtype=np.int64)
+        self._new_hand(np.arange(size))
+
+    def board_size(self) -> np.ndarray:
+        return np.array([0, 3, 4, 5], dtype=np.int8)[self.round]
+
+    def legal_actions(self) -> np.ndarray:
+        legal = np.ones((self.size, len(Action)), dtype=bool)
+        legal[:, Action.BetRaise.value] = self.round_raises < RAISE_LIMIT
+        return legal
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        actions = np.asarray(actions)
+        games = np.arange(self.size)
+        capped = (actions == Action.BetRaise.value) & (self.round_raises >= RAISE_LIMIT)
+        actions = np.where(capped, Action.CheckCall.value, actions)
+        fold = actions == Action.Fold.value
+        bet = actions == Action.BetRaise.value
+        player = self.turn.astype(np.intp)
+        other = 1 - player
+
+        diff = self.round_outstanding - self.round_committed[games, player]
+        amount = np.where(fold, 0, diff + np.where(bet, _BET_SIZES[self.round], 0))
+        amount = np.minimum(amount, self.chips[games, player])
+        self.chips[games, player] -= amount
+        self.pot += amount
+        self.round_committed[games, player] += amount
+        self.round_outstanding = np.maximum(self.round_outstanding, self.round_committed[games, player])
+        self.acted[games[bet], other[bet]] = False
+        self.round_raises += bet
+        self.acted[games[~fold], player[~fold]] = True
+
+        # fold: the other player takes the pot
+        self.chips[games[fold], other[fold]] += self.pot[fold]
+        self.pot[fold] = 0
+
+        # everyone acted: close the round and move on
+        closed = ~fold & self.acted.all(axis=1)
+        waiting = ~fold & ~closed
+        self.turn[waiting] = other[waiting]
+        self.acted[closed] = False
+        self.round_committed[closed] = 0
+        self.round_outstanding[closed] = 0
+        self.round_raises[closed] = 0
+        self.round[closed] += 1
+        showdown = closed & (self.round > Round.River.value)
+        street = closed & ~showdown
+        self.turn[street] = 1 - self.button[street]
+        self._showdown(games[showdown])
+
+        done = fold | showdown
+        rewards = np.zeros((self.size, 2), dtype=np.int32)
+        rewards[done] = self.chips[done] - STARTING_STACK
+        self.hands_played[done] += 1
+        self._new_hand(games[done])
+        return rewards, done
+
+    def _showdown(self, games: np.ndarray):
+        if len(games) == 0:
+            return
+        board = self.board[games]
+        s1, _ = evaluate_batch(np.concatenate([board, self.hole_cards[games, 0]], axis=1))
+        s2, _ = evaluate_batch(np.concatenate([board, self.hole_cards[games, 1]], axis=1))
+        pot = self.pot[games]
+        half = pot // 2
+        self.chips[games, 0] += np.where(s1 > s2, pot, np.where(s1 == s2, half, 0))
+        self.chips[games, 1] += np.where(s2 > s1, pot, np.where(s1 == s2, pot - half, 0))
+        self.pot[games] = 0
+
+    def _new_hand(self, games: np.ndarray):
+        if len(games) == 0:
+            return
+        self.button[games] = 1 - self.button[games]
+        button = self.button[games].astype(np.intp)
+        self.turn[games] = button
+        self.round[games] = Round.Preflop.value
+        self.acted[games] = False
+        self.round_raises[games] = 0
+        self.chips[games] = STARTING_STACK
+        self.round_committed[games] = 0
+        self.chips[games, button] -= SMALL_BLIND
+        self.chips[games, 1 - button] -= BIG_BLIND
+        self.round_committed[games, button] = SMALL_BLIND
+        self.round_committed[games, 1 - button] = BIG_BLIND
+        self.round_outstanding[games] = BIG_BLIND
+        self.pot[games] = SMALL_BLIND + BIG_BLIND
+        # deal in the order Table pops its deck: both players' hole cards,
+        # then flop, turn and river
+        deck = np.argsort(self.rng.random((len(games), 52)), axis=1)[:, :9].astype(np.uint8)
+        self.hole_cards[games] = deck[:, :4].reshape(-1, 2, 2)
+        self.board[games] = deck[:, 4:]
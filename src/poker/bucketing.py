@@ -0,0 +1,221 @@
+from __future__ import annotations
+from typing import Optional
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import os
+import tempfile
+import numpy as np
+from src.poker.table import Round
+from src.poker.batch_evaluator import evaluate_batch
+from src.poker.isomorphism import INDEXER
+from src.poker.ranges import COMBOS, NUM_COMBOS, Showdown, board_strengths, live, opponent_hands
+from src.poker.cache import cache_dir, save_array
+
+# Hand features, all built from rollouts: each rollout deals the rest of the
+# board and a few opponent hands, and scores the hand's share of pots won.
+# On the river nothing is left to deal and the score is counted exactly
+# against every opponent hand instead, the expected share of each opponent.
+#   ehs        expected hand strength, the mean rollout score
+#   ehs2       the mean squared rollout score, which also rewards potential
+#   histogram  the distribution of rollout scores over HISTOGRAM_BINS bins
+KINDS = ("ehs", "ehs2", "histogram")
+HISTOGRAM_BINS = 8
+
+ROLLOUTS = 16
+OPPONENTS = 4
+KMEANS_ITERATIONS = 20
+# classes per feature chunk and rows per k-means chunk; each feature chunk
+# gets its own seed so tables do not depend on the process count
+CHUNK_CLASSES = 20_000
+CHUNK_ROWS = 200_000
+
+def table_name(round : Round, kind : str, buckets : int) -> str:
+    return f"buckets_{round.name.lower()}_{kind}_{buckets}.npy"
+
+def hand_features(cards : np.ndarray, kind : str, rollouts : int = ROLLOUTS, opponents : int = OPPONENTS, rng : Optional[np.random.Generator] = None) -> np.ndarray:
+    # cards holds the hole cards then the board in each row
+    if kind not in KINDS:
+        raise ValueError(f"unknown feature kind {kind}")
+    rng = rng if rng is not None else np.random.default_rng()
+    cards = np.asarray(cards, dtype=np.uint8)
+    missing = 7 - cards.shape[1]
+    if missing == 0:
+        rollouts = 1
+        score = _river_scores(cards)[:, None]
+    else:
+        score = _rollout_scores(cards, missing, rollouts, opponents, rng)
+    match kind:
+        case "ehs":
+            return score.mean(axis=1, keepdims=True).astype(np.float32)
+        case "ehs2":
+            return (score ** 2).mean(axis=1, keepdims=True).astype(np.float32)
+        case _:
+            bins = np.minimum((score * HISTOGRAM_BINS).astype(np.intp), HISTOGRAM_BINS - 1)
+            counts = np.zeros((len(cards), HISTOGRAM_BINS), dtype=np.float32)
+            np.add.at(counts, (np.repeat(np.arange(len(cards)), rollouts), bins.ravel()), 1)
+            return counts / rollouts
+
+def _rollout_scores(cards : np.ndarray, missing : int, rollouts : int, opponents : int, rng : np.random.Generator) -> np.ndarray:
+    rows = np.repeat(cards, rollouts, axis=0)
+    # random sort keys with the known cards pushed past every live card
+    keys = rng.random((len(rows), 52), dtype=np.float32)
+    np.put_along_axis(keys, rows.astype(np.intp), 2.0, axis=1)
+    drawn = np.argpartition(keys, missing + 2 * opponents - 1, axis=1)[:, :missing + 2 * opponents].astype(np.uint8)
+    board = np.concatenate([rows[:, 2:], drawn[:, :missing]], axis=1)
+    hero, _ = evaluate_batch(np.concatenate([rows[:, :2], board], axis=1))
+    score = np.zeros(len(rows))
+    for o in range(opponents):
+        villain, _ = evaluate_batch(np.concatenate([drawn[:, missing + 2 * o:missing + 2 * o + 2], board], axis=1))
+        score += (hero > villain) + 0.5 * (hero == villain)
+    return (score / opponents).reshape(len(cards), rollouts)
+
+def _river_scores(cards : np.ndarray) -> np.ndarray:
+    # share of pots won against every opponent hand the cards leave, one
+    # Showdown per distinct board
+    boards, inverse = np.unique(np.sort(cards[:, 2:], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    low = np.minimum(cards[:, 0], cards[:, 1]).astype(np.intp)
+    high = np.maximum(cards[:, 0], cards[:, 1]).astype(np.intp)
+    hands = low * 51 - low * (low - 1) // 2 + high - low - 1
+    score = np.zeros(len(cards))
+    for b, board in enumerate(boards.tolist()):
+        rows = inverse == b
+        net = Showdown(board_strengths(tuple(board))).values(live(board).astype(np.float64))
+        score[rows] = 0.5 + net[hands[rows]] / (2 * opponent_hands(5))
+    return score
+
+def build(round : Round, kind : str, buckets : int, path : Optional[Path] = None, rollouts : int = ROLLOUTS, opponents : int = OPPONENTS, iterations : int = KMEANS_ITERATIONS, seed : int = 0, processes : int = 1) -> np.ndarray:
+    # buckets every canonical hand of the round and saves the table in path
+    path = Path(path) if path is not None else cache_dir()
+    size = INDEXER.size(round)
+    starts = list(range(0, size, CHUNK_CLASSES))
+    seeds = np.random.SeedSequence([seed, round.value]).spawn(len(starts))
+    chunks = [(round, start, min(start + CHUNK_CLASSES, size), kind, rollouts, opponents, s) for start, s in zip(starts, seeds)]
+    width = HISTOGRAM_BINS if kind == "histogram" else 1
+    handle, name = tempfile.mkstemp(suffix=".npy", dir=path)
+    os.close(handle)
+    try:
+        features = np.lib.format.open_memmap(name, mode="w+", dtype=np.float32, shape=(size, width))
+        for (_, start, stop, *_), chunk in zip(chunks, _map(_feature_chunk, chunks, processes)):
+            features[start:stop] = chunk
+        features.flush()
+        if kind == "histogram":
+            # cumulative histograms, so squared distances grow with how far
+            # probability mass has to move, as earth mover's distance does
+            np.cumsum(features, axis=1, out=features)
+            features.flush()
+            labels = buckets - 1 - kmeans(Path(name), buckets, iterations=iterations, seed=seed, processes=processes)
+        else:
+            labels = _quantile_buckets(np.asarray(features[:, 0]), buckets)
+        del features
+    finally:
+        os.unlink(name)
+    table = labels.astype(np.uint8 if buckets <= 256 else np.uint16)
+    save_array(path / table_name(round, kind, buckets), table)
+    return table
+
+def bucket_table(round : Round, kind : str, buckets : int) -> np.ndarray:
+    # loaded lazily and memory mapped. Building a table can take hours, so
+    # a missing one is an error rather than something done on a lookup.
+    key = (round, kind, buckets)
+    if key not in _TABLES:
+        path = cache_dir() / table_name(round, kind, buckets)
+        if not path.exists():
+            raise FileNotFoundError(f"no bucket table at {path}, run build({round}, {kind!r}, {buckets}) first")
+        _TABLES[key] = np.load(path, mmap_mode="r")
+    return _TABLES[key]
+
+_TABLES : dict[tuple, np.ndarray] = {}
+
+def kmeans(path : Path, k : int, iterations : int = KMEANS_ITERATIONS, seed : int = 0, processes : int = 1) -> np.ndarray:
+    # Lloyd's algorithm over the rows of a .npy file. Assignment runs on
+    # fixed chunks in worker processes that map the file themselves, and
+    # clusters are numbered by increasing mean of their centers.
+    data = np.load(path, mmap_mode="r")
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(data[np.sort(rng.choice(len(data), size=min(len(data), 20 * k), replace=False))])
+    centers = _kmeans_plus_plus(sample, k, rng)
+    starts = list(range(0, len(data), CHUNK_ROWS))
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 and len(starts) > 1 else None
+    try:
+        for _ in range(iterations):
+            chunks = [(path, start, min(start + CHUNK_ROWS, len(data)), centers, False) for start in starts]
+            results = list(executor.map(_assign_chunk, *zip(*chunks))) if executor else [_assign_chunk(*c) for c in chunks]
+            sums = sum(r[0] for r in results)
+            counts = sum(r[1] for r in results)
+            # empty clusters keep their center
+            updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+            if np.allclose(updated, centers):
+                break
+            centers = updated
+        chunks = [(path, start, min(start + CHUNK_ROWS, len(data)), centers, True) for start in starts]
+        labels = np.concatenate(list(executor.map(_assign_chunk, *zip(*chunks))) if executor else [_assign_chunk(*c) for c in chunks])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    order = np.argsort(np.argsort(centers.mean(axis=1), kind="stable"))
+    return order[labels]
+
+def _kmeans_plus_plus(sample : np.ndarray, k : int, rng : np.random.Generator) -> np.ndarray:
+    centers = [sample[rng.integers(len(sample))]]
+    distances = ((sample - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = distances.sum()
+        i = rng.choice(len(sample), p=distances / total) if total > 0 else rng.integers(len(sample))
+        centers.append(sample[i])
+        distances = np.minimum(distances, ((sample - sample[i]) ** 2).sum(axis=1))
+    return np.array(centers, dtype=np.float64)
+
+def _assign_chunk(path : Path, start : int, stop : int, centers : np.ndarray, labels_only : bool):
+    rows = np.asarray(np.load(path, mmap_mode="r")[start:stop], dtype=np.float64)
+    distances = (rows ** 2).sum(axis=1)[:, None] - 2 * rows @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+    labels = distances.argmin(axis=1)
+    if labels_only:
+        return labels
+    sums = np.zeros_like(centers)
+    np.add.at(sums, labels, rows)
+    return sums, np.bincount(labels, minlength=len(centers))
+
+def _quantile_buckets(values : np.ndarray, buckets : int) -> np.ndarray:
+    # equally many classes per bucket, bucket 0 the weakest. Equal values
+    # share a bucket chosen by the middle of their run, then labels are
+    # pulled so none is skipped and enough distinct values are left for
+    # the buckets above: every bucket is used while values allow it.
+    distinct, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    middle = np.cumsum(counts) - counts / 2
+    ideal = (middle * buckets / len(values)).astype(np.int64)
+    steps = np.arange(len(distinct))
+    lower = np.maximum(ideal, buckets - len(distinct) + steps)
+    labels = steps + np.minimum.accumulate(np.minimum(lower - steps, 0))
+    return labels[inverse.ravel()]
+
+def _feature_chunk(round : Round, start : int, stop : int, kind : str, rollouts : int, opponents : int, seed : np.random.SeedSequence) -> np.ndarray:
+    cards = INDEXER.unindex_batch(round, np.arange(start, stop))
+    return hand_features(cards, kind, rollouts, opponents, np.random.default_rng(seed))
+
+def _map(fn, chunks : list[tuple], processes : int):
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            yield from executor.map(fn, *zip(*chunks))
+    else:
+        for chunk in chunks:
+            yield fn(*chunk)
+
+# Card abstraction for CFRSolver from the bucket tables. A round with at
+# least as many buckets as canonical hands uses the canonical index itself.
+@dataclass(frozen=True)
+class BucketAbstraction:
+    buckets : tuple[int, int, int, int] = (169, 50, 50, 50)
+    kind : str = "ehs2"
+
+    def bucket(self, round : Round, board : tuple[int, ...]) -> np.ndarray:
+        hands = live(board)
+        cards = np.concatenate([COMBOS[hands], np.tile(np.array(board, dtype=np.uint8), (int(hands.sum()), 1))], axis=1)
+        index = INDEXER.index_batch(cards)
+        result = np.zeros(NUM_COMBOS, dtype=np.intp)
+        if self.buckets[round.value] >= INDEXER.size(round):
+            result[hands] = index
+        else:
+            result[hands] = bucket_table(round, self.kind, self.buckets[round.value])[index]
+        return result
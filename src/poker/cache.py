@@ -0,0 +1,24 @@
+from __future__ import annotations
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+
+CACHE_DIR_ENV = "POKER_ML_CACHE"
+
+def cache_dir() -> Path:
+    path = Path(os.environ.get(CACHE_DIR_ENV, Path.home() / ".cache" / "poker-ml"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def save_array(path : Path, array : np.ndarray):
+    # written beside the target and renamed over it, so readers never map
+    # a partly written file
+    handle, name = tempfile.mkstemp(suffix=".npy", dir=path.parent)
+    try:
+        with os.fdopen(handle, "wb") as f:
+            np.save(f, array)
+        os.replace(name, path)
+    except BaseException:
+        os.unlink(name)
+        raise
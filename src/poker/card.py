@@ -1,6 +1,7 @@
 from __future__ import annotations
+from typing import Optional
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import total_ordering
 import random
 
@@ -12,20 +13,25 @@ class Suit(Enum):
 
     @classmethod
     def from_str(cls, s : str) -> Suit:
-        match s:
-            case "♣" | "c":
-                return Suit.CLUBS
-            case "♦" | "d":
-                return Suit.DIAMONDS
-            case "♥" | "h":
-                return Suit.DIAMONDS
-            case "♠" | "s":
-                return Suit.SPADES
-        raise ValueError("invalid string for suit: " + s)
-    
+        suit = _SUITS_BY_STR.get(s)
+        if suit is None:
+            raise ValueError("invalid string for suit: " + s)
+        return suit
+
+    def index(self) -> int:
+        return _SUIT_INDEX[self]
+
     def __str__(self):
         return str(self.value)
 
+_SUITS_BY_STR = {
+    "♣": Suit.CLUBS, "c": Suit.CLUBS,
+    "♦": Suit.DIAMONDS, "d": Suit.DIAMONDS,
+    "♥": Suit.HEARTS, "h": Suit.HEARTS,
+    "♠": Suit.SPADES, "s": Suit.SPADES,
+}
+_SUIT_INDEX = {suit: i for i, suit in enumerate(Suit)}
+
 RANK_CHARS = "23456789TJQKA"
 RANK_SINGULAR_NAMES = ["two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "jack", "queen", "king", "ace"]
 RANK_PLURAL_NAMES = ["twos", "threes", "fours", "fives", "sixes", "sevens", "eights", "nines", "tens", "jacks", "queens", "kings", "aces"]
@@ -48,10 +54,10 @@ class Rank(Enum):
 
     @classmethod
     def from_str(cls, s : str) -> Rank:
-        for rank in Rank:
-            if str(rank) == s:
-                return rank
-        raise ValueError("invalid string for rank: " + s)
+        rank = _RANKS_BY_STR.get(s)
+        if rank is None:
+            raise ValueError("invalid string for rank: " + s)
+        return rank
 
     def __str__(self) -> str:
         return RANK_CHARS[self.value-2]
@@ -67,24 +73,28 @@ class Rank(Enum):
             return self.value < other.value
         return NotImplemented
 
+_RANKS_BY_STR = {str(rank): rank for rank in Rank}
+
+# Cards are encoded as ints 0-51 (rank index * 4 + suit index) and sets of
+# cards as 52-bit masks with bit i set for card i.
 @total_ordering
 @dataclass(frozen=True)
 class Card:
     rank: Rank
     suit: Suit
+    index: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "index", (self.rank.value - 2) * 4 + self.suit.index())
 
     @classmethod
     def from_str_list(cls, card_strs : list[str]) -> list[Card]:
         return list(map(lambda s: Card.from_str(s), card_strs))
         
     @classmethod
-    def deck(cls) -> list[Card]:
-        cards : list[Card] = []
-        for rank in Rank:
-            for suit in Suit:
-                card = Card(rank=rank, suit=suit)
-                cards.append(card)
-        random.shuffle(cards)
+    def deck(cls, rng : Optional[random.Random] = None) -> list[Card]:
+        cards = list(CARDS)
+        (rng or random).shuffle(cards)
         return cards
 
     @classmethod
@@ -93,7 +103,45 @@ class Card:
             raise ValueError("invalid string for card: " + s)
         rank = Rank.from_str(s[0])
         suit = Suit.from_str(s[1])
-        return Card(rank=rank, suit=suit)
+        return CARDS[(rank.value - 2) * 4 + suit.index()]
+
+    @classmethod
+    def from_int(cls, i : int) -> Card:
+        return CARDS[i]
+
+    @classmethod
+    def from_ints(cls, ints : list[int]) -> list[Card]:
+        return [CARDS[i] for i in ints]
+
+    @classmethod
+    def from_mask(cls, mask : int) -> list[Card]:
+        cards : list[Card] = []
+        while mask:
+            low = mask & -mask
+            cards.append(CARDS[low.bit_length() - 1])
+            mask ^= low
+        return cards
+
+    @classmethod
+    def to_ints(cls, cards : list[Card]) -> list[int]:
+        return [c.index for c in cards]
+
+    @classmethod
+    def to_mask(cls, cards : list[Card]) -> int:
+        mask = 0
+        for c in cards:
+            mask |= 1 << c.index
+        return mask
+
+    @property
+    def mask(self) -> int:
+        return 1 << self.index
+
+    def __hash__(self) -> int:
+        return self.index
+
+    def __reduce__(self):
+        return (Card.from_int, (self.index,))
 
     def __str__(self):
         return str(self.rank) + str(self.suit)
@@ -102,3 +150,6 @@ class Card:
         if self.__class__ is other.__class__:
             return self.rank < other.rank
         return NotImplemented
+
+
+CARDS : tuple[Card, ...] = tuple(Card(rank=rank, suit=suit) for rank in Rank for suit in Suit)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+from typing import Optional
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import time
+import numpy as np
+from src.poker.table import Action, Round, RAISE_LIMIT, BIG_BLIND
+from src.poker.tree import GameTree, NodeType
+from src.poker.preflop import NUM_CLASSES, class_index
+from src.poker.ranges import COMBOS, NUM_COMBOS, Abstraction, ChanceBoard, Showdown, board_strengths, compatible_sums, deal_boards, live, opponent_hands
+from src.poker import exploitability as _exploitability
+from src.poker.strategy_store import save_strategy
+
+# Iterations each worker runs on its own copy of the tables before the
+# regret and strategy deltas are summed back into the shared ones.
+SYNC_ITERATIONS = 10
+
+_FOLD, _CHANCE, _SHOWDOWN = NodeType.Fold.value, NodeType.Chance.value, NodeType.Showdown.value
+
+# Preflop hands keep their 169 classes; after the flop hands are split into
+# equal width buckets of hand strength, the share of hands beaten (ties
+# counting half) among the hands the opponent may still hold.
+@dataclass(frozen=True)
+class HandStrengthAbstraction:
+    postflop_buckets : int = 8
+
+    @property
+    def buckets(self) -> tuple[int, int, int, int]:
+        return (NUM_CLASSES,) + (self.postflop_buckets,) * 3
+
+    def bucket(self, round : Round, board : tuple[int, ...]) -> np.ndarray:
+        if round == Round.Preflop:
+            return _PREFLOP_BUCKETS
+        return np.minimum((hand_strength(board) * self.postflop_buckets).astype(np.intp), self.postflop_buckets - 1)
+
+def hand_strength(board : tuple[int, ...]) -> np.ndarray:
+    hands = live(board).astype(np.float64)
+    count = compatible_sums(hands)
+    margin = Showdown(board_strengths(board)).values(hands)
+    return np.where(hands > 0, 0.5 + margin / (2 * np.maximum(count, 1)), 0.0)
+
+_PREFLOP_BUCKETS = np.array([class_index(int(a), int(b)) for a, b in COMBOS], dtype=np.intp)
+
+@dataclass
+class Progress:
+    iterations : int
+    seconds : float
+    # chips per hand a best responder wins against the average strategy,
+    # averaged over both positions
+    exploitability : float
+
+    @property
+    def milli_big_blinds(self) -> float:
+        return self.exploitability / BIG_BLIND * 1000
+
+# CFR+ over the betting tree with public chance sampling: each iteration
+# deals one board and walks the tree once per player, carrying the ranges of
+# both players as vectors over all 1326 hands, so every hand's regrets are
+# updated at once. Regrets and strategy sums are (info sets, actions) arrays
+# where a decision node's info sets start at offsets[node] and run over the
+# card buckets of its round.
+class CFRSolver:
+
+    def __init__(self, abstraction : Optional[Abstraction] = None, raise_limit : int = RAISE_LIMIT):
+        self.abstraction = abstraction or HandStrengthAbstraction()
+        self.raise_limit = raise_limit
+        self.tree = GameTree.build(raise_limit=raise_limit)
+        self.offsets, size = self.tree.infoset_offsets(self.abstraction.buckets)
+        self.regrets = np.zeros((size, len(Action)))
+        self.strategy_sum = np.zeros((size, len(Action)))
+        self.iterations = 0
+        # plain lists walk faster than array lookups node by node
+        tree = self.tree
+        self._type = tree.node_type.tolist()
+        self._children = tree.children.tolist()
+        self._round = tree.round.tolist()
+        self._to_act = tree.to_act.tolist()
+        self._committed = tree.committed.tolist()
+        self._parent = tree.parent.tolist()
+        self._offset = self.offsets.tolist()
+        self._legal = tree.legal
+
+    def iterate(self, iterations : int, rng : np.random.Generator):
+        for _ in range(iterations):
+            self.iterations += 1
+            board = deal_boards(self.abstraction, (), Round.Preflop, (1, 1, 1, 1), rng)
+            for player in (0, 1):
+                reach = [np.ones(NUM_COMBOS), np.full(NUM_COMBOS, 1 / opponent_hands(0))]
+                if player == 1:
+                    reach.reverse()
+                self._update(0, player, reach, board)
+        # regret matching+ only ever plays from positive regrets
+        np.maximum(self.regrets, 0, out=self.regrets)
+
+    def train(self, iterations : int, seed : int = 0, processes : int = 1, sync_every : int = SYNC_ITERATIONS, report_every : Optional[int] = None, flops : int = 4, turns : int = 2, rivers : int = 2) -> list[Progress]:
+        # Each step every worker runs sync_every iterations from the current
+        # tables, then their deltas are summed. The worker count is part of
+        # the algorithm, so results depend on processes but not on timing.
+        seeds = iter(np.random.SeedSequence(seed).spawn(iterations))
+        progress = []
+        started = time.perf_counter()
+        last_report = self.iterations
+        target = self.iterations + iterations
+        executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+        try:
+            while self.iterations < target:
+                if executor is None:
+                    self.iterate(min(sync_every, target - self.iterations), np.random.default_rng(next(seeds)))
+                else:
+                    counts = []
+                    left = target - self.iterations
+                    while left > 0 and len(counts) < processes:
+                        counts.append(min(sync_every, left))
+                        left -= counts[-1]
+                    chunks = [(self.abstraction, self.raise_limit, self.regrets, self.strategy_sum, self.iterations, count, next(seeds)) for count in counts]
+                    self._reduce(list(executor.map(_train_chunk, *zip(*chunks))), sum(counts))
+                if report_every and self.iterations - last_report >= report_every:
+                    last_report = self.iterations
+                    exploitability = self.exploitability(flops=flops, turns=turns, rivers=rivers, seed=seed, processes=processes)
+                    progress.append(Progress(self.iterations, time.perf_counter() - started, exploitability))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return progress
+
+    def average_strategy(self) -> np.ndarray:
+        return _normalize(self.strategy_sum, self._infoset_legal())
+
+    def current_strategy(self) -> np.ndarray:
+        return _normalize(self.regrets, self._infoset_legal())
+
+    def strategy(self, node : int, buckets : np.ndarray, average : bool = True) -> np.ndarray:
+        # action probabilities at a decision node for each bucket given
+        table = self.strategy_sum if average else self.regrets
+        start = self._offset[node]
+        size = self.abstraction.buckets[self._round[node]]
+        return _normalize(table[start:start + size], self._legal[node])[buckets]
+
+    def save(self, path : Path):
+        # the average strategy for play, see strategy_store
+        save_strategy(path, self.average_strategy(), self.abstraction.buckets, self.raise_limit)
+
+    def exploitability(self, flops : Optional[int] = 4, turns : Optional[int] = 2, rivers : Optional[int] = 2, seed : int = 0, processes : int = 1) -> float:
+        # best response against the average strategy, see
+        # exploitability.exploitability
+        return _exploitability.exploitability(self.average_strategy(), self.abstraction, self.raise_limit, flops, turns, rivers, seed, processes)
+
+    def _update(self, node : int, player : int, reach : list[np.ndarray], board : ChanceBoard) -> np.ndarray:
+        # counterfactual value of every hand of player at node, updating
+        # player's regrets and strategy sums below it
+        kind = self._type[node]
+        opponent = 1 - player
+        if kind == _FOLD or kind == _SHOWDOWN:
+            return self._terminal(node, player, reach[opponent], board)
+        if kind == _CHANCE:
+            total = np.zeros(NUM_COMBOS)
+            for child in board.children:
+                scaled = [r * child.live for r in reach]
+                scaled[opponent] *= child.opponent_scale
+                total += child.live * self._update(self._children[node][0], player, scaled, child)
+            return total * board.children[0].own_scale / len(board.children)
+        acting = self._to_act[node]
+        children = self._children[node]
+        start = self._offset[node]
+        size = self.abstraction.buckets[self._round[node]]
+        regrets = self.regrets[start:start + size]
+        strategy = _normalize(regrets, self._legal[node])[board.buckets]
+        if acting != player:
+            total = np.zeros(NUM_COMBOS)
+            for action, child in enumerate(children):
+                if child >= 0:
+                    child_reach = list(reach)
+                    child_reach[acting] = reach[acting] * strategy[:, action]
+                    total += self._update(child, player, child_reach, board)
+            return total
+        if not reach[opponent].any():
+            return np.zeros(NUM_COMBOS)
+        values = np.zeros((NUM_COMBOS, len(Action)))
+        for action, child in enumerate(children):
+            if child >= 0:
+                child_reach = list(reach)
+                child_reach[acting] = reach[acting] * strategy[:, action]
+                values[:, action] = self._update(child, player, child_reach, board)
+        value = (strategy * values).sum(axis=1)
+        weight = board.live * reach[player]
+        for action, child in enumerate(children):
+            if child >= 0:
+                regrets[:, action] += np.bincount(board.buckets, weights=board.live * (values[:, action] - value), minlength=size)
+                self.strategy_sum[start:start + size, action] += self.iterations * np.bincount(board.buckets, weights=weight * strategy[:, action], minlength=size)
+        np.maximum(regrets, 0, out=regrets)
+        return value
+
+    def _terminal(self, node : int, player : int, opponent_reach : np.ndarray, board : ChanceBoard) -> np.ndarray:
+        committed = self._committed[node]
+        if self._type[node] == _SHOWDOWN:
+            return committed[player] * board.showdown.values(opponent_reach)
+        folder = self._to_act[self._parent[node]]
+        won = -committed[player] if folder == player else committed[1 - player]
+        return won * compatible_sums(opponent_reach)
+
+    def _infoset_legal(self) -> np.ndarray:
+        sizes = np.array(self.abstraction.buckets)[self.tree.round[self.tree.decision_nodes]]
+        return np.repeat(self._legal[self.tree.decision_nodes], sizes, axis=0)
+
+    def _reduce(self, deltas : list[tuple[np.ndarray, np.ndarray]], iterations : int):
+        for regrets, strategy_sum in deltas:
+            self.regrets += regrets
+            self.strategy_sum += strategy_sum
+        np.maximum(self.regrets, 0, out=self.regrets)
+        self.iterations += iterations
+
+def _train_chunk(abstraction : Abstraction, raise_limit : int, regrets : np.ndarray, strategy_sum : np.ndarray, iterations_done : int, iterations : int, seed : np.random.SeedSequence) -> tuple[np.ndarray, np.ndarray]:
+    # returns what the chunk adds to the regret and strategy sum tables
+    solver = _worker_solver(abstraction, raise_limit)
+    solver.regrets = regrets.copy()
+    solver.strategy_sum = strategy_sum.copy()
+    solver.iterations = iterations_done
+    solver.iterate(iterations, np.random.default_rng(seed))
+    return solver.regrets - regrets, solver.strategy_sum - strategy_sum
+
+_WORKER_SOLVERS : dict[tuple, CFRSolver] = {}
+
+def _worker_solver(abstraction : Abstraction, raise_limit : int) -> CFRSolver:
+    # the tree is built once per worker process
+    key = (abstraction, raise_limit)
+    if key not in _WORKER_SOLVERS:
+        _WORKER_SOLVERS[key] = CFRSolver(abstraction, raise_limit)
+    return _WORKER_SOLVERS[key]
+
+def _normalize(table : np.ndarray, legal : np.ndarray) -> np.ndarray:
+    # rows of non negative weights to probabilities over the legal actions,
+    # uniform where a row has no weight
+    weights = np.where(legal, np.maximum(table, 0), 0)
+    total = weights.sum(axis=-1, keepdims=True)
+    uniform = legal / legal.sum(axis=-1, keepdims=True)
+    return np.where(total > 0, weights / np.where(total > 0, total, 1), uniform)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from typing import Optional, Protocol
+import random
+from src.poker.card import Card, CARDS
+
+class RandomSource(Protocol):
+    # satisfied by both random.Random and numpy.random.Generator
+    def random(self) -> float: ...
+
+# A deck keeps all 52 cards in one list for its whole life. The first size
+# entries are undealt; dealing swaps a random undealt card to the end of that
+# region and shrinks it (one Fisher-Yates step), so only the cards actually
+# used are ever shuffled.
+class Deck:
+
+    def __init__(self, rng: Optional[RandomSource] = None, dead: Optional[list[Card]] = None):
+        self._cards = list(CARDS)
+        self._random = (rng or random).random
+        self._shuffle = True
+        self._size = 52
+        self.reset(dead=dead)
+
+    @classmethod
+    def stacked(cls, cards: list[Card]) -> Deck:
+        # deals the given cards in order, for tests and replays
+        deck = Deck()
+        deck._shuffle = False
+        deck._cards = [c for c in CARDS if c not in cards] + list(reversed(cards))
+        return deck
+
+    def reset(self, dead: Optional[list[Card]] = None):
+        self._size = 52
+        for card in dead or []:
+            self.remove(card)
+
+    def remove(self, card: Card):
+        cards = self._cards
+        i = cards.index(card, 0, self._size)
+        self._size -= 1
+        cards[i], cards[self._size] = cards[self._size], cards[i]
+
+    def deal(self) -> Card:
+        if self._size == 0:
+            raise IndexError("deck is empty")
+        self._size -= 1
+        cards = self._cards
+        if self._shuffle:
+            i = int(self._random() * (self._size + 1))
+            cards[i], cards[self._size] = cards[self._size], cards[i]
+        return cards[self._size]
+
+    def deal_many(self, n: int) -> list[Card]:
+        return [self.deal() for _ in range(n)]
+
+    def remaining(self) -> list[Card]:
+        return self._cards[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from typing import Optional
+from dataclasses import dataclass
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.poker.card import Card, CARDS
+from src.poker.batch_evaluator import evaluate_batch
+
+# Monte Carlo trials are split into fixed size chunks, each with its own
+# seed spawned from the caller's seed, so the merged counts only depend on
+# the seed and never on how many processes ran the chunks.
+CHUNK_TRIALS = 25_000
+
+@dataclass
+class Equity:
+    win : int
+    tie : int
+    loss : int
+
+    @property
+    def trials(self) -> int:
+        return self.win + self.tie + self.loss
+
+    @property
+    def win_probability(self) -> float:
+        return self.win / self.trials
+
+    @property
+    def tie_probability(self) -> float:
+        return self.tie / self.trials
+
+    @property
+    def loss_probability(self) -> float:
+        return self.loss / self.trials
+
+    @property
+    def equity(self) -> float:
+        return (self.win + self.tie / 2) / self.trials
+
+    def __add__(self, other: Equity) -> Equity:
+        return Equity(win=self.win + other.win, tie=self.tie + other.tie, loss=self.loss + other.loss)
+
+def all_combos() -> list[list[Card]]:
+    return [list(combo) for combo in combinations(CARDS, 2)]
+
+def equity(hole_cards : list[Card], villain_range : Optional[list[list[Card]]] = None, board : Optional[list[Card]] = None, trials : int = 100_000, seed : Optional[int] = None, processes : int = 1) -> Equity:
+    if len(hole_cards) != 2:
+        raise ValueError("hole cards must be two cards")
+    board = board or []
+    if len(board) > 5:
+        raise ValueError("board can have at most five cards")
+    known = Card.to_mask(hole_cards + board)
+    if known.bit_count() != len(hole_cards) + len(board):
+        raise ValueError("hole cards and board must not share cards")
+    if villain_range is None:
+        villain_range = all_combos()
+    combos = np.array([Card.to_ints(c) for c in villain_range if not Card.to_mask(c) & known], dtype=np.uint8).reshape(-1, 2)
+    if len(combos) == 0:
+        raise ValueError("every hand in the villain range conflicts with the known cards")
+    hero = np.array(Card.to_ints(hole_cards + board), dtype=np.uint8)
+    deck = np.array([i for i in range(52) if not known >> i & 1], dtype=np.uint8)
+    missing = 5 - len(board)
+    runouts = _count_combinations(len(deck) - 2, missing)
+    if len(combos) * runouts <= trials:
+        chunks = [(hero, part, deck, missing) for part in np.array_split(combos, min(processes, len(combos)))]
+        return _run(_exact_chunk, chunks, processes)
+    seeds = np.random.SeedSequence(seed).spawn(-(-trials // CHUNK_TRIALS))
+    sizes = [CHUNK_TRIALS] * (len(seeds) - 1) + [trials - CHUNK_TRIALS * (len(seeds) - 1)]
+    chunks = [(hero, combos, deck, missing, size, s) for size, s in zip(sizes, seeds)]
+    return _run(_monte_carlo_chunk, chunks, processes)
+
+def _run(fn, chunks : list[tuple], processes : int) -> Equity:
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(fn, *zip(*chunks)))
+    else:
+        results = [fn(*chunk) for chunk in chunks]
+    total = Equity(win=0, tie=0, loss=0)
+    for result in results:
+        total += result
+    return total
+
+def _count_combinations(n : int, k : int) -> int:
+    count = 1
+    for i in range(k):
+        count = count * (n - i) // (i + 1)
+    return count
+
+def _showdown(hero : np.ndarray, villain : np.ndarray, runouts : np.ndarray) -> Equity:
+    n = len(runouts)
+    hero_cards = np.concatenate([np.broadcast_to(hero, (n, len(hero))), runouts], axis=1)
+    villain_cards = np.concatenate([villain, hero_cards[:, 2:]], axis=1)
+    hero_strengths, _ = evaluate_batch(hero_cards)
+    villain_strengths, _ = evaluate_batch(villain_cards)
+    win = int(np.count_nonzero(hero_strengths > villain_strengths))
+    tie = int(np.count_nonzero(hero_strengths == villain_strengths))
+    return Equity(win=win, tie=tie, loss=n - win - tie)
+
+def _exact_chunk(hero : np.ndarray, combos : np.ndarray, deck : np.ndarray, missing : int) -> Equity:
+    runout_list = list(combinations(deck.tolist(), missing))
+    runouts = np.array(runout_list, dtype=np.uint8).reshape(len(runout_list), missing)
+    # pair every villain hand with every runout that does not use its cards
+    conflicts = _masks(combos)[:, None] & _masks(runouts)[None, :]
+    combo_rows, runout_rows = np.nonzero(conflicts == 0)
+    return _showdown(hero, combos[combo_rows], runouts[runout_rows])
+
+def _masks(cards : np.ndarray) -> np.ndarray:
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), cards.astype(np.uint64)), axis=1)
+
+def _monte_carlo_chunk(hero : np.ndarray, combos : np.ndarray, deck : np.ndarray, missing : int, trials : int, seed : np.random.SeedSequence) -> Equity:
+    rng = np.random.default_rng(seed)
+    villain = combos[rng.integers(len(combos), size=trials)]
+    position = np.zeros(52, dtype=np.intp)
+    position[deck] = np.arange(len(deck))
+    # random sort keys, with the villain's cards pushed past every live card
+    keys = rng.random((trials, len(deck)))
+    rows = np.arange(trials)
+    keys[rows, position[villain[:, 0]]] = 2.0
+    keys[rows, position[villain[:, 1]]] = 2.0
+    drawn = np.argpartition(keys, missing, axis=1)[:, :missing] if missing else np.zeros((trials, 0), dtype=np.intp)
+    return _showdown(hero, villain, deck[drawn])
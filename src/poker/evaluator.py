@@ -0,0 +1,185 @@
+from __future__ import annotations
+from itertools import combinations_with_replacement
+import functools
+from src.poker.card import Card
+
+# A hand strength is a single int: the Ranking value in the top bits followed
+# by the five ranks of the formed hand (4 bits each, most significant first).
+# Comparing two strengths gives the same order as comparing two Hands.
+RANKING_SHIFT = 20
+
+# Card keys pack the base 5 rank multiset key above 12 bits of suit counts
+# (3 bits per suit), so summing the keys of a card set yields both at once.
+SUIT_BITS = 12
+SUIT_FIELD_MASK = (1 << SUIT_BITS) - 1
+RANK_KEY_BASE = 5
+
+# Ranking values, mirrored here so hand.py can build on this module
+_HIGH_CARD = 1
+_PAIR = 2
+_TWO_PAIR = 3
+_THREE_OF_A_KIND = 4
+_STRAIGHT = 5
+_FLUSH = 6
+_FULL_HOUSE = 7
+_FOUR_OF_A_KIND = 8
+_STRAIGHT_FLUSH = 9
+_ROYAL_FLUSH = 10
+_WHEEL = 0b1000000001111
+
+def evaluate(cards: list[Card]) -> int:
+    return evaluate_indices([c.index for c in cards])
+
+def evaluate_indices(indices: list[int]) -> int:
+    if len(indices) < 5:
+        raise ValueError("must have at least five cards")
+    key = 0
+    for i in indices:
+        key += CARD_KEYS[i]
+    suit = FLUSH_SUIT[key & SUIT_FIELD_MASK]
+    if suit >= 0:
+        mask = 0
+        for i in indices:
+            if i & 3 == suit:
+                mask |= 1 << (i >> 2)
+        return FLUSH_STRENGTHS[mask]
+    return RANK_STRENGTHS[key >> SUIT_BITS]
+
+# Strengths of recently evaluated card sets, keyed by Card.to_mask, for
+# work that meets the same sets again and again: repeated boards in
+# benchmarks and analysis. Random deals almost never hit, and the cache
+# wrapper then makes a lookup slower than evaluate, so play does not use it.
+# See evaluate_mask.cache_info() for hits and misses and cache_clear() to
+# reset.
+EVALUATION_CACHE_SIZE = 1 << 16
+
+@functools.lru_cache(maxsize=EVALUATION_CACHE_SIZE)
+def evaluate_mask(mask: int) -> int:
+    if mask.bit_count() < 5:
+        raise ValueError("must have at least five cards")
+    a, b, c, d = mask & _MASK_CHUNK, (mask >> 13) & _MASK_CHUNK, (mask >> 26) & _MASK_CHUNK, mask >> 39
+    key = MASK_KEYS[0][a] + MASK_KEYS[1][b] + MASK_KEYS[2][c] + MASK_KEYS[3][d]
+    suit = FLUSH_SUIT[key & SUIT_FIELD_MASK]
+    if suit >= 0:
+        ranks = MASK_SUIT_RANKS[0][a] | MASK_SUIT_RANKS[1][b] | MASK_SUIT_RANKS[2][c] | MASK_SUIT_RANKS[3][d]
+        return FLUSH_STRENGTHS[(ranks >> (13 * suit)) & _MASK_CHUNK]
+    return RANK_STRENGTHS[key >> SUIT_BITS]
+
+def ranking_value(strength: int) -> int:
+    return strength >> RANKING_SHIFT
+
+def strength_ranks(strength: int) -> list[int]:
+    return [(strength >> (4 * i)) & 0xF for i in range(4, -1, -1)]
+
+def _strength(ranking: int, ranks: list[int]) -> int:
+    strength = ranking
+    for r in ranks:
+        strength = (strength << 4) | r
+    return strength
+
+def _straight_high(mask: int) -> int:
+    for high in range(12, 3, -1):
+        run = 0b11111 << (high - 4)
+        if mask & run == run:
+            return high + 2
+    if mask & _WHEEL == _WHEEL:
+        return 5
+    return 0
+
+def _straight_ranks(high: int) -> list[int]:
+    if high == 5:
+        return [5, 4, 3, 2, 14]
+    return list(range(high, high - 5, -1))
+
+def _flush_strength(mask: int) -> int:
+    high = _straight_high(mask)
+    if high == 14:
+        return _strength(_ROYAL_FLUSH, _straight_ranks(high))
+    if high:
+        return _strength(_STRAIGHT_FLUSH, _straight_ranks(high))
+    ranks = [r + 2 for r in range(12, -1, -1) if mask & (1 << r)]
+    return _strength(_FLUSH, ranks[:5])
+
+def _rank_strength(ranks: tuple[int, ...]) -> int:
+    # ranks holds the rank values of the cards in descending order
+    present = sorted(set(ranks), reverse=True)
+    groups = sorted(present, key=lambda r: ranks.count(r), reverse=True)
+    top = ranks.count(groups[0])
+    second = ranks.count(groups[1])
+    if top == 4:
+        kicker = max(r for r in present if r != groups[0])
+        return _strength(_FOUR_OF_A_KIND, [groups[0]] * 4 + [kicker])
+    if top == 3 and second >= 2:
+        return _strength(_FULL_HOUSE, [groups[0]] * 3 + [groups[1]] * 2)
+    mask = 0
+    for r in present:
+        mask |= 1 << (r - 2)
+    high = _straight_high(mask)
+    if high:
+        return _strength(_STRAIGHT, _straight_ranks(high))
+    if top == 3:
+        return _strength(_THREE_OF_A_KIND, [groups[0]] * 3 + groups[1:3])
+    if top == 2 and second == 2:
+        kicker = max(r for r in present if r not in groups[:2])
+        return _strength(_TWO_PAIR, [groups[0]] * 2 + [groups[1]] * 2 + [kicker])
+    if top == 2:
+        return _strength(_PAIR, [groups[0]] * 2 + groups[1:4])
+    return _strength(_HIGH_CARD, present[:5])
+
+def _build_tables():
+    card_keys = []
+    for r in range(13):
+        for s in range(4):
+            card_keys.append((RANK_KEY_BASE ** r << SUIT_BITS) | (1 << (3 * s)))
+    flush_suit = [-1] * (1 << SUIT_BITS)
+    for key in range(1 << SUIT_BITS):
+        for s in range(4):
+            if (key >> (3 * s)) & 7 >= 5:
+                flush_suit[key] = s
+    flush_strengths = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        if bin(mask).count("1") >= 5:
+            flush_strengths[mask] = _flush_strength(mask)
+    # Five card multisets are ranked directly, a larger multiset is as strong
+    # as its strongest subset with one card removed.
+    rank_keys = [RANK_KEY_BASE ** r for r in range(13)]
+    rank_strengths : dict[int, int] = {}
+    for combo in combinations_with_replacement(range(12, -1, -1), 5):
+        if combo.count(combo[2]) < 5:
+            key = sum(rank_keys[r] for r in combo)
+            rank_strengths[key] = _rank_strength(tuple(r + 2 for r in combo))
+    smaller = rank_strengths
+    for _ in (6, 7):
+        larger : dict[int, int] = {}
+        for key, strength in smaller.items():
+            for rank_key in rank_keys:
+                if key // rank_key % RANK_KEY_BASE < 4:
+                    k = key + rank_key
+                    if larger.get(k, 0) < strength:
+                        larger[k] = strength
+        rank_strengths.update(larger)
+        smaller = larger
+    return card_keys, flush_suit, flush_strengths, rank_strengths
+
+def _build_mask_keys(card_keys):
+    # summed card keys of every 13 card chunk of a mask, so evaluate_mask
+    # builds a key with four lookups instead of a loop over the set bits,
+    # and the rank mask of each suit in the chunk, 13 bits per suit
+    chunks = []
+    suit_ranks = []
+    for c in range(4):
+        keys = [0] * (_MASK_CHUNK + 1)
+        ranks = [0] * (_MASK_CHUNK + 1)
+        for v in range(1, _MASK_CHUNK + 1):
+            low = v & -v
+            card = 13 * c + low.bit_length() - 1
+            keys[v] = keys[v ^ low] + card_keys[card]
+            ranks[v] = ranks[v ^ low] | 1 << (13 * (card & 3) + (card >> 2))
+        chunks.append(keys)
+        suit_ranks.append(ranks)
+    return chunks, suit_ranks
+
+_MASK_CHUNK = (1 << 13) - 1
+
+CARD_KEYS, FLUSH_SUIT, FLUSH_STRENGTHS, RANK_STRENGTHS = _build_tables()
+MASK_KEYS, MASK_SUIT_RANKS = _build_mask_keys(CARD_KEYS)
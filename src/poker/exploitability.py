@@ -0,0 +1,299 @@
+from __future__ import annotations
+from typing import Optional, Union
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from itertools import combinations
+from math import comb
+import numpy as np
+from src.poker.table import Action, Round, RAISE_LIMIT
+from src.poker.tree import GameTree, NodeType
+from src.poker.ranges import NUM_COMBOS, Abstraction, ChanceBoard, compatible_sums, deal_boards, live, opponent_hands
+
+# Boards a best response is computed on by default: random flops, each with
+# TURNS turn cards and each of those with RIVERS river cards.
+FLOPS = 16
+TURNS = 4
+RIVERS = 4
+
+# round subtrees walked together at most, and terminal ranges valued per
+# call; both bound the memory of a walk
+LAYER_ROOTS = 16
+TERMINAL_ROWS = 32
+
+_DECISION, _CHANCE, _FOLD, _SHOWDOWN = (t.value for t in NodeType)
+
+def load_strategy(path : Path) -> np.ndarray:
+    # a strategy table saved with np.save, memory mapped
+    return np.load(path, mmap_mode="r")
+
+def exploitability(strategy : Union[np.ndarray, Path], abstraction : Abstraction, raise_limit : int = RAISE_LIMIT, flops : Optional[int] = FLOPS, turns : Optional[int] = TURNS, rivers : Optional[int] = RIVERS, seed : int = 0, processes : int = 1) -> float:
+    # Chips per hand a best responder wins against strategy, averaged over
+    # both positions, on sampled boards; None deals every card of a round.
+    # The responder sees its exact cards. strategy holds action
+    # probabilities per info set, laid out as CFRSolver tables are.
+    #
+    # Whatever the responder does preflop, the opponent's reach at each flop
+    # chance node is fixed by its strategy, so the values below every flop
+    # are computed independently, one flop per task, then averaged back into
+    # the preflop walk. Flops and their seeds are drawn up front, so the
+    # result does not depend on processes.
+    if not isinstance(strategy, np.ndarray):
+        strategy = load_strategy(strategy)
+    best_response = BestResponse(strategy, abstraction, raise_limit)
+    rng = np.random.default_rng(seed)
+    flop_cards = list(combinations(range(52), 3)) if flops is None else [tuple(sorted(rng.choice(52, size=3, replace=False).tolist())) for _ in range(flops)]
+    seeds = np.random.SeedSequence(seed).spawn(len(flop_cards))
+    tasks = [(flop, turns, rivers, s) for flop, s in zip(flop_cards, seeds)]
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(strategy, abstraction, raise_limit)) as executor:
+            totals = sum(executor.map(_flop_values, *zip(*tasks), chunksize=max(1, len(tasks) // (4 * processes))))
+    else:
+        _init_worker(strategy, abstraction, raise_limit, best_response)
+        totals = sum(_flop_values(*task) for task in tasks)
+    return best_response.preflop_value(totals * (comb(52, 3) / comb(50, 3)) / len(tasks))
+
+# Best response against a fixed strategy, carrying the opponent's reach as
+# vectors over all 1326 hands: the responder takes the best action for each
+# of its hands, the opponent plays the strategy of its hand's bucket.
+#
+# After the preflop the tree is walked a round at a time. Every board of a
+# round sees the same betting subtrees, so they are laid out once, see
+# _Layer. On each board reach flows down a depth at a time, terminals are
+# valued in blocks and values flow back up a depth at a time, a fixed number
+# of array operations per depth instead of a few per node.
+class BestResponse:
+
+    def __init__(self, strategy : np.ndarray, abstraction : Abstraction, raise_limit : int = RAISE_LIMIT):
+        tree = GameTree.build(raise_limit=raise_limit)
+        offsets, size = tree.infoset_offsets(abstraction.buckets)
+        if strategy.shape != (size, len(Action)):
+            raise ValueError(f"expected a strategy of shape {(size, len(Action))}, got {strategy.shape}")
+        self.tree = tree
+        self.strategy = strategy
+        self.abstraction = abstraction
+        self.offsets = offsets
+        # strategy cells as one flat array, see _Layer.opponent_actions
+        self.cells = strategy.reshape(-1)
+        self.preflop = ChanceBoard((), live(()), abstraction.bucket(Round.Preflop, ()), None, [])
+        # the chance nodes closing the preflop, in the order of the flop layers
+        self.flop_chances = [n for n in _preflop_nodes(tree, 0) if tree.node_type[n] == _CHANCE]
+        self.flop_layers = _Layer.chunks(tree, offsets, [int(tree.children[n, 0]) for n in self.flop_chances])
+
+    def flop_reach(self, player : int) -> np.ndarray:
+        # the opponent's reach at each preflop chance node, one row each
+        uniform = np.full(NUM_COMBOS, 1 / opponent_hands(0))
+        return np.array([self._preflop_reach(node, player, uniform) for node in self.flop_chances])
+
+    def flop_values(self, player : int, board : ChanceBoard) -> np.ndarray:
+        # one flop's share of the values at each preflop chance node
+        reach = self.flop_reach(player) * board.live * board.opponent_scale
+        return board.live * self._round_values(self.flop_layers, player, reach, board)
+
+    def preflop_value(self, flop_values : np.ndarray) -> float:
+        # the responder's mean value over both positions, given the values
+        # at the preflop chance nodes stacked by player
+        uniform = np.full(NUM_COMBOS, 1 / opponent_hands(0))
+        total = 0.0
+        for player in (0, 1):
+            chance = dict(zip(self.flop_chances, flop_values[player]))
+            total += self._preflop_values(0, player, uniform, chance).mean()
+        return float(total / 2)
+
+    def _preflop_reach(self, node : int, player : int, reach : np.ndarray) -> np.ndarray:
+        parent = int(self.tree.parent[node])
+        if parent < 0:
+            return reach
+        reach = self._preflop_reach(parent, player, reach)
+        if self.tree.to_act[parent] == player:
+            return reach
+        action = int(np.flatnonzero(self.tree.children[parent] == node)[0])
+        return reach * self._strategy(parent, action, self.preflop)
+
+    def _preflop_values(self, node : int, player : int, reach : np.ndarray, chance : dict[int, np.ndarray]) -> np.ndarray:
+        tree = self.tree
+        kind = tree.node_type[node]
+        if kind == _CHANCE:
+            return chance[node]
+        if kind == _FOLD:
+            return _won(tree, np.array([node]), player)[0] * compatible_sums(reach)
+        children = [(action, int(child)) for action, child in enumerate(tree.children[node]) if child >= 0]
+        if tree.to_act[node] == player:
+            return np.max([self._preflop_values(child, player, reach, chance) for _, child in children], axis=0)
+        total = np.zeros(NUM_COMBOS)
+        for action, child in children:
+            strategy = self._strategy(node, action, self.preflop)
+            total += self._preflop_values(child, player, reach * strategy, chance)
+        return total
+
+    def _round_values(self, layers : list[_Layer], player : int, reach : np.ndarray, board : ChanceBoard) -> np.ndarray:
+        # values at the roots of layers on board, given the opponent's reach
+        # at each root
+        values = []
+        start = 0
+        for layer in layers:
+            values.append(self._layer_values(layer, player, reach[start:start + layer.roots], board))
+            start += layer.roots
+        return np.concatenate(values)
+
+    def _layer_values(self, layer : _Layer, player : int, root_reach : np.ndarray, board : ChanceBoard) -> np.ndarray:
+        reach = np.empty((len(layer.nodes), NUM_COMBOS))
+        reach[:layer.roots] = root_reach
+        columns = board.buckets * len(Action)
+        for (start, stop), (rows, cells) in zip(layer.levels[1:], layer.opponent_actions[player]):
+            reach[start:stop] = reach[layer.parent[start:stop]]
+            # the opponent's actions scale its reach by its strategy
+            if len(rows):
+                reach[rows] *= self.cells.take(cells[:, None] + columns)
+        values = np.empty_like(reach)
+        for rows in (layer.fold, layer.showdown):
+            won = _won(self.tree, layer.nodes[rows], player)[:, None]
+            for i in range(0, len(rows), TERMINAL_ROWS):
+                block = rows[i:i + TERMINAL_ROWS]
+                opponent = reach[block]
+                hands = compatible_sums(opponent) if rows is layer.fold else board.showdown.values(opponent)
+                values[block] = won[i:i + TERMINAL_ROWS] * hands
+        if len(layer.chance):
+            total = np.zeros((len(layer.chance), NUM_COMBOS))
+            for child in board.children:
+                child_reach = reach[layer.chance] * child.live * child.opponent_scale
+                total += child.live * self._round_values(layer.next, player, child_reach, child)
+            values[layer.chance] = total * board.children[0].own_scale / len(board.children)
+        # deepest first, each decision takes the best or the sum of its
+        # children, gathered one action at a time
+        for backups in reversed(layer.backups[player]):
+            for positions, first, further, reduce in backups:
+                below = values[first]
+                for rows, child in further:
+                    below[rows] = reduce(below[rows], values[child])
+                values[positions] = below
+        return values[:layer.roots]
+
+    def _strategy(self, node : int, action : int, board : ChanceBoard) -> np.ndarray:
+        # probability of action at node for every hand on board
+        return self.cells.take((self.offsets[node] + board.buckets) * len(Action) + action)
+
+# A forest of one round's betting subtrees with its nodes numbered by depth,
+# so each depth is one range of positions and the children of a node are
+# consecutive positions of the next. Chance nodes end the round; next holds
+# the layers of the following round, rooted below them in order.
+@dataclass
+class _Layer:
+    roots : int
+    nodes : np.ndarray
+    parent : np.ndarray
+    levels : list[tuple[int, int]]
+    # per player and depth below the roots, the positions reached by the
+    # other's actions and the flat strategy cell of each action for bucket 0
+    opponent_actions : tuple[list, list]
+    # per player and depth, the decisions backed up with one reduce: their
+    # positions, those of their first children and, for each further child,
+    # the decisions that have one and its positions
+    backups : tuple[list, list]
+    fold : np.ndarray
+    showdown : np.ndarray
+    chance : np.ndarray
+    next : list[_Layer]
+
+    @classmethod
+    def chunks(cls, tree : GameTree, offsets : np.ndarray, roots : list[int]) -> list[_Layer]:
+        return [_Layer.build(tree, offsets, roots[i:i + LAYER_ROOTS]) for i in range(0, len(roots), LAYER_ROOTS)]
+
+    @classmethod
+    def build(cls, tree : GameTree, offsets : np.ndarray, roots : list[int]) -> _Layer:
+        node_type = tree.node_type.tolist()
+        children = tree.children.tolist()
+        nodes = list(roots)
+        parent = [-1] * len(roots)
+        action = [-1] * len(roots)
+        levels = []
+        decisions = []
+        start = 0
+        while start < len(nodes):
+            stop = len(nodes)
+            levels.append((start, stop))
+            level = []
+            for position in range(start, stop):
+                node = nodes[position]
+                if node_type[node] != _DECISION:
+                    continue
+                found = []
+                for a, child in enumerate(children[node]):
+                    if child >= 0:
+                        found.append(len(nodes))
+                        nodes.append(child)
+                        parent.append(position)
+                        action.append(a)
+                level.append((position, found))
+            decisions.append(level)
+            start = stop
+        nodes = np.array(nodes, dtype=np.intp)
+        parent = np.array(parent, dtype=np.intp)
+        to_act = tree.to_act[nodes]
+        action = np.array(action, dtype=np.intp)
+        acted_by = np.where(parent >= 0, to_act[parent], -1)
+        cells = offsets[nodes[parent]] * len(Action) + action
+        opponent_actions = tuple([] for _ in (0, 1))
+        for start, stop in levels[1:]:
+            for player in (0, 1):
+                rows = start + np.flatnonzero(acted_by[start:stop] == 1 - player)
+                opponent_actions[player].append((rows, cells[rows]))
+        kinds = tree.node_type[nodes]
+        chance = np.flatnonzero(kinds == _CHANCE)
+        backups = ([], [])
+        for level in decisions:
+            for player in (0, 1):
+                responds = [d for d in level if to_act[d[0]] == player]
+                waits = [d for d in level if to_act[d[0]] != player]
+                backups[player].append([_backup(found, reduce) for found, reduce in ((responds, np.maximum), (waits, np.add)) if found])
+        return _Layer(
+            roots=len(roots),
+            nodes=nodes,
+            parent=parent,
+            levels=levels,
+            opponent_actions=opponent_actions,
+            backups=backups,
+            fold=np.flatnonzero(kinds == _FOLD),
+            showdown=np.flatnonzero(kinds == _SHOWDOWN),
+            chance=chance,
+            next=_Layer.chunks(tree, offsets, tree.children[nodes[chance], 0].tolist()),
+        )
+
+def _backup(decisions : list[tuple[int, list[int]]], reduce : np.ufunc) -> tuple:
+    positions = np.array([p for p, _ in decisions], dtype=np.intp)
+    first = np.array([found[0] for _, found in decisions], dtype=np.intp)
+    further = []
+    for k in range(1, max(len(found) for _, found in decisions)):
+        rows = [i for i, (_, found) in enumerate(decisions) if len(found) > k]
+        further.append((np.array(rows, dtype=np.intp), np.array([decisions[i][1][k] for i in rows], dtype=np.intp)))
+    return positions, first, further, reduce
+
+def _won(tree : GameTree, nodes : np.ndarray, player : int) -> np.ndarray:
+    # chips player wins at terminal nodes per opponent hand beaten
+    committed = tree.committed[nodes]
+    fold = tree.node_type[nodes] == _FOLD
+    folded = tree.to_act[tree.parent[nodes]] == player
+    won = np.where(fold & folded, -committed[:, player], committed[:, 1 - player])
+    return np.where(fold, won, committed[:, player]).astype(np.float64)
+
+def _preflop_nodes(tree : GameTree, node : int) -> list[int]:
+    # node and the preflop nodes below it, depth first in action order
+    found = [node]
+    if tree.node_type[node] == _DECISION:
+        for child in tree.children[node].tolist():
+            if child >= 0:
+                found += _preflop_nodes(tree, child)
+    return found
+
+# State of a worker process, set once so tasks only carry their flop.
+_WORKER : dict = {}
+
+def _init_worker(strategy : np.ndarray, abstraction : Abstraction, raise_limit : int, best_response : Optional[BestResponse] = None):
+    _WORKER["best_response"] = best_response or BestResponse(strategy, abstraction, raise_limit)
+
+def _flop_values(flop : tuple[int, int, int], turns : Optional[int], rivers : Optional[int], seed : np.random.SeedSequence) -> np.ndarray:
+    # one flop's values at every preflop chance node, per player
+    best_response : BestResponse = _WORKER["best_response"]
+    board = deal_boards(best_response.abstraction, flop, Round.Flop, (1, 1, turns, rivers), np.random.default_rng(seed))
+    board.opponent_scale = opponent_hands(0) / opponent_hands(3)
+    return np.array([best_response.flop_values(player, board) for player in (0, 1)])
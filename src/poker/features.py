@@ -0,0 +1,147 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, TypeVar
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Queue
+import threading
+import numpy as np
+from src.poker.table import RAISE_LIMIT, STARTING_STACK
+from src.poker.state import GameState
+from src.poker.history import read_hands, hand_actions, NO_CARD
+
+# Layout of a feature row, always from the point of view of the player to
+# act. Chip amounts are divided by STARTING_STACK.
+HOLE_CARDS = slice(0, 52)
+BOARD = slice(52, 104)
+ROUND = slice(104, 108)
+BUTTON = 108
+POT = 109
+TO_CALL = 110
+CHIPS = 111
+OPPONENT_CHIPS = 112
+RAISES = 113
+NUM_FEATURES = 114
+
+BATCH_SAMPLES = 1024
+PREFETCH_BATCHES = 4
+
+# (state, action, outcome) samples: the features of every decision, the
+# Action.value taken there and the chips the deciding player won in the hand.
+@dataclass
+class SampleBatch:
+    features : np.ndarray
+    actions : np.ndarray
+    outcomes : np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+def encode_state(state : GameState) -> np.ndarray:
+    return encode_states([state])[0]
+
+def encode_states(states : list[GameState]) -> np.ndarray:
+    # hole cards, rounds and numbers are set for the whole batch at once
+    features = np.zeros((len(states), NUM_FEATURES), dtype=np.float32)
+    rows = np.arange(len(states))
+    player = np.array([s.turn for s in states], dtype=np.intp)
+    hole = np.array([s.hole_cards for s in states], dtype=np.intp).reshape(-1, 2, 2)
+    features[rows[:, None], HOLE_CARDS.start + hole[rows, player]] = 1
+    for row, state in enumerate(states):
+        features[row, BOARD.start + np.array(state.board, dtype=np.intp)] = 1
+    features[rows, ROUND.start + np.array([s.round.value for s in states], dtype=np.intp)] = 1
+    numbers = np.array([
+        (s.button == s.turn, s.pot, s.round_outstanding - s.round_committed[s.turn], s.chips[s.turn], s.chips[1 - s.turn], s.round_raises)
+        for s in states
+    ], dtype=np.float32).reshape(-1, 6)
+    features[:, BUTTON] = numbers[:, 0]
+    features[:, POT:RAISES] = numbers[:, 1:5] / STARTING_STACK
+    features[:, RAISES] = numbers[:, 5] / RAISE_LIMIT
+    return features
+
+def hand_samples(hands : np.ndarray) -> SampleBatch:
+    # replays stored hands through GameState to recover every decision
+    states : list[GameState] = []
+    actions : list[int] = []
+    outcomes : list[int] = []
+    for record in hands:
+        board = [int(c) for c in record["board"] if c != NO_CARD]
+        hole = (tuple(int(c) for c in record["hole_cards"][0]), tuple(int(c) for c in record["hole_cards"][1]))
+        state = GameState.new_hand((int(record["stacks"][0]), int(record["stacks"][1])), int(record["button"]), hole)
+        for action in hand_actions(record):
+            states.append(state)
+            actions.append(action.value)
+            outcomes.append(int(record["won"][state.turn]))
+            state = state.apply(action)
+            if state.pending_cards:
+                state = state.deal(tuple(board[len(state.board):len(state.board) + state.pending_cards]))
+    return SampleBatch(
+        features=encode_states(states),
+        actions=np.array(actions, dtype=np.int8),
+        outcomes=np.array(outcomes, dtype=np.float32),
+    )
+
+def history_batches(path : Path, batch_samples : int = BATCH_SAMPLES, prefetch : int = PREFETCH_BATCHES) -> Iterator[SampleBatch]:
+    # fixed size batches from a hand history file, built in a background
+    # thread while the caller trains; at most prefetch batches wait in memory
+    return prefetched(_rebatch((hand_samples(hands) for hands in read_hands(path)), batch_samples), prefetch)
+
+def _rebatch(batches : Iterable[SampleBatch], size : int) -> Iterator[SampleBatch]:
+    pending : list[SampleBatch] = []
+    count = 0
+    for batch in batches:
+        pending.append(batch)
+        count += len(batch)
+        while count >= size:
+            merged = _concatenate(pending)
+            yield SampleBatch(merged.features[:size], merged.actions[:size], merged.outcomes[:size])
+            pending = [SampleBatch(merged.features[size:], merged.actions[size:], merged.outcomes[size:])]
+            count -= size
+    if count:
+        yield _concatenate(pending)
+
+def _concatenate(batches : list[SampleBatch]) -> SampleBatch:
+    return SampleBatch(
+        features=np.concatenate([b.features for b in batches]),
+        actions=np.concatenate([b.actions for b in batches]),
+        outcomes=np.concatenate([b.outcomes for b in batches]),
+    )
+
+T = TypeVar("T")
+
+_DONE = object()
+
+@dataclass
+class _Failure:
+    error : BaseException
+
+def prefetched(items : Iterable[T], size : int = PREFETCH_BATCHES) -> Iterator[T]:
+    # runs the iterable in a daemon thread, handing items over through a
+    # bounded queue; errors are raised again in the consumer
+    queue : Queue = Queue(maxsize=size)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                queue.put(item)
+            queue.put(_DONE)
+        except BaseException as e:
+            queue.put(_Failure(e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # unblock a producer waiting on a full queue if the consumer stops early
+        stop.set()
+        while not queue.empty():
+            queue.get_nowait()
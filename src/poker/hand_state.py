@@ -0,0 +1,109 @@
+from __future__ import annotations
+from typing import NamedTuple
+from dataclasses import dataclass, field
+from src.poker.card import Card
+from src.poker.hand import Hand
+from src.poker.table import Table, Seat
+from src.poker.evaluator import CARD_KEYS, FLUSH_SUIT, FLUSH_STRENGTHS, RANK_STRENGTHS, SUIT_BITS, SUIT_FIELD_MASK
+
+# Rank masks of the ten straights, the wheel last.
+_STRAIGHTS = [0b11111 << low for low in range(8, -1, -1)] + [0b1000000001111]
+# every card of a rank, and every card of a suit, as card masks
+_RANK_CARDS = [0b1111 << (4 * r) for r in range(13)]
+_SUIT_CARDS = [sum(1 << (4 * r + s) for r in range(13)) for s in range(4)]
+
+# Unseen cards that would complete a draw, as card masks. A made flush or
+# straight has no outs of its kind, and neither has a hand of seven cards.
+class Draws(NamedTuple):
+    flush : int
+    straight : int
+
+    def outs(self) -> int:
+        return (self.flush | self.straight).bit_count()
+
+# One player's cards with everything the evaluator needs kept up to date as
+# cards arrive: the summed evaluator keys (rank multiset and suit counts),
+# the rank mask of each suit and of the whole hand. Adding a card and
+# reading the strength both take a few integer operations, where
+# evaluating from scratch walks every card again.
+@dataclass
+class HandState:
+    mask : int = 0
+    key : int = 0
+    ranks : int = 0
+    suit_ranks : list[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    size : int = 0
+
+    @classmethod
+    def from_cards(cls, cards : list[Card]) -> HandState:
+        state = HandState()
+        for c in cards:
+            state.add(c.index)
+        return state
+
+    def add(self, index : int):
+        bit = 1 << index
+        if self.mask & bit:
+            raise ValueError(f"{Card.from_int(index)} is already in the hand")
+        self.mask |= bit
+        self.key += CARD_KEYS[index]
+        self.ranks |= 1 << (index >> 2)
+        self.suit_ranks[index & 3] |= 1 << (index >> 2)
+        self.size += 1
+
+    def strength(self) -> int:
+        # the same strength evaluator.evaluate gives the cards
+        if self.size < 5:
+            raise ValueError("must have at least five cards")
+        suit = FLUSH_SUIT[self.key & SUIT_FIELD_MASK]
+        if suit >= 0:
+            return FLUSH_STRENGTHS[self.suit_ranks[suit]]
+        return RANK_STRENGTHS[self.key >> SUIT_BITS]
+
+    def hand(self, describe : bool = True) -> Hand:
+        return Hand.from_strength(strength=self.strength(), cards=Card.from_mask(self.mask), describe=describe)
+
+    def draws(self) -> Draws:
+        if self.size >= 7:
+            return Draws(flush=0, straight=0)
+        flush = 0
+        if FLUSH_SUIT[self.key & SUIT_FIELD_MASK] < 0:
+            for suit, ranks in enumerate(self.suit_ranks):
+                if ranks.bit_count() == 4:
+                    flush |= _SUIT_CARDS[suit] & ~self.mask
+        straight = 0
+        missing = 0
+        for run in _STRAIGHTS:
+            held = self.ranks & run
+            if held == run:
+                missing = 0
+                break
+            if (held ^ run).bit_count() == 1:
+                missing |= held ^ run
+        for r in range(13):
+            if missing >> r & 1:
+                straight |= _RANK_CARDS[r] & ~self.mask
+        return Draws(flush=flush, straight=straight)
+
+# HandStates for every player at a table, brought up to date with only the
+# board cards dealt since the last update; a new hand starts them over. A
+# hand is told apart by its table, hand count and dealt hole cards, so a
+# fresh Table per hand, whose count stays 0, still starts over.
+class TableHands:
+
+    def __init__(self):
+        self.states : dict[Seat, HandState] = {}
+        self._hand : tuple = ()
+        self._board = 0
+
+    def update(self, table : Table) -> dict[Seat, HandState]:
+        hand = (id(table), table.hands_played, tuple(Card.to_mask(p.hole_cards) for p in table.seats.values()))
+        if hand != self._hand:
+            self._hand = hand
+            self._board = 0
+            self.states = {seat: HandState.from_cards(p.hole_cards) for seat, p in table.seats.items()}
+        for c in table.board[self._board:]:
+            for state in self.states.values():
+                state.add(c.index)
+        self._board = len(table.board)
+        return self.states
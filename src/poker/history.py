@@ -0,0 +1,127 @@
+from __future__ import annotations
+from typing import Iterator
+from pathlib import Path
+import numpy as np
+from src.poker.table import Table, Seat, Action
+
+# One fixed width record per hand. Seat arrays are indexed 0 for Seat.One and
+# 1 for Seat.Two, cards by Card.index with NO_CARD for board cards never dealt
+# and actions by Action.value, in the order they were taken. A raise past the
+# cap is recorded as the call the table turned it into.
+MAX_ACTIONS = 24
+NO_CARD = 255
+
+HAND_DTYPE = np.dtype([
+    ("hand", "<u8"),
+    ("button", "u1"),
+    ("showdown", "?"),
+    ("num_actions", "u1"),
+    ("hole_cards", "u1", (2, 2)),
+    ("board", "u1", (5,)),
+    ("actions", "u1", (MAX_ACTIONS,)),
+    ("stacks", "<i4", (2,)),
+    ("won", "<i4", (2,)),
+])
+
+# Files start with the magic and the record size, followed by the records
+# back to back, so appending is a plain write and any record can be found by
+# its offset.
+MAGIC = b"PKRHIST1"
+HEADER_SIZE = 16
+
+BUFFER_HANDS = 4096
+
+class HandRecorder:
+
+    def __init__(self, path : Path, buffer_hands : int = BUFFER_HANDS):
+        self.path = Path(path)
+        if self.path.exists() and self.path.stat().st_size > 0:
+            _check_header(self.path)
+        else:
+            with open(self.path, "wb") as f:
+                f.write(_header())
+        self._buffer = np.zeros(buffer_hands, dtype=HAND_DTYPE)
+        self._size = 0
+        self._actions : list[int] = []
+
+    def start_hand(self, table : Table):
+        if len(table.seats) != 2:
+            raise ValueError("hand histories are recorded for heads-up tables only")
+        record = self._buffer[self._size]
+        record["hand"] = table.hands_played
+        record["button"] = _seat_index(table.button)
+        for i, seat in enumerate((Seat.One, Seat.Two)):
+            p = table.seats[seat]
+            record["hole_cards"][i] = [c.index for c in p.hole_cards]
+            record["stacks"][i] = p.chips + p.round_committed
+        self._actions = []
+
+    def action(self, action : Action):
+        self._actions.append(action.value)
+
+    def end_hand(self, table : Table, showdown : bool):
+        record = self._buffer[self._size]
+        record["showdown"] = showdown
+        record["num_actions"] = len(self._actions)
+        record["actions"] = 0
+        record["actions"][:len(self._actions)] = self._actions
+        record["board"] = NO_CARD
+        record["board"][:len(table.board)] = [c.index for c in table.board]
+        # the pot has been paid out and no blinds are posted yet
+        record["won"] = [table.seats[seat].chips - stack for seat, stack in zip((Seat.One, Seat.Two), record["stacks"])]
+        self._size += 1
+        if self._size == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        with open(self.path, "ab") as f:
+            f.write(self._buffer[:self._size].tobytes())
+        self._size = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self) -> HandRecorder:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_hands(path : Path, batch_hands : int = BUFFER_HANDS) -> Iterator[np.ndarray]:
+    # streams the file in batches of records, so memory stays bounded; a
+    # record cut short by an interrupted write is left out
+    path = Path(path)
+    _check_header(path)
+    with open(path, "rb") as f:
+        f.seek(HEADER_SIZE)
+        while True:
+            data = f.read(batch_hands * HAND_DTYPE.itemsize)
+            complete = len(data) // HAND_DTYPE.itemsize
+            if complete:
+                yield np.frombuffer(data, dtype=HAND_DTYPE, count=complete)
+            if len(data) < batch_hands * HAND_DTYPE.itemsize:
+                return
+
+def load_hands(path : Path) -> np.ndarray:
+    # read only view of every complete record for random access
+    path = Path(path)
+    _check_header(path)
+    count = (path.stat().st_size - HEADER_SIZE) // HAND_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=HAND_DTYPE)
+    return np.memmap(path, dtype=HAND_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+def hand_actions(record : np.void) -> list[Action]:
+    return [Action(a) for a in record["actions"][:record["num_actions"]]]
+
+def _header() -> bytes:
+    return MAGIC + HAND_DTYPE.itemsize.to_bytes(4, "little") + bytes(HEADER_SIZE - len(MAGIC) - 4)
+
+def _check_header(path : Path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header != _header():
+        raise ValueError(f"{path} is not a hand history file of this version")
+
+def _seat_index(seat : Seat) -> int:
+    return 0 if seat == Seat.One else 1
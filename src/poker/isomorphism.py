@@ -0,0 +1,352 @@
+from __future__ import annotations
+from bisect import bisect_right
+from itertools import combinations, product
+from math import comb
+import numpy as np
+from src.poker.card import Card
+from src.poker.table import Round
+
+# Perfect indexing of hands up to suit permutation, after Waugh, "A Fast and
+# Optimal Hand Isomorphism Algorithm". Cards are dealt in groups (the hole
+# cards, then the board card of each round) and suits are interchangeable,
+# so a hand is a multiset of four suits, each described by the ranks it holds
+# in every group. Indices run densely from 0 to size(round) - 1.
+#
+# Cards are Card.index values, rank * 4 + suit.
+HOLDEM_GROUPS = (2, 3, 1, 1)
+
+class HandIndexer:
+
+    def __init__(self, groups : tuple[int, ...] = HOLDEM_GROUPS):
+        self.groups = groups
+        self._rounds = [_RoundTables(groups[:r + 1]) for r in range(len(groups))]
+
+    def size(self, round : Round) -> int:
+        return self._rounds[round.value].size
+
+    def round_of(self, cards : list[int]) -> Round:
+        total = 0
+        for r, group in enumerate(self.groups):
+            total += group
+            if total == len(cards):
+                return Round(r)
+        raise ValueError(f"{len(cards)} cards do not end a round")
+
+    def index(self, cards : list[int]) -> int:
+        # cards are the hole cards followed by the board
+        tables = self._rounds[self.round_of(cards).value]
+        masks = [[0] * len(tables.groups) for _ in range(4)]
+        start = 0
+        for g, group in enumerate(tables.groups):
+            for c in cards[start:start + group]:
+                bit = 1 << (c >> 2)
+                if any(masks[c & 3][h] & bit for h in range(g + 1)):
+                    raise ValueError(f"card {c} appears twice")
+                masks[c & 3][g] |= bit
+            start += group
+        suits = sorted((_suit_descriptor(m) for m in masks), reverse=True)
+        config = tuple(counts for counts, _ in suits)
+        offset, parts = tables.configs[config]
+        index = 0
+        radix = 1
+        position = 0
+        for counts, multiplicity, size in parts:
+            descriptors = sorted(d for _, d in suits[position:position + multiplicity])
+            index += radix * _multiset_rank(descriptors)
+            radix *= size
+            position += multiplicity
+        return offset + index
+
+    def unindex(self, round : Round, index : int) -> list[int]:
+        # the canonical representative of an index, hole cards first
+        tables = self._rounds[round.value]
+        if not 0 <= index < tables.size:
+            raise ValueError(f"index {index} out of range for {round}")
+        k = bisect_right(tables.offsets, index) - 1
+        local = index - tables.offsets[k]
+        _, parts = tables.configs[tables.keys[k]]
+        groups = [[] for _ in tables.groups]
+        suit = 0
+        for counts, multiplicity, size in parts:
+            local, rank = local // size, local % size
+            descriptors = _multiset_unrank(rank, multiplicity)
+            for d in reversed(descriptors):
+                for g, ranks in enumerate(_descriptor_ranks(counts, d)):
+                    groups[g].extend(r * 4 + suit for r in ranks)
+                suit += 1
+        return [c for group in groups for c in sorted(group)]
+
+    def index_batch(self, cards : np.ndarray) -> np.ndarray:
+        # index for every row of an (N, cards) array, the same steps as index
+        # done with array operations; groups may hold at most 3 cards
+        cards = np.asarray(cards, dtype=np.int64)
+        tables = self._rounds[self.round_of([0] * cards.shape[1]).value]
+        n = len(cards)
+        rows = np.arange(n)
+        masks = np.zeros((n, 4, len(tables.groups)), dtype=np.int64)
+        start = 0
+        for g, group in enumerate(tables.groups):
+            for column in range(start, start + group):
+                c = cards[:, column]
+                np.bitwise_or.at(masks, (rows, c & 3, g), 1 << (c >> 2))
+            start += group
+        counts = _BIT_COUNTS[masks]
+        if (counts.sum(axis=(1, 2)) != cards.shape[1]).any():
+            raise ValueError("a row holds the same card twice")
+        descriptors = np.zeros((n, 4), dtype=np.int64)
+        radix = np.ones((n, 4), dtype=np.int64)
+        used = np.zeros((n, 4), dtype=np.int64)
+        free = np.full((n, 4), 13, dtype=np.int64)
+        for g in range(len(tables.groups)):
+            m = masks[:, :, g]
+            rank = np.zeros((n, 4), dtype=np.int64)
+            seen = np.zeros((n, 4), dtype=np.int64)
+            for r in range(13):
+                has = (m >> r) & 1
+                seen += has
+                position = r - _BIT_COUNTS[used & ((1 << r) - 1)]
+                rank += has * _SMALL_COMB[position, seen]
+            descriptors += radix * rank
+            radix *= _SMALL_COMB[free, counts[:, :, g]]
+            used |= m
+            free -= counts[:, :, g]
+        # suits in descending (count vector, descriptor) order
+        codes = (counts * tables.digit_weights).sum(axis=2)
+        keys = -np.sort(-((codes << _DESCRIPTOR_BITS) | descriptors), axis=1)
+        codes = keys >> _DESCRIPTOR_BITS
+        descriptors = keys & ((1 << _DESCRIPTOR_BITS) - 1)
+        config = tables.config_of((codes << np.array([36, 24, 12, 0])).sum(axis=1))
+        index = tables.offsets_array[config]
+        for j in range(4):
+            k = tables.ascending[config, j]
+            index += tables.position_radix[config, j] * _comb_array(descriptors[:, j] + k, k + 1)
+        return index
+
+    def unindex_batch(self, round : Round, indices : np.ndarray) -> np.ndarray:
+        # canonical representatives of many indices, rows as from unindex
+        tables = self._rounds[round.value]
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) and (indices.min() < 0 or indices.max() >= tables.size):
+            raise ValueError(f"index out of range for {round}")
+        n = len(indices)
+        rows = np.arange(n)
+        config = np.searchsorted(tables.offsets_array, indices, side="right") - 1
+        local = indices - tables.offsets_array[config]
+        descriptors = np.zeros((n, 4), dtype=np.int64)
+        for part in range(4):
+            start, multiplicity, radix, size, count = (a[config, part] for a in tables.part_arrays)
+            remainder = (local // radix) % size
+            for k in range(4, 0, -1):
+                active = multiplicity >= k
+                if not active.any():
+                    continue
+                # largest b with comb(b, k) <= remainder, b below count + multiplicity
+                low = np.full(n, k - 1, dtype=np.int64)
+                high = np.where(active, count + multiplicity - 1, k - 1)
+                while (low < high).any():
+                    middle = (low + high + 1) // 2
+                    fits = _comb_array(middle, np.full(n, k)) <= remainder
+                    low = np.where(fits, middle, low)
+                    high = np.where(fits, high, middle - 1)
+                remainder = np.where(active, remainder - _comb_array(low, np.full(n, k)), remainder)
+                position = start + multiplicity - k
+                descriptors[rows[active], position[active]] = low[active] - (k - 1)
+        counts = tables.position_counts[config]
+        cards = np.zeros((n, sum(tables.groups)), dtype=np.int64)
+        used = np.zeros((n, 4, 13), dtype=bool)
+        free = np.full((n, 4), 13, dtype=np.int64)
+        suits = np.arange(4)
+        start = 0
+        for g, group in enumerate(tables.groups):
+            size = _SMALL_COMB[free, counts[:, :, g]]
+            rank = descriptors % size
+            descriptors //= size
+            positions = _COLEX[counts[:, :, g], rank]
+            free_rank = np.cumsum(~used, axis=2)
+            fill = np.zeros(n, dtype=np.int64)
+            picked = []
+            for q in range(_COLEX.shape[2]):
+                active = q < counts[:, :, g]
+                ranks = np.argmax(free_rank == (positions[:, :, q] + 1)[:, :, None], axis=2)
+                picked.append((active, ranks))
+            for active, ranks in picked:
+                used[np.nonzero(active) + (ranks[active],)] = True
+                for j in suits:
+                    on = active[:, j]
+                    cards[rows[on], start + fill[on]] = ranks[on, j] * 4 + j
+                    fill += on
+            free -= counts[:, :, g]
+            cards[:, start:start + group] = np.sort(cards[:, start:start + group], axis=1)
+            start += group
+        return cards
+
+class _RoundTables:
+
+    def __init__(self, groups : tuple[int, ...]):
+        self.groups = groups
+        # a configuration is the sorted count vectors of the four suits; its
+        # classes are split by each distinct vector, whose suits choose a
+        # multiset of that many descriptors
+        keys = set()
+        for split in product(*(_compositions(n, 4) for n in groups)):
+            keys.add(tuple(sorted(zip(*split), reverse=True)))
+        self.keys = sorted(keys)
+        self.configs : dict[tuple, tuple[int, list[tuple]]] = {}
+        self.offsets = []
+        total = 0
+        for key in self.keys:
+            parts = []
+            size = 1
+            for counts in sorted(set(key), reverse=True):
+                multiplicity = key.count(counts)
+                part = comb(_descriptor_count(counts) + multiplicity - 1, multiplicity)
+                parts.append((counts, multiplicity, part))
+                size *= part
+            self.configs[key] = (total, parts)
+            self.offsets.append(total)
+            total += size
+        self.size = total
+        self._build_arrays()
+
+    def _build_arrays(self):
+        # the configuration tables again as arrays for the batch methods: a
+        # count vector is coded as base 8 digits, first group most
+        # significant, and a configuration as four 12 bit codes
+        self.digit_weights = 8 ** np.arange(len(self.groups) - 1, -1, -1)
+        codes = np.array([sum(int((np.array(c) * self.digit_weights).sum()) << (12 * (3 - j)) for j, c in enumerate(key)) for key in self.keys], dtype=np.int64)
+        self._code_order = np.argsort(codes)
+        self._sorted_codes = codes[self._code_order]
+        self.offsets_array = np.array(self.offsets, dtype=np.int64)
+        configs = len(self.keys)
+        self.position_counts = np.zeros((configs, 4, len(self.groups)), dtype=np.int64)
+        self.position_radix = np.zeros((configs, 4), dtype=np.int64)
+        self.ascending = np.zeros((configs, 4), dtype=np.int64)
+        self.part_arrays = [np.zeros((configs, 4), dtype=np.int64) for _ in range(5)]
+        for c, key in enumerate(self.keys):
+            self.position_counts[c] = key
+            radix = 1
+            position = 0
+            for p, (counts, multiplicity, size) in enumerate(self.configs[key][1]):
+                for i in range(multiplicity):
+                    self.position_radix[c, position + multiplicity - 1 - i] = radix
+                    self.ascending[c, position + multiplicity - 1 - i] = i
+                values = (position, multiplicity, radix, size, _descriptor_count(counts))
+                for array, value in zip(self.part_arrays, values):
+                    array[c, p] = value
+                radix *= size
+                position += multiplicity
+            for p in range(len(self.configs[key][1]), 4):
+                self.part_arrays[2][c, p] = 1
+                self.part_arrays[3][c, p] = 1
+
+    def config_of(self, codes : np.ndarray) -> np.ndarray:
+        found = np.searchsorted(self._sorted_codes, codes)
+        return self._code_order[np.minimum(found, len(self._sorted_codes) - 1)]
+
+_DESCRIPTOR_BITS = 20
+_BIT_COUNTS = np.array([bin(m).count("1") for m in range(1 << 13)], dtype=np.int64)
+_SMALL_COMB = np.array([[comb(n, k) for k in range(14)] for n in range(14)], dtype=np.int64)
+
+def _colex_table() -> np.ndarray:
+    # positions of the combination with each colex rank, for up to 3 of 13
+    table = np.zeros((4, comb(13, 3), 3), dtype=np.int64)
+    for k in range(4):
+        for c in combinations(range(13), k):
+            table[k, sum(comb(p, i + 1) for i, p in enumerate(c))] = list(c) + [0] * (3 - k)
+    return table
+
+_COLEX = _colex_table()
+
+def _comb_array(n : np.ndarray, k : np.ndarray) -> np.ndarray:
+    # exact comb(n, k) elementwise for k up to 4
+    result = np.ones_like(n)
+    for t in range(1, 5):
+        result = np.where(t <= k, result * (n - t + 1) // t, result)
+    return np.where(n >= k, result, 0)
+
+def _compositions(n : int, parts : int) -> list[tuple[int, ...]]:
+    if parts == 1:
+        return [(n,)]
+    return [(first,) + rest for first in range(n + 1) for rest in _compositions(n - first, parts - 1)]
+
+def _descriptor_count(counts : tuple[int, ...]) -> int:
+    # ways one suit can hold counts[g] ranks in each group
+    total = 1
+    free = 13
+    for n in counts:
+        total *= comb(free, n)
+        free -= n
+    return total
+
+def _suit_descriptor(masks : list[int]) -> tuple[tuple[int, ...], int]:
+    return tuple(m.bit_count() for m in masks), _descriptor_index(masks)
+
+def _descriptor_index(masks : list[int]) -> int:
+    # mixed radix over the groups of the colex rank of each group's ranks
+    # among the ranks earlier groups left free
+    index = 0
+    radix = 1
+    used = 0
+    free = 13
+    for m in masks:
+        n = m.bit_count()
+        rank = 0
+        i = 1
+        bits = m
+        while bits:
+            low = bits & -bits
+            # position among the ranks not used by earlier groups
+            position = (low - 1).bit_count() - (used & (low - 1)).bit_count()
+            rank += comb(position, i)
+            i += 1
+            bits ^= low
+        index += radix * rank
+        radix *= comb(free, n)
+        used |= m
+        free -= n
+    return index
+
+def _descriptor_ranks(counts : tuple[int, ...], index : int) -> list[list[int]]:
+    free = list(range(13))
+    groups = []
+    for n in counts:
+        size = comb(len(free), n)
+        index, rank = index // size, index % size
+        positions = _combination_unrank(rank, n)
+        groups.append([free[p] for p in positions])
+        for p in sorted(positions, reverse=True):
+            del free[p]
+    return groups
+
+def _combination_unrank(rank : int, k : int) -> list[int]:
+    # inverse of the colex rank sum(comb(p_i, i)) over increasing p_i
+    positions = []
+    for i in range(k, 0, -1):
+        # largest p with comb(p, i) <= rank
+        low, high = i - 1, rank + i
+        while low < high:
+            middle = (low + high + 1) // 2
+            if comb(middle, i) <= rank:
+                low = middle
+            else:
+                high = middle - 1
+        p = low
+        rank -= comb(p, i)
+        positions.append(p)
+    return positions[::-1]
+
+def _multiset_rank(values : list[int]) -> int:
+    # nondecreasing values become a strictly increasing combination
+    return sum(comb(v + i, i + 1) for i, v in enumerate(values))
+
+def _multiset_unrank(rank : int, k : int) -> list[int]:
+    return [p - i for i, p in enumerate(_combination_unrank(rank, k))]
+
+INDEXER = HandIndexer()
+
+def canonical_index(hole_cards : list[Card], board : list[Card]) -> int:
+    return INDEXER.index([c.index for c in hole_cards + board])
+
+def canonical_hand(round : Round, index : int) -> tuple[list[Card], list[Card]]:
+    cards = Card.from_ints(INDEXER.unindex(round, index))
+    return cards[:2], cards[2:]
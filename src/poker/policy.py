@@ -0,0 +1,58 @@
+from __future__ import annotations
+from typing import Callable
+from dataclasses import dataclass
+import numpy as np
+from src.poker.table import Table, Action, RAISE_LIMIT
+from src.poker.state import GameState
+from src.poker.features import encode_states, NUM_FEATURES
+
+# A batch policy decides for many tables with one call: it gets the stacked
+# features.encode_states rows of every pending decision, a (N, 3) mask of
+# legal actions indexed by Action.value and the runner's seeded generator,
+# and returns N Action values. Like Policy in simulate it must be picklable
+# to be sent to worker processes.
+BatchPolicy = Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]
+
+def observe(tables : list[Table]) -> tuple[np.ndarray, np.ndarray]:
+    # features and legal masks of the player to act at every table
+    features = encode_states([GameState.from_table(t) for t in tables])
+    legal = np.ones((len(tables), len(Action)), dtype=bool)
+    legal[:, Action.BetRaise.value] = [t.round_raises < RAISE_LIMIT for t in tables]
+    return features, legal
+
+def decide(policy : BatchPolicy, tables : list[Table], rng : np.random.Generator) -> list[Action]:
+    # one policy call for the decisions pending at all tables
+    if not tables:
+        return []
+    features, legal = observe(tables)
+    return [Action(a) for a in np.asarray(policy(features, legal, rng)).tolist()]
+
+def uniform_policy(features : np.ndarray, legal : np.ndarray, rng : np.random.Generator) -> np.ndarray:
+    return sample(legal.astype(np.float64), rng)
+
+def sample(weights : np.ndarray, rng : np.random.Generator) -> np.ndarray:
+    # one action per row with probability proportional to the row's weights
+    cumulative = np.cumsum(weights, axis=1)
+    draws = rng.random(len(weights)) * cumulative[:, -1]
+    return (cumulative <= draws[:, None]).sum(axis=1)
+
+# A softmax over a linear function of the features, restricted to the legal
+# actions. Small enough to train by hand, and shaped like the models the
+# batch interface is for: one matrix product per batch.
+@dataclass
+class LinearPolicy:
+    weights : np.ndarray
+    bias : np.ndarray
+
+    @classmethod
+    def zeros(cls) -> LinearPolicy:
+        return LinearPolicy(weights=np.zeros((NUM_FEATURES, len(Action))), bias=np.zeros(len(Action)))
+
+    def probabilities(self, features : np.ndarray, legal : np.ndarray) -> np.ndarray:
+        logits = features @ self.weights + self.bias
+        logits = np.where(legal, logits, -np.inf)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def __call__(self, features : np.ndarray, legal : np.ndarray, rng : np.random.Generator) -> np.ndarray:
+        return sample(self.probabilities(features, legal), rng)
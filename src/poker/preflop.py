@@ -0,0 +1,170 @@
+from __future__ import annotations
+from typing import Optional
+from itertools import combinations, permutations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from src.poker.card import Card, RANK_CHARS
+from src.poker.batch_evaluator import evaluate_batch
+from src.poker.cache import cache_dir, save_array
+
+# The 169 starting hand classes sit on a 13x13 grid of rank indices: pairs on
+# the diagonal, suited hands at [high][low] and offsuit hands at [low][high].
+NUM_CLASSES = 169
+
+EQUITY_FILE = "preflop_equity.npy"
+VS_RANDOM_FILE = "preflop_vs_random.npy"
+
+CHUNK_ROWS = 100_000
+
+def class_index(c1 : int, c2 : int) -> int:
+    return _CLASS_OF[c1 * 52 + c2]
+
+def hand_class(hole_cards : list[Card]) -> int:
+    return _CLASS_OF[hole_cards[0].index * 52 + hole_cards[1].index]
+
+def class_name(index : int) -> str:
+    row, col = divmod(index, 13)
+    if row == col:
+        return RANK_CHARS[row] * 2
+    if row > col:
+        return RANK_CHARS[row] + RANK_CHARS[col] + "s"
+    return RANK_CHARS[col] + RANK_CHARS[row] + "o"
+
+def class_from_name(name : str) -> int:
+    return CLASS_NAMES.index(name)
+
+def class_combos(index : int) -> list[tuple[int, int]]:
+    return [c for c in combinations(range(52), 2) if class_index(*c) == index]
+
+def equity_table(path : Optional[Path] = None) -> np.ndarray:
+    global _EQUITY
+    if path is not None:
+        return np.load(path / EQUITY_FILE, mmap_mode="r")
+    if _EQUITY is None:
+        _EQUITY = _load_cached(EQUITY_FILE)
+    return _EQUITY
+
+def vs_random_table(path : Optional[Path] = None) -> np.ndarray:
+    global _VS_RANDOM
+    if path is not None:
+        return np.load(path / VS_RANDOM_FILE, mmap_mode="r")
+    if _VS_RANDOM is None:
+        _VS_RANDOM = _load_cached(VS_RANDOM_FILE)
+    return _VS_RANDOM
+
+def preflop_equity(hole_cards : list[Card], villain_cards : list[Card]) -> float:
+    return float(equity_table()[hand_class(hole_cards), hand_class(villain_cards)])
+
+def preflop_equity_vs_random(hole_cards : list[Card]) -> float:
+    return float(vs_random_table()[hand_class(hole_cards)])
+
+def build(path : Path, trials : int = 1000, seed : int = 0, processes : int = 1) -> tuple[np.ndarray, np.ndarray]:
+    # the tables the lookups without a path read are built into cache_dir()
+    equity, vs_random = build_tables(trials=trials, seed=seed, processes=processes)
+    path.mkdir(parents=True, exist_ok=True)
+    save_array(path / EQUITY_FILE, equity)
+    save_array(path / VS_RANDOM_FILE, vs_random)
+    return equity, vs_random
+
+def build_tables(trials : int = 1000, seed : int = 0, processes : int = 1) -> tuple[np.ndarray, np.ndarray]:
+    matchups, weights = _canonical_matchups()
+    # only hero class < villain class is simulated, the rest follows from
+    # equity(j, i) = 1 - equity(i, j) and equity(i, i) = 0.5
+    upper = [m for m in matchups if m[0] < m[1]]
+    hands = np.array([m[2] + m[3] for m in upper], dtype=np.uint8)
+    per_chunk = max(1, CHUNK_ROWS // trials)
+    parts = [hands[i:i + per_chunk] for i in range(0, len(hands), per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(parts))
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_simulate, parts, [trials] * len(parts), seeds))
+    else:
+        results = [_simulate(part, trials, s) for part, s in zip(parts, seeds)]
+    simulated = dict(zip(upper, np.concatenate(results).tolist())) if results else {}
+    totals = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    counts = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    for m in upper:
+        totals[m[0], m[1]] += weights[m] * simulated[m]
+        counts[m[0], m[1]] += weights[m]
+    with np.errstate(invalid="ignore"):
+        upper_equity = totals / counts
+    equity = np.full((NUM_CLASSES, NUM_CLASSES), 0.5)
+    i, j = np.triu_indices(NUM_CLASSES, k=1)
+    equity[i, j] = upper_equity[i, j]
+    equity[j, i] = 1 - upper_equity[i, j]
+    # every class meets every other class, so the combo counts per class
+    # pair weight the average against a uniformly random villain hand
+    combo_counts = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    for m, w in weights.items():
+        combo_counts[m[0], m[1]] += w
+    vs_random = (equity * combo_counts).sum(axis=1) / combo_counts.sum(axis=1)
+    return equity.astype(np.float32), vs_random.astype(np.float32)
+
+def _load_cached(name : str) -> np.ndarray:
+    # a Monte Carlo build is slow and its noise should be chosen, so a
+    # lookup never starts one
+    path = cache_dir()
+    if not (path / name).exists():
+        raise FileNotFoundError(f"no preflop table at {path / name}, run build({str(path)!r}) first")
+    return np.load(path / name, mmap_mode="r")
+
+def _representative(index : int) -> tuple[int, int]:
+    row, col = divmod(index, 13)
+    if row == col:
+        return (row * 4, row * 4 + 1)
+    if row > col:
+        return (col * 4, row * 4)
+    return (row * 4 + 1, col * 4)
+
+def _canonical_matchups() -> tuple[list[tuple], dict[tuple, int]]:
+    # Every combo of a class is a suit permutation of the class
+    # representative, so only villain hands against the representative are
+    # enumerated. Suit permutations that fix the representative then fold
+    # the villain hands into canonical matchups, counted by their weight.
+    weights : dict[tuple, int] = {}
+    for hero_class in range(NUM_CLASSES):
+        hero = _representative(hero_class)
+        maps = []
+        for perm in permutations(range(4)):
+            card_map = [(c & ~3) | perm[c & 3] for c in range(52)]
+            if sorted(card_map[c] for c in hero) == list(hero):
+                maps.append(card_map)
+        for villain in combinations(range(52), 2):
+            if villain[0] in hero or villain[1] in hero:
+                continue
+            canonical = min(tuple(sorted((m[villain[0]], m[villain[1]]))) for m in maps)
+            key = (hero_class, class_index(*villain), hero, canonical)
+            weights[key] = weights.get(key, 0) + 1
+    return list(weights), weights
+
+def _simulate(hands : np.ndarray, trials : int, seed : np.random.SeedSequence) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rows = np.repeat(hands, trials, axis=0)
+    keys = rng.random((len(rows), 52))
+    # dealt cards sort after every live card so the board avoids them
+    for col in range(4):
+        keys[np.arange(len(rows)), rows[:, col]] = 2.0
+    board = np.argpartition(keys, 5, axis=1)[:, :5].astype(np.uint8)
+    hero, _ = evaluate_batch(np.concatenate([rows[:, :2], board], axis=1))
+    villain, _ = evaluate_batch(np.concatenate([rows[:, 2:], board], axis=1))
+    score = (hero > villain) + 0.5 * (hero == villain)
+    return score.reshape(len(hands), trials).mean(axis=1)
+
+def _class_table() -> list[int]:
+    table = [0] * (52 * 52)
+    for c1 in range(52):
+        for c2 in range(52):
+            high, low = max(c1 >> 2, c2 >> 2), min(c1 >> 2, c2 >> 2)
+            if c1 & 3 == c2 & 3 and high != low:
+                table[c1 * 52 + c2] = high * 13 + low
+            else:
+                table[c1 * 52 + c2] = low * 13 + high
+    return table
+
+_CLASS_OF = _class_table()
+
+CLASS_NAMES = [class_name(i) for i in range(NUM_CLASSES)]
+
+_EQUITY : Optional[np.ndarray] = None
+_VS_RANDOM : Optional[np.ndarray] = None
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import Optional
+from dataclasses import dataclass
+from pathlib import Path
+import cProfile
+import functools
+import time
+from src.poker import table as table_module
+from src.poker.table import Table
+
+# Functions timed by Instrumentation, as (owner, attribute) under the phase
+# name they are reported as. The owner is a class, or the module whose name
+# for a function is the one its callers look up: evaluate is the evaluator
+# Table._showdown calls. Times are inclusive: action contains _next, which
+# contains _showdown and _deal_next_hand, and _showdown contains evaluate.
+PHASES = {
+    "deal_next_hand": (Table, "_deal_next_hand"),
+    "action": (Table, "action"),
+    "next": (Table, "_next"),
+    "showdown": (Table, "_showdown"),
+    "evaluate": (table_module, "evaluate"),
+}
+
+@dataclass
+class PhaseStats:
+    calls : int = 0
+    seconds : float = 0.0
+
+# Counts calls and wall time per phase while active. The methods are only
+# wrapped between enter and exit and put back afterwards, so tables cost
+# nothing extra when no instrumentation is running. Only one may be active
+# at a time. With a profile path the run is also recorded with cProfile and
+# the stats are dumped there on exit, to be read with pstats.
+#
+#     with Instrumentation(profile="run.prof") as instrumentation:
+#         simulate(policies, hands)
+#     print(instrumentation.snapshot())
+class Instrumentation:
+
+    def __init__(self, profile : Optional[Path] = None):
+        self.profile = Path(profile) if profile is not None else None
+        self.stats = {name: PhaseStats() for name in PHASES}
+        self._originals : dict[str, object] = {}
+        self._profiler : Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> Instrumentation:
+        if _ACTIVE:
+            raise RuntimeError("instrumentation is already active")
+        _ACTIVE.append(self)
+        for name, (cls, attribute) in PHASES.items():
+            original = cls.__dict__[attribute]
+            self._originals[name] = original
+            if isinstance(original, classmethod):
+                setattr(cls, attribute, classmethod(self._timed(name, original.__func__)))
+            else:
+                setattr(cls, attribute, self._timed(name, original))
+        if self.profile is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile)
+            self._profiler = None
+        for name, (cls, attribute) in PHASES.items():
+            setattr(cls, attribute, self._originals.pop(name))
+        _ACTIVE.remove(self)
+
+    def reset(self):
+        for stats in self.stats.values():
+            stats.calls = 0
+            stats.seconds = 0.0
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {name: {"calls": s.calls, "seconds": s.seconds} for name, s in self.stats.items()}
+
+    def _timed(self, name : str, fn):
+        stats = self.stats[name]
+        clock = time.perf_counter
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.calls += 1
+                stats.seconds += clock() - start
+        return timed
+
+_ACTIVE : list[Instrumentation] = []
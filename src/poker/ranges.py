@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Optional, Protocol
+from dataclasses import dataclass
+from itertools import combinations
+from math import comb
+import numpy as np
+from src.poker.table import Round
+from src.poker.batch_evaluator import evaluate_batch
+
+# All 1326 two card hands as (low card, high card) index pairs. Ranges and
+# counterfactual values are vectors over these hands; blocked hands simply
+# carry zero weight.
+COMBOS = np.array(list(combinations(range(52), 2)), dtype=np.uint8)
+NUM_COMBOS = len(COMBOS)
+
+def _card_combos() -> np.ndarray:
+    # the 51 hands that contain each card
+    rows = [[] for _ in range(52)]
+    for i, (a, b) in enumerate(COMBOS.tolist()):
+        rows[a].append(i)
+        rows[b].append(i)
+    return np.array(rows, dtype=np.intp)
+
+CARD_COMBOS = _card_combos()
+COMBO_MASKS = (np.uint64(1) << COMBOS[:, 0].astype(np.uint64)) | (np.uint64(1) << COMBOS[:, 1].astype(np.uint64))
+
+def combo_index(c1 : int, c2 : int) -> int:
+    low, high = min(c1, c2), max(c1, c2)
+    return low * 51 - low * (low - 1) // 2 + high - low - 1
+
+def live(board : list[int]) -> np.ndarray:
+    mask = np.uint64(0)
+    for c in board:
+        mask |= np.uint64(1) << np.uint64(c)
+    return (COMBO_MASKS & mask) == 0
+
+def compatible_sums(reach : np.ndarray) -> np.ndarray:
+    # sum of reach over the hands that share no card with each hand, per
+    # range along the leading axes
+    card_sums = reach[..., CARD_COMBOS].sum(axis=-1)
+    return reach.sum(axis=-1, keepdims=True) - card_sums[..., COMBOS[:, 0]] - card_sums[..., COMBOS[:, 1]] + reach
+
+# Strength ordering of every hand on one board, prepared once so that the
+# showdown value of any number of opponent ranges costs a few cumulative sums.
+_KEY_SHIFT = np.int64(1 << 32)
+
+class Showdown:
+
+    def __init__(self, strengths : np.ndarray):
+        strengths = strengths.astype(np.int64)
+        self.order = np.argsort(strengths, kind="stable")
+        ordered = strengths[self.order]
+        self.below = np.searchsorted(ordered, strengths, side="left")
+        self.above = np.searchsorted(ordered, strengths, side="right")
+        # the same per card: each row holds the hands with that card sorted
+        # by strength, searched all at once by offsetting rows in the key
+        card_strengths = strengths[CARD_COMBOS]
+        card_order = np.argsort(card_strengths, axis=1, kind="stable")
+        self.card_hands = np.take_along_axis(CARD_COMBOS, card_order, axis=1)
+        rows = np.arange(52, dtype=np.int64)[:, None] * _KEY_SHIFT
+        keys = (rows + np.take_along_axis(card_strengths, card_order, axis=1)).ravel()
+        self.card_below = []
+        self.card_above = []
+        for side in (0, 1):
+            card = COMBOS[:, side].astype(np.int64)
+            query = card * _KEY_SHIFT + strengths
+            self.card_below.append(np.searchsorted(keys, query, side="left") - card * 51)
+            self.card_above.append(np.searchsorted(keys, query, side="right") - card * 51)
+
+    def values(self, reach : np.ndarray) -> np.ndarray:
+        # reach weighted count of compatible hands beaten minus hands losing
+        # to; reach may hold several ranges along its leading axes
+        lead = reach.shape[:-1]
+        cum = np.zeros(lead + (NUM_COMBOS + 1,))
+        np.cumsum(reach[..., self.order], axis=-1, out=cum[..., 1:])
+        win = cum[..., self.below]
+        lose = cum[..., -1:] - cum[..., self.above]
+        card_cum = np.zeros(lead + (52, 52))
+        np.cumsum(reach[..., self.card_hands], axis=-1, out=card_cum[..., 1:])
+        for side in (0, 1):
+            card = COMBOS[:, side]
+            win -= card_cum[..., card, self.card_below[side]]
+            lose -= card_cum[..., card, -1] - card_cum[..., card, self.card_above[side]]
+        return win - lose
+
+def board_strengths(board : tuple[int, ...]) -> np.ndarray:
+    # evaluator strength of every hand on the board, -1 for blocked hands
+    hands = live(board)
+    rows = np.concatenate([COMBOS[hands], np.tile(np.array(board, dtype=np.uint8), (hands.sum(), 1))], axis=1)
+    strengths = np.full(NUM_COMBOS, -1, dtype=np.int64)
+    strengths[hands], _ = evaluate_batch(rows)
+    return strengths
+
+def opponent_hands(board_size : int) -> int:
+    return comb(50 - board_size, 2)
+
+# Maps every hand to a card bucket for each round. buckets gives the number
+# of buckets per round; bucket returns one bucket per entry of COMBOS, where
+# hands that collide with the board may get any bucket.
+class Abstraction(Protocol):
+    buckets : tuple[int, int, int, int]
+    def bucket(self, round : Round, board : tuple[int, ...]) -> np.ndarray: ...
+
+_BOARD_SIZES = [0, 3, 4, 5]
+
+# A node of a chance tree over boards: the board dealt so far with
+# everything a walk over ranges needs for it, and the boards of the next
+# round.
+@dataclass
+class ChanceBoard:
+    cards : tuple[int, ...]
+    live : np.ndarray
+    buckets : np.ndarray
+    showdown : Optional[Showdown]
+    children : list[ChanceBoard]
+    # Dealing a board removes the hands it blocks. Opponent reach is rescaled
+    # so it stays a probability over the hands left, and values coming back
+    # are divided by the chance the hand survived the deal, which keeps the
+    # sampled values unbiased next to those of rounds that end without one.
+    opponent_scale : float = 1.0
+    own_scale : float = 1.0
+
+def deal_boards(abstraction : Abstraction, cards : tuple[int, ...], round : Round, samples : tuple[Optional[int], ...], rng : np.random.Generator) -> ChanceBoard:
+    # boards of the later rounds below cards, samples[round] of them per
+    # board of the round before, or every one for None
+    showdown = Showdown(board_strengths(cards)) if round == Round.River else None
+    board = ChanceBoard(cards, live(cards), abstraction.bucket(round, cards), showdown, [])
+    if round == Round.River:
+        return board
+    next_round = round.next()
+    dealt = _BOARD_SIZES[next_round.value] - len(cards)
+    deck = np.setdiff1d(np.arange(52), cards)
+    for new_cards in _deals(deck, dealt, samples[next_round.value], rng):
+        child = deal_boards(abstraction, cards + tuple(sorted(int(c) for c in new_cards)), next_round, samples, rng)
+        child.opponent_scale = opponent_hands(len(cards)) / opponent_hands(len(child.cards))
+        child.own_scale = comb(52 - len(cards), dealt) / comb(50 - len(cards), dealt)
+        board.children.append(child)
+    return board
+
+def _deals(deck : np.ndarray, dealt : int, samples : Optional[int], rng : np.random.Generator):
+    # drawn lazily, so the rng is shared with the boards dealt below
+    if samples is None:
+        yield from combinations(deck.tolist(), dealt)
+        return
+    for _ in range(samples):
+        yield rng.choice(deck, size=dealt, replace=False)
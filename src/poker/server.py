@@ -0,0 +1,291 @@
+from __future__ import annotations
+from typing import Callable, Optional
+from dataclasses import dataclass, field
+import asyncio
+import random
+from src.poker.card import Card
+from src.poker.table import Table, Seat, Action, Player
+from src.poker.deck import Deck
+from src.poker.simulate import SimulationResult
+
+# Line protocol between the server and the two bots of a match, one
+# space separated message per line.
+#
+#   server -> bot   hello <player> <tables> <hands>
+#                   act <table> <sequence> <hand> <hole> <board> <pot> <to_call> <chips> <opponent_chips> <raises>
+#                   done
+#   bot -> server   <table> <sequence> <f|c|r>
+#
+# Cards are written in ASCII as rank and suit letter, "Ah" or "Td", and
+# concatenated, "-" for an empty board. Every table has at most one
+# decision outstanding and numbers its decisions in order, so the table
+# and sequence number identify the request a reply answers. Replies may
+# come in any order; one whose decision has already timed out no longer
+# matches and is dropped.
+ACTION_CODES = {Action.Fold: "f", Action.CheckCall: "c", Action.BetRaise: "r"}
+ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+
+# seconds a bot gets for each decision before the server acts for it
+ACTION_TIMEOUT = 1.0
+
+@dataclass
+class Decision:
+    table : int
+    sequence : int
+    hand : int
+    hole_cards : list[Card]
+    board : list[Card]
+    pot : int
+    to_call : int
+    chips : int
+    opponent_chips : int
+    raises : int
+
+    @classmethod
+    def from_table(cls, table_id : int, sequence : int, hand : int, table : Table) -> Decision:
+        if len(table.seats) != 2:
+            raise ValueError("decisions are sent for heads-up tables only")
+        p = table.seats[table.turn]
+        other = table.seats[table.turn.next()]
+        return Decision(
+            table=table_id,
+            sequence=sequence,
+            hand=hand,
+            hole_cards=p.hole_cards,
+            board=table.board,
+            pot=table.pot,
+            to_call=table.round_outstanding - p.round_committed,
+            chips=p.chips,
+            opponent_chips=other.chips,
+            raises=table.round_raises,
+        )
+
+    @classmethod
+    def parse(cls, line : str) -> Decision:
+        _, table, sequence, hand, hole, board, *numbers = line.split()
+        pot, to_call, chips, opponent_chips, raises = map(int, numbers)
+        return Decision(
+            table=int(table),
+            sequence=int(sequence),
+            hand=int(hand),
+            hole_cards=_parse_cards(hole),
+            board=_parse_cards(board),
+            pot=pot,
+            to_call=to_call,
+            chips=chips,
+            opponent_chips=opponent_chips,
+            raises=raises,
+        )
+
+    def line(self) -> str:
+        board = _cards_str(self.board) or "-"
+        return f"act {self.table} {self.sequence} {self.hand} {_cards_str(self.hole_cards)} {board} {self.pot} {self.to_call} {self.chips} {self.opponent_chips} {self.raises}\n"
+
+    def default_action(self) -> Action:
+        # taken for a bot that does not answer in time
+        return Action.CheckCall if self.to_call == 0 else Action.Fold
+
+@dataclass
+class MatchResult(SimulationResult):
+    # decisions each player let time out, or missed after disconnecting
+    timeouts : list[int] = field(default_factory=lambda: [0, 0])
+
+# Hosts a heads-up match between two bots over many tables at once. Every
+# table is a coroutine, so thousands of tables share one thread. Decisions
+# requested in the same event loop tick are written to a bot with a single
+# write. As in simulate, every hand starts from fresh stacks with a deck
+# seeded by the match seed and table number, and the bots swap seats every
+# hand; player 0 is the bot that connected first.
+class GameServer:
+
+    def __init__(self, tables : int, hands : int, timeout : float = ACTION_TIMEOUT, seed : int = 0):
+        self.tables = tables
+        self.hands = hands
+        self.timeout = timeout
+        self.seed = seed
+        self.result = MatchResult()
+        self._connections : list[_Connection] = []
+        self._ready : Optional[asyncio.Event] = None
+        self._server : Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host : str = "127.0.0.1", port : int = 0, path : Optional[str] = None):
+        # listens on a unix socket when path is given, on TCP otherwise;
+        # returns the bound address
+        self._ready = asyncio.Event()
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._accept, path=path)
+        else:
+            self._server = await asyncio.start_server(self._accept, host=host, port=port)
+        return self._server.sockets[0].getsockname()
+
+    async def run(self) -> MatchResult:
+        # waits for both bots, plays every table and closes the server
+        try:
+            await self._ready.wait()
+            await asyncio.gather(*(self._play_table(t) for t in range(self.tables)))
+            for connection in self._connections:
+                await connection.close()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+        return self.result
+
+    async def _accept(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        if len(self._connections) == 2:
+            writer.close()
+            return
+        connection = _Connection(reader, writer)
+        player = len(self._connections)
+        self._connections.append(connection)
+        writer.write(f"hello {player} {self.tables} {self.hands}\n".encode())
+        if len(self._connections) == 2:
+            self._ready.set()
+        await connection.read_replies()
+
+    async def _play_table(self, table_id : int):
+        deck = Deck(rng=random.Random(f"{self.seed}/{table_id}"))
+        result = self.result
+        sequence = 0
+        for hand in range(self.hands):
+            table = Table.start(deck=deck)
+            first = hand % 2
+            seated = {Seat.One: first, Seat.Two: 1 - first}
+            before = {seat: _stack(p) for seat, p in table.seats.items()}
+            action = Action.CheckCall
+            while table.hands_played == 0:
+                player = seated[table.turn]
+                action = await self._decide(player, Decision.from_table(table_id, sequence, hand, table))
+                sequence += 1
+                result.actions[player][action] += 1
+                table.action(action)
+            result.hands += 1
+            if action != Action.Fold:
+                result.showdowns += 1
+            for seat, p in table.seats.items():
+                result.chips[seated[seat]] += _stack(p) - before[seat]
+
+    async def _decide(self, player : int, decision : Decision) -> Action:
+        connection = self._connections[player]
+        reply = connection.request(decision)
+        try:
+            action = await asyncio.wait_for(reply, self.timeout)
+        except asyncio.TimeoutError:
+            action = None
+        finally:
+            connection.pending.pop(decision.table, None)
+        if action is None:
+            self.result.timeouts[player] += 1
+            return decision.default_action()
+        return action
+
+# One bot's socket. Requests are buffered and flushed by a callback
+# scheduled for the end of the current loop tick; replies resolve the
+# pending future of their table when the sequence number matches, and
+# every pending future gets None once the bot has disconnected.
+class _Connection:
+
+    def __init__(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # table -> sequence number and reply of its outstanding decision
+        self.pending : dict[int, tuple[int, asyncio.Future]] = {}
+        self.closed = False
+        self._buffer : list[str] = []
+
+    def request(self, decision : Decision) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        reply = loop.create_future()
+        if self.closed:
+            reply.set_result(None)
+            return reply
+        self.pending[decision.table] = (decision.sequence, reply)
+        if not self._buffer:
+            loop.call_soon(self._flush)
+        self._buffer.append(decision.line())
+        return reply
+
+    def _flush(self):
+        if not self.closed:
+            self.writer.write("".join(self._buffer).encode())
+        self._buffer.clear()
+
+    async def read_replies(self):
+        try:
+            async for raw in self.reader:
+                fields = raw.split()
+                if len(fields) != 3 or not (fields[0].isdigit() and fields[1].isdigit()):
+                    continue
+                table, sequence = int(fields[0]), int(fields[1])
+                # a late reply to a decision that already timed out
+                if table not in self.pending or self.pending[table][0] != sequence:
+                    continue
+                _, reply = self.pending.pop(table)
+                if not reply.done():
+                    reply.set_result(ACTIONS.get(fields[2].decode()))
+        except ConnectionError:
+            pass
+        self.closed = True
+        for _, reply in self.pending.values():
+            if not reply.done():
+                reply.set_result(None)
+        self.pending.clear()
+
+    async def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.write(b"done\n")
+        try:
+            self.writer.close()
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+# Plays one side of a match with a decision function until the server is
+# done, answering each batch of requests with a single write.
+async def run_bot(decide : Callable[[Decision], Action], host : str = "127.0.0.1", port : Optional[int] = None, path : Optional[str] = None):
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    pending = b""
+    try:
+        while True:
+            data = await reader.read(1 << 16)
+            if not data:
+                return
+            # every complete line received so far is answered together
+            *lines, pending = (pending + data).split(b"\n")
+            replies = []
+            done = False
+            for raw in lines:
+                line = raw.decode()
+                if line == "done":
+                    done = True
+                    break
+                if line.startswith("act "):
+                    decision = Decision.parse(line)
+                    replies.append(f"{decision.table} {decision.sequence} {ACTION_CODES[decide(decision)]}\n")
+            writer.write("".join(replies).encode())
+            await writer.drain()
+            if done:
+                return
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+_SUIT_CHARS = "cdhs"
+
+def _cards_str(cards : list[Card]) -> str:
+    return "".join(str(c.rank) + _SUIT_CHARS[c.suit.index()] for c in cards)
+
+def _parse_cards(s : str) -> list[Card]:
+    if s == "-":
+        return []
+    return [Card.from_str(s[i:i + 2]) for i in range(0, len(s), 2)]
+
+def _stack(p : Player) -> int:
+    # between hands the only chips committed are the next hand's blinds
+    return p.chips + p.round_committed
@@ -0,0 +1,132 @@
+from __future__ import annotations
+from typing import Callable
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+import random
+import numpy as np
+from src.poker.table import Table, Seat, Action, Player
+from src.poker.deck import Deck
+from src.poker.policy import BatchPolicy, decide
+
+# A policy picks the action for the player to act at the table. It gets the
+# runner's seeded rng so stochastic policies stay reproducible, and must be
+# a module level function to be sent to worker processes.
+Policy = Callable[[Table, random.Random], Action]
+
+# Hands are simulated in fixed size chunks with a seed derived from the run
+# seed and the chunk number, so results do not depend on the process count.
+CHUNK_HANDS = 5_000
+# tables played side by side in each chunk of simulate_batched
+BATCH_TABLES = 256
+
+def random_policy(table: Table, rng: random.Random) -> Action:
+    return rng.choice(table.legal_actions())
+
+def call_policy(table: Table, rng: random.Random) -> Action:
+    return Action.CheckCall
+
+def raise_policy(table: Table, rng: random.Random) -> Action:
+    return Action.BetRaise
+
+@dataclass
+class SimulationResult:
+    hands : int = 0
+    showdowns : int = 0
+    chips : list[int] = field(default_factory=lambda: [0, 0])
+    actions : list[dict[Action,int]] = field(default_factory=lambda: [dict.fromkeys(Action, 0), dict.fromkeys(Action, 0)])
+
+    def __add__(self, other: SimulationResult) -> SimulationResult:
+        return SimulationResult(
+            hands=self.hands + other.hands,
+            showdowns=self.showdowns + other.showdowns,
+            chips=[a + b for a, b in zip(self.chips, other.chips)],
+            actions=[{a: mine[a] + theirs[a] for a in Action} for mine, theirs in zip(self.actions, other.actions)],
+        )
+
+    def chips_per_hand(self, policy: int) -> float:
+        return self.chips[policy] / self.hands
+
+def simulate(policies: tuple[Policy, Policy], hands: int, seed: int = 0, processes: int = 1) -> SimulationResult:
+    starts = list(range(0, hands, CHUNK_HANDS))
+    chunks = [(policies, start, min(CHUNK_HANDS, hands - start), seed) for start in starts]
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_simulate_chunk, *zip(*chunks)))
+    else:
+        results = [_simulate_chunk(*chunk) for chunk in chunks]
+    total = SimulationResult()
+    for result in results:
+        total += result
+    return total
+
+def simulate_batched(policies: tuple[BatchPolicy, BatchPolicy], hands: int, seed: int = 0, processes: int = 1, tables: int = BATCH_TABLES) -> SimulationResult:
+    # like simulate, but every chunk plays its hands on many tables at once
+    # and asks each policy for all of its pending decisions in one call
+    starts = list(range(0, hands, CHUNK_HANDS))
+    chunks = [(policies, start, min(CHUNK_HANDS, hands - start), seed, tables) for start in starts]
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_simulate_batched_chunk, *zip(*chunks)))
+    else:
+        results = [_simulate_batched_chunk(*chunk) for chunk in chunks]
+    total = SimulationResult()
+    for result in results:
+        total += result
+    return total
+
+def _simulate_chunk(policies: tuple[Policy, Policy], start: int, hands: int, seed: int) -> SimulationResult:
+    rng = random.Random(f"{seed}/{start}")
+    result = SimulationResult(hands=hands)
+    deck = Deck(rng=rng)
+    for hand in range(start, start + hands):
+        # every hand starts from fresh stacks, with the policies swapping
+        # the button so each plays both positions equally often
+        table = Table.start(deck=deck)
+        first = hand % 2
+        seated = {Seat.One: first, Seat.Two: 1 - first}
+        before = {seat: _stack(p) for seat, p in table.seats.items()}
+        action = Action.CheckCall
+        while table.hands_played == 0:
+            policy = seated[table.turn]
+            action = policies[policy](table, rng)
+            result.actions[policy][action] += 1
+            table.action(action)
+        if action != Action.Fold:
+            result.showdowns += 1
+        for seat, p in table.seats.items():
+            result.chips[seated[seat]] += _stack(p) - before[seat]
+    return result
+
+def _simulate_batched_chunk(policies: tuple[BatchPolicy, BatchPolicy], start: int, hands: int, seed: int, tables: int) -> SimulationResult:
+    rng = random.Random(f"{seed}/{start}")
+    policy_rng = np.random.default_rng([seed, start])
+    result = SimulationResult(hands=hands)
+    # table, seating and stacks before the hand of every running table; a
+    # finished table is replaced by the next hand of the chunk. Running
+    # tables each get their own deck, drawing from the chunk's rng.
+    running: list[tuple[Table, dict[Seat,int], dict[Seat,int]]] = []
+    next_hand = start
+    while running or next_hand < start + hands:
+        while len(running) < tables and next_hand < start + hands:
+            table = Table.start(deck=Deck(rng=rng))
+            first = next_hand % 2
+            seated = {Seat.One: first, Seat.Two: 1 - first}
+            running.append((table, seated, {seat: _stack(p) for seat, p in table.seats.items()}))
+            next_hand += 1
+        for policy in (0, 1):
+            waiting = [table for table, seated, _ in running if not table.hands_played and seated[table.turn] == policy]
+            for table, action in zip(waiting, decide(policies[policy], waiting, policy_rng)):
+                result.actions[policy][action] += 1
+                table.action(action)
+                if table.hands_played and action != Action.Fold:
+                    result.showdowns += 1
+        for table, seated, before in running:
+            if table.hands_played:
+                for seat, p in table.seats.items():
+                    result.chips[seated[seat]] += _stack(p) - before[seat]
+        running = [game for game in running if not game[0].hands_played]
+    return result
+
+def _stack(p: Player) -> int:
+    # between hands the only chips committed are the next hand's blinds
+    return p.chips + p.round_committed
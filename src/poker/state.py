@@ -0,0 +1,188 @@
+from __future__ import annotations
+from typing import NamedTuple
+from src.poker.table import Table, Seat, Action, Round, RAISE_LIMIT, STARTING_STACK, SMALL_BLIND, BIG_BLIND
+from src.poker.evaluator import evaluate_indices
+
+_BOARD_SIZES = [0, 3, 4, 5]
+
+# An immutable copy of the Table rules for search. Every field is an int,
+# bool or tuple, so a state costs one tuple to copy and can be shared between
+# nodes; apply returns the next state and leaves this one untouched. Seats are
+# indexed 0 for Seat.One and 1 for Seat.Two, cards by Card.index.
+#
+# Unlike Table a state does not own a deck: when a round closes the state
+# waits for deal with the next board cards, and when the hand ends it stays
+# finished until next_hand is given the new hole cards. As at Table a player
+# all in is skipped, and once fewer than two players can bet every deal
+# moves straight on to the next round, so the board is dealt out to the
+# showdown.
+class GameState(NamedTuple):
+    chips : tuple[int, int]
+    round_committed : tuple[int, int]
+    acted : tuple[bool, bool]
+    hole_cards : tuple[tuple[int, int], tuple[int, int]]
+    board : tuple[int, ...]
+    button : int
+    turn : int
+    round : Round
+    pot : int
+    round_outstanding : int
+    round_raises : int = 0
+    hands_played : int = 0
+    finished : bool = False
+    # chips put in over the whole hand, for the chips a player all in
+    # cannot win
+    hand_committed : tuple[int, int] = (0, 0)
+
+    @classmethod
+    def start(cls, hole_cards : tuple[tuple[int, int], tuple[int, int]]) -> GameState:
+        # same opening as Table.start: Seat.One on the button
+        return GameState.new_hand((STARTING_STACK, STARTING_STACK), 0, hole_cards)
+
+    @classmethod
+    def new_hand(cls, stacks : tuple[int, int], button : int, hole_cards : tuple[tuple[int, int], tuple[int, int]]) -> GameState:
+        # the button posts the small blind and acts first, as in Table._new_hand
+        chips = list(stacks)
+        committed = [0, 0]
+        for seat, blind in ((button, SMALL_BLIND), (1 - button, BIG_BLIND)):
+            committed[seat] = min(blind, chips[seat])
+            chips[seat] -= committed[seat]
+        return GameState(
+            chips=tuple(chips),
+            round_committed=tuple(committed),
+            acted=(False, False),
+            hole_cards=hole_cards,
+            board=(),
+            button=button,
+            turn=button if chips[button] > 0 or chips[1 - button] == 0 else 1 - button,
+            round=Round.Preflop,
+            pot=sum(committed),
+            round_outstanding=max(committed),
+            hand_committed=tuple(committed),
+        )
+
+    @classmethod
+    def from_table(cls, table : Table) -> GameState:
+        if len(table.seats) != 2:
+            raise ValueError("game states are kept for heads-up tables only")
+        players = [table.seats[Seat.One], table.seats[Seat.Two]]
+        return GameState(
+            chips=(players[0].chips, players[1].chips),
+            round_committed=(players[0].round_committed, players[1].round_committed),
+            acted=(players[0].acted, players[1].acted),
+            hole_cards=(tuple(c.index for c in players[0].hole_cards), tuple(c.index for c in players[1].hole_cards)),
+            board=tuple(c.index for c in table.board),
+            button=_seat_index(table.button),
+            turn=_seat_index(table.turn),
+            round=table.round,
+            pot=table.pot,
+            round_outstanding=table.round_outstanding,
+            round_raises=table.round_raises,
+            hands_played=table.hands_played,
+            hand_committed=(players[0].hand_committed, players[1].hand_committed),
+        )
+
+    @property
+    def pending_cards(self) -> int:
+        # board cards to deal before the next action
+        if self.finished:
+            return 0
+        return _BOARD_SIZES[self.round.value] - len(self.board)
+
+    def legal_actions(self) -> list[Action]:
+        if self.round_raises >= RAISE_LIMIT:
+            return [Action.Fold, Action.CheckCall]
+        return [Action.Fold, Action.CheckCall, Action.BetRaise]
+
+    def apply(self, action : Action) -> GameState:
+        if self.finished or self.pending_cards:
+            raise ValueError("no action is due before the hand or board is dealt")
+        if action == Action.BetRaise and self.round_raises >= RAISE_LIMIT:
+            action = Action.CheckCall
+        player = self.turn
+        other = 1 - player
+        chips = list(self.chips)
+        if action == Action.Fold:
+            chips[other] += self.pot
+            return self._replace(chips=tuple(chips), pot=0, **_CLOSED_ROUND, finished=True)
+
+        acted = list(self.acted)
+        round_raises = self.round_raises
+        amount = self.round_outstanding - self.round_committed[player]
+        if action == Action.BetRaise:
+            amount += self.round.bet_size()
+            acted[other] = False
+            round_raises += 1
+        amount = min(amount, chips[player])
+        chips[player] -= amount
+        committed = list(self.round_committed)
+        committed[player] += amount
+        hand_committed = list(self.hand_committed)
+        hand_committed[player] += amount
+        acted[player] = True
+        pot = self.pot + amount
+        outstanding = max(self.round_outstanding, committed[player])
+        # the round closes as Table._everyone_acted decides: players all in
+        # are left out, and one left alone to bet only has to match the bet
+        waiting = [p for p in (0, 1) if chips[p] > 0]
+        if len(waiting) <= 1:
+            closed = all(committed[p] >= outstanding for p in waiting)
+        else:
+            closed = all(acted)
+        if not closed:
+            return self._replace(
+                chips=tuple(chips),
+                round_committed=tuple(committed),
+                acted=tuple(acted),
+                turn=other if chips[other] > 0 else player,
+                pot=pot,
+                round_outstanding=outstanding,
+                round_raises=round_raises,
+                hand_committed=tuple(hand_committed),
+            )
+        state = self._replace(hand_committed=tuple(hand_committed))
+        if self.round == Round.River:
+            return state._showdown(chips, pot)
+        return state._replace(chips=tuple(chips), pot=pot, round=self.round.next(), turn=1 - self.button, **_CLOSED_ROUND)
+
+    def deal(self, cards : tuple[int, ...]) -> GameState:
+        if len(cards) != self.pending_cards:
+            raise ValueError(f"expected {self.pending_cards} board cards, got {len(cards)}")
+        state = self._replace(board=self.board + tuple(cards))
+        # with at most one player left to bet nothing is decided before the
+        # next round
+        if sum(1 for c in state.chips if c > 0) < 2:
+            if state.round == Round.River:
+                return state._showdown(list(state.chips), state.pot)
+            return state._replace(round=state.round.next())
+        return state
+
+    def next_hand(self, hole_cards : tuple[tuple[int, int], tuple[int, int]]) -> GameState:
+        if not self.finished:
+            raise ValueError("the hand is still being played")
+        state = GameState.new_hand(self.chips, 1 - self.button, hole_cards)
+        return state._replace(hands_played=self.hands_played + 1)
+
+    def _showdown(self, chips : list[int], pot : int) -> GameState:
+        # chips one player put in beyond what the other could match go back,
+        # the side pot Table._pots gives its only contender
+        excess = self.hand_committed[0] - self.hand_committed[1]
+        if excess != 0:
+            chips[0 if excess > 0 else 1] += abs(excess)
+            pot -= abs(excess)
+        s1 = evaluate_indices(list(self.board + self.hole_cards[0]))
+        s2 = evaluate_indices(list(self.board + self.hole_cards[1]))
+        if s1 > s2:
+            chips[0] += pot
+        elif s2 > s1:
+            chips[1] += pot
+        else:
+            # the odd chip goes to the player left of the button, as at Table
+            chips[self.button] += pot // 2
+            chips[1 - self.button] += pot - pot // 2
+        return self._replace(chips=tuple(chips), pot=0, **_CLOSED_ROUND, finished=True)
+
+_CLOSED_ROUND = dict(round_committed=(0, 0), acted=(False, False), round_outstanding=0, round_raises=0)
+
+def _seat_index(seat : Seat) -> int:
+    return 0 if seat == Seat.One else 1
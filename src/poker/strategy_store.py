@@ -0,0 +1,151 @@
+from __future__ import annotations
+from pathlib import Path
+import functools
+import mmap
+import numpy as np
+from src.poker.table import Table, Action, Round, RAISE_LIMIT
+from src.poker.tree import GameTree, NodeType
+from src.poker.ranges import Abstraction, combo_index
+
+# Trained strategies stored for play. Each info set keeps one byte per
+# action, its probabilities quantized so the row sums to QUANTUM, laid out
+# as CFRSolver tables are: the row of (decision node, bucket) is
+# offsets[node] + bucket. A header identifies the tree and abstraction the
+# rows belong to. Files are memory mapped read only, so opening one reads
+# nothing but the header and every process playing from the same file
+# shares its pages.
+MAGIC = b"PKRSTRT1"
+HEADER_SIZE = 64
+QUANTUM = 255
+
+# boards whose buckets are kept, enough for many tables played at once
+BOARD_CACHE_SIZE = 1024
+
+_CHANCE = NodeType.Chance.value
+
+def quantize(strategy : np.ndarray) -> np.ndarray:
+    # largest remainder rounding, so every row sums to exactly QUANTUM
+    strategy = np.asarray(strategy, dtype=np.float64)
+    scaled = strategy / strategy.sum(axis=1, keepdims=True) * QUANTUM
+    quantized = np.floor(scaled).astype(np.int64)
+    missing = QUANTUM - quantized.sum(axis=1, keepdims=True)
+    rank = np.argsort(np.argsort(quantized - scaled, axis=1, kind="stable"), axis=1)
+    return (quantized + (rank < missing)).astype(np.uint8)
+
+def save_strategy(path : Path, strategy : np.ndarray, buckets : tuple[int, int, int, int], raise_limit : int = RAISE_LIMIT):
+    _, size = GameTree.build(raise_limit=raise_limit).infoset_offsets(buckets)
+    if strategy.shape != (size, len(Action)):
+        raise ValueError(f"expected a strategy of shape {(size, len(Action))}, got {strategy.shape}")
+    with open(path, "wb") as f:
+        f.write(_header(buckets, raise_limit, size))
+        f.write(quantize(strategy).tobytes())
+
+class StrategyStore:
+
+    def __init__(self, path : Path, abstraction : Abstraction):
+        path = Path(path)
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if header[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a strategy file of this version")
+            fields = np.frombuffer(header, dtype="<u4", count=6, offset=len(MAGIC))
+            raise_limit, buckets = int(fields[0]), tuple(int(b) for b in fields[1:5])
+            if buckets != tuple(abstraction.buckets):
+                raise ValueError(f"{path} was saved for buckets {buckets}, not {tuple(abstraction.buckets)}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.tree = GameTree.build(raise_limit=raise_limit)
+            offsets, size = self.tree.infoset_offsets(buckets)
+            if header != _header(buckets, raise_limit, size) or len(self._map) != HEADER_SIZE + size * len(Action):
+                raise ValueError(f"{path} does not match its header")
+        except BaseException:
+            # the file is closed already, the map is not
+            self._map.close()
+            raise
+        self.path = path
+        self.abstraction = abstraction
+        self.raise_limit = raise_limit
+        self.table = np.frombuffer(self._map, dtype=np.uint8, offset=HEADER_SIZE).reshape(size, len(Action))
+        # plain lists walk faster than array lookups node by node
+        self._offset = offsets.tolist()
+        self._type = self.tree.node_type.tolist()
+        self._children = self.tree.children.tolist()
+        self._board_buckets = functools.lru_cache(maxsize=BOARD_CACHE_SIZE)(abstraction.bucket)
+
+    def probabilities(self, node : int, bucket : int) -> np.ndarray:
+        return self.table[self._offset[node] + bucket] / QUANTUM
+
+    def bucket(self, round : Round, board : tuple[int, ...], hole_cards : tuple[int, int]) -> int:
+        # boards as training deals them, the flop sorted
+        board = tuple(sorted(board[:3])) + tuple(board[3:])
+        return int(self._board_buckets(round, board)[combo_index(*hole_cards)])
+
+    def table_probabilities(self, table : Table, node : int) -> np.ndarray:
+        # action probabilities of the player to act at table, node being the
+        # tree position of the hand so far, see InfosetTracker
+        hole_cards = tuple(c.index for c in table.seats[table.turn].hole_cards)
+        board = tuple(c.index for c in table.board)
+        return self.probabilities(node, self.bucket(table.round, board, hole_cards))
+
+    def tracker(self) -> InfosetTracker:
+        # only a tree that caps raises as Table does follows its hands
+        if self.raise_limit != RAISE_LIMIT:
+            raise ValueError(f"Table caps raises at {RAISE_LIMIT}, the strategy at {self.raise_limit}")
+        return InfosetTracker(self)
+
+    def child(self, node : int, action : Action) -> int:
+        # the step GameTree.follow takes, on lists, then on past any chance
+        # node so the next decision of the hand is returned
+        children = self._children[node]
+        if action == Action.BetRaise and children[action.value] < 0:
+            action = Action.CheckCall
+        child = children[action.value]
+        if child < 0:
+            raise ValueError(f"{action} is not in the tree")
+        while self._type[child] == _CHANCE:
+            child = self._children[child][0]
+        return child
+
+    def close(self):
+        # views of the table must be released first
+        self.table = None
+        self._map.close()
+
+    def __enter__(self) -> StrategyStore:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __reduce__(self):
+        # sent to worker processes as its path, each maps the file itself
+        return StrategyStore, (self.path, self.abstraction)
+
+# Follows a heads-up Table through the tree as a Table recorder, so the
+# current node is known at every decision without replaying the hand.
+class InfosetTracker:
+
+    def __init__(self, store : StrategyStore):
+        self.store = store
+        self.node = 0
+
+    def start_hand(self, table : Table):
+        if len(table.seats) != 2:
+            raise ValueError("strategies are stored for heads-up tables only")
+        self.node = 0
+
+    def action(self, action : Action):
+        # a fold ends a heads-up hand, and where checking is free the tree
+        # has no node for it
+        if action != Action.Fold:
+            self.node = self.store.child(self.node, action)
+
+    def end_hand(self, table : Table, showdown : bool):
+        pass
+
+    def probabilities(self, table : Table) -> np.ndarray:
+        return self.store.table_probabilities(table, self.node)
+
+def _header(buckets : tuple[int, int, int, int], raise_limit : int, size : int) -> bytes:
+    fields = np.array([raise_limit, *buckets, size], dtype="<u4").tobytes()
+    return MAGIC + fields + bytes(HEADER_SIZE - len(MAGIC) - len(fields))
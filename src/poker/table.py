@@ -1,20 +1,36 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Optional, Protocol
 from enum import Enum
 from dataclasses import dataclass
+import random
 from src.poker.card import Card
-from src.poker.hand import Hand
+from src.poker.deck import Deck
+from src.poker.evaluator import evaluate
 
 RAISE_LIMIT = 4
+STARTING_STACK = 200
+SMALL_BLIND = 1
+BIG_BLIND = 2
+MIN_SEATS = 2
+MAX_SEATS = 10
 
 class Seat(Enum):
     One = 1
     Two = 2
+    Three = 3
+    Four = 4
+    Five = 5
+    Six = 6
+    Seven = 7
+    Eight = 8
+    Nine = 9
+    Ten = 10
 
-    def next(self) -> Seat:
-        if self == Seat.One:
-            return Seat.Two
-        return Seat.One
+    def next(self, seats : int = 2) -> Seat:
+        # the seat to the left at a table with the given number of seats
+        return _SEATS[self.value % seats]
+
+_SEATS = list(Seat)
 
 class Action(Enum):
     Fold = 0
@@ -37,6 +53,16 @@ class Round(Enum):
                 return Round.River
             case Round.River:
                 return Round.Preflop
+
+    def bet_size(self) -> int:
+        return 2 if self in [Round.Preflop, Round.Flop] else 4
+
+# Notified as hands are played, see history.HandRecorder.
+class Recorder(Protocol):
+    def start_hand(self, table : Table): ...
+    def action(self, action : Action): ...
+    def end_hand(self, table : Table, showdown : bool): ...
+
 @dataclass
 class Player:
     chips : int
@@ -44,6 +70,9 @@ class Player:
     round_committed : int
     acted : bool
     all_in : bool
+    folded : bool = False
+    # chips put in over the whole hand, for side pots
+    hand_committed : int = 0
 
 @dataclass
 class Table:
@@ -53,95 +82,164 @@ class Table:
     round : Round
     pot : int
     round_outstanding : int
-    deck : list[Card]
+    deck : Deck
     board : list[Card]
+    round_raises : int = 0
+    hands_played : int = 0
+    recorder : Optional[Recorder] = None
 
     @classmethod
-    def start(cls):
-        p1 = Player(chips=199, hole_cards=[], round_committed=1, acted=False, all_in=False)
-        p2 = Player(chips=198, hole_cards=[], round_committed=2, acted=False, all_in=False)
-        seats = {Seat.One: p1, Seat.Two: p2}
-        table = Table(seats=seats, button=Seat.One, turn=Seat.One, round=Round.Preflop, pot=3, round_outstanding=2, deck=[], board=[])
+    def start(cls, rng : Optional[random.Random] = None, deck : Optional[Deck] = None, recorder : Optional[Recorder] = None, seats : int = 2):
+        if not MIN_SEATS <= seats <= MAX_SEATS:
+            raise ValueError(f"a table has {MIN_SEATS} to {MAX_SEATS} seats, not {seats}")
+        players = {seat: Player(chips=STARTING_STACK, hole_cards=[], round_committed=0, acted=False, all_in=False) for seat in _SEATS[:seats]}
+        table = Table(seats=players, button=Seat.One, turn=Seat.One, round=Round.Preflop, pot=0, round_outstanding=0, deck=deck or Deck(rng=rng), board=[], recorder=recorder)
+        table._put_in_blinds()
         table._deal_next_hand()
         return table
+
+    def legal_actions(self) -> list[Action]:
+        if self.round_raises >= RAISE_LIMIT:
+            return [Action.Fold, Action.CheckCall]
+        return [Action.Fold, Action.CheckCall, Action.BetRaise]
     
     def action(self, action: Action):
         bet_size = self._bet_size()
+        if action == Action.BetRaise and self.round_raises >= RAISE_LIMIT:
+            action = Action.CheckCall
+        if self.recorder is not None:
+            self.recorder.action(action)
         match action:
             case Action.Fold:
-                self._payout(seat=self.turn.next(), chips=self.pot)
-                self._new_hand()
-                self.round = Round.Preflop
-                return
+                self._current_player().folded = True
+                remaining = [seat for seat, p in self.seats.items() if not p.folded]
+                if len(remaining) == 1:
+                    self._payout(seat=remaining[0], chips=self.pot)
+                    self._reset_round()
+                    if self.recorder is not None:
+                        self.recorder.end_hand(self, showdown=False)
+                    self._new_hand()
+                    self.round = Round.Preflop
+                    return
             case Action.CheckCall:
                 diff = self.round_outstanding - self._current_player().round_committed
                 self._add_to_pot(p=self._current_player(), chips=diff)
             case Action.BetRaise:
                 diff = self.round_outstanding - self._current_player().round_committed
                 self._add_to_pot(p=self._current_player(), chips=diff + bet_size)
-                self._other_player().acted = False
+                for p in self.seats.values():
+                    p.acted = False
+                self.round_raises += 1
         self._current_player().acted = True
         self._next()
 
     def _next(self):
         if not self._everyone_acted():
-            self.turn = self.turn.next()
+            self.turn = self._next_seat(self.turn)
             return
         self._reset_round()
         self.round = self.round.next()
         match self.round:
             case Round.Preflop:
                 self._showdown()
+                if self.recorder is not None:
+                    self.recorder.end_hand(self, showdown=True)
                 # TODO check if one player is out
                 self._new_hand()
+                return
             case Round.Flop:
-                self.board = [self.deck.pop(), self.deck.pop(), self.deck.pop()]
-                self.turn = self.button.next()
+                self.board = [self.deck.deal(), self.deck.deal(), self.deck.deal()]
             case Round.Turn | Round.River:
-                self.board = self.board + [self.deck.pop()]
-                self.turn = self.button.next()
+                self.board = self.board + [self.deck.deal()]
+        # with at most one player left to bet the board is dealt out
+        if self._players_to_act() < 2:
+            self._next()
+            return
+        self.turn = self._next_seat(self.button)
     
     def _new_hand(self):
-        self.button = self.button.next()
-        self.turn = self.button
+        self.hands_played += 1
+        self.button = self.button.next(len(self.seats))
+        for p in self.seats.values():
+            p.folded = False
+            p.all_in = False
+            p.hand_committed = 0
         self._put_in_blinds()
         self._deal_next_hand()
 
+    @staticmethod
+    def _strength(ranked : tuple) -> int:
+        return ranked[0]
+
     def _showdown(self):
-        hands : dict[Seat,Hand] = {}
-        for seat, p in self.seats.items():
-            cards = self.board+p.hole_cards
-            hands[seat] = Hand.from_cards(cards=cards)
-        h1 = hands[Seat.One]
-        h2 = hands[Seat.Two] 
-        if h1 > h2:
-            self._payout(seat=Seat.One, chips=self.pot)
-        elif h2 > h1:
-            self._payout(seat=Seat.Two, chips=self.pot)
-        else:
-            # tie
-            self._payout(seat=Seat.One, chips=self.pot/2)
-            self._payout(seat=Seat.Two, chips=self.pot/2)
-        
+        # every hand still in is evaluated once and the players are sorted
+        # by strength, so each pot goes to its first eligible players
+        ranked = sorted(
+            [(evaluate(self.board + p.hole_cards), seat, p) for seat, p in self.seats.items() if not p.folded],
+            key=self._strength, reverse=True)
+        for chips, cap in self._pots():
+            contenders = [r for r in ranked if r[2].hand_committed >= cap]
+            best = contenders[0][0]
+            winners = [seat for strength, seat, _ in contenders if strength == best]
+            if len(winners) == 1:
+                self._payout(seat=winners[0], chips=chips)
+            else:
+                self._split(chips=chips, seats=winners)
+
+    def _pots(self) -> list[tuple[int, int]]:
+        # The main pot and side pots as (chips, cap): every distinct hand
+        # commitment of the players still in caps a pot, shared by those who
+        # put in at least that much. Chips folded players put in above the
+        # highest cap go to the last pot.
+        players = self.seats.values()
+        caps = sorted({p.hand_committed for p in players if not p.folded})
+        if len(caps) == 1:
+            return [(self.pot, caps[0])]
+        top = max(p.hand_committed for p in players)
+        pots : list[tuple[int, int]] = []
+        previous = 0
+        for i, cap in enumerate(caps):
+            level = top if i == len(caps) - 1 else cap
+            chips = sum(min(p.hand_committed, level) - min(p.hand_committed, previous) for p in players)
+            pots.append((chips, cap))
+            previous = level
+        return pots
+
+    def _split(self, chips : int, seats : list[Seat]):
+        # odd chips go one each to the winners first to the left of the button
+        share, odd = divmod(chips, len(seats))
+        n = len(self.seats)
+        seats = sorted(seats, key=lambda seat: (seat.value - self.button.value - 1) % n)
+        for i, seat in enumerate(seats):
+            self._payout(seat=seat, chips=share + (1 if i < odd else 0))
+
     def _payout(self, seat: Seat, chips: int):
         self.pot -= chips
         self.seats[seat].chips += chips
 
     def _deal_next_hand(self):
-        self.deck = Card.deck()
+        self.deck.reset()
         for p in self.seats.values():
-            p.hole_cards = [self.deck.pop(), self.deck.pop()]
+            p.hole_cards = [self.deck.deal(), self.deck.deal()]
         self.board = []
+        if self.recorder is not None:
+            self.recorder.start_hand(self)
 
     def _put_in_blinds(self):
-        self._add_to_pot(p=self.seats[self.button], chips=1)
-        self._add_to_pot(p=self.seats[self.button.next()], chips=2)
-        
+        # heads-up the button posts the small blind and acts first preflop
+        small = self.button if len(self.seats) == 2 else self._next_seat(self.button)
+        big = self._next_seat(small)
+        self._add_to_pot(p=self.seats[small], chips=SMALL_BLIND)
+        self._add_to_pot(p=self.seats[big], chips=BIG_BLIND)
+        self.turn = self._next_seat(big)
+
+
     def _add_to_pot(self, p: Player, chips: int):
         p_chips = min(chips, p.chips)
         p.chips -= p_chips
         self.pot += p_chips
         p.round_committed += p_chips
+        p.hand_committed += p_chips
         if p.round_committed > self.round_outstanding:
             self.round_outstanding = p.round_committed
         if p.chips == 0:
@@ -150,17 +248,35 @@ class Table:
     def _current_player(self) -> Player:
         return self.seats[self.turn]
 
-    def _other_player(self) -> Player:
-        return self.seats[self.turn.next()]
+    def _next_seat(self, seat : Seat) -> Seat:
+        # the next seat to the left that can still act, neither folded nor
+        # all in; the seat to the left when none can
+        n = len(self.seats)
+        start = seat.next(n)
+        seat = start
+        while self.seats[seat].folded or self.seats[seat].all_in:
+            seat = seat.next(n)
+            if seat == start:
+                break
+        return seat
+
+    def _players_to_act(self) -> int:
+        return sum(1 for p in self.seats.values() if not (p.folded or p.all_in))
 
     def _everyone_acted(self) -> bool:
-        return self._current_player().acted and self._other_player().acted
-    
+        # all in players have nothing left to decide, and a player left
+        # alone to act only has to match the bet
+        waiting = [p for p in self.seats.values() if not (p.folded or p.all_in)]
+        if len(waiting) <= 1:
+            return all(p.round_committed >= self.round_outstanding for p in waiting)
+        return all(p.acted for p in waiting)
+
     def _reset_round(self):
         for p in self.seats.values():
             p.acted = False
             p.round_committed = 0
         self.round_outstanding = 0
+        self.round_raises = 0
 
     def _bet_size(self):
-        return 2 if self.round in [Round.Preflop, Round.Flop] else 4
\ No newline at end of file
+        return self.round.bet_size()
\ No newline at end of file
@@ -0,0 +1,162 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import Enum
+import numpy as np
+from src.poker.table import Action, Round, RAISE_LIMIT, SMALL_BLIND, BIG_BLIND
+
+class NodeType(Enum):
+    Decision = 0
+    Chance = 1
+    Fold = 2
+    Showdown = 3
+
+# Players are identified by position: 0 is the button, which posts the small
+# blind and acts first preflop, 1 is the big blind, which acts first after
+# the flop. Folding is left out where checking is free, since it can never
+# do better than checking.
+@dataclass
+class GameTree:
+    node_type : np.ndarray
+    parent : np.ndarray
+    # child per Action.value for decision nodes, -1 when the action is not
+    # available; chance nodes keep their one child in column 0
+    children : np.ndarray
+    round : np.ndarray
+    to_act : np.ndarray
+    round_raises : np.ndarray
+    committed : np.ndarray
+    # dense numbering of the decision nodes, -1 elsewhere
+    decision_index : np.ndarray
+    decision_nodes : np.ndarray
+
+    @classmethod
+    def build(cls, raise_limit : int = RAISE_LIMIT) -> GameTree:
+        builder = _Builder(raise_limit=raise_limit)
+        builder.decision(parent=-1, round=Round.Preflop, committed=[SMALL_BLIND, BIG_BLIND], round_committed=[SMALL_BLIND, BIG_BLIND], acted=[False, False], to_act=0, raises=0)
+        node_type = np.array(builder.node_type, dtype=np.int8)
+        decision_nodes = np.flatnonzero(node_type == NodeType.Decision.value).astype(np.int32)
+        decision_index = np.full(len(node_type), -1, dtype=np.int32)
+        decision_index[decision_nodes] = np.arange(len(decision_nodes), dtype=np.int32)
+        return GameTree(
+            node_type=node_type,
+            parent=np.array(builder.parent, dtype=np.int32),
+            children=np.array(builder.children, dtype=np.int32).reshape(-1, len(Action)),
+            round=np.array(builder.round, dtype=np.int8),
+            to_act=np.array(builder.to_act, dtype=np.int8),
+            round_raises=np.array(builder.round_raises, dtype=np.int8),
+            committed=np.array(builder.committed, dtype=np.int32).reshape(-1, 2),
+            decision_index=decision_index,
+            decision_nodes=decision_nodes,
+        )
+
+    def __len__(self) -> int:
+        return len(self.node_type)
+
+    @property
+    def pot(self) -> np.ndarray:
+        return self.committed.sum(axis=1)
+
+    @property
+    def legal(self) -> np.ndarray:
+        return self.children >= 0
+
+    def child(self, node : int, action : Action) -> int:
+        return int(self.children[node, action.value])
+
+    def follow(self, actions : list[Action], node : int = 0) -> int:
+        # walks a Table action sequence, skipping chance nodes and treating a
+        # raise past the cap as a call the way Table.action does
+        for action in actions:
+            while self.node_type[node] == NodeType.Chance.value:
+                node = int(self.children[node, 0])
+            if action == Action.BetRaise and self.children[node, action.value] < 0:
+                action = Action.CheckCall
+            node = self.child(node, action)
+            if node < 0:
+                raise ValueError(f"{action} is not in the tree")
+        return node
+
+    def payoff(self, node : int) -> int:
+        # chips won by position 0 at a fold node; at a showdown node the
+        # winner takes committed[node, 0] from the loser
+        if self.node_type[node] != NodeType.Fold.value:
+            raise ValueError("payoff is only defined for fold nodes")
+        folder = int(self.to_act[self.parent[node]])
+        lost = int(self.committed[node, folder])
+        return lost if folder == 1 else -lost
+
+    def infoset_offsets(self, buckets : tuple[int, int, int, int]) -> tuple[np.ndarray, int]:
+        # info set of (decision node, bucket) is offsets[node] + bucket, where
+        # buckets gives the number of card buckets in each round
+        sizes = np.array(buckets, dtype=np.int64)[self.round[self.decision_nodes]]
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        offsets = np.full(len(self), -1, dtype=np.int64)
+        offsets[self.decision_nodes] = starts
+        return offsets, int(sizes.sum())
+
+class _Builder:
+
+    def __init__(self, raise_limit : int):
+        self.raise_limit = raise_limit
+        self.node_type : list[int] = []
+        self.parent : list[int] = []
+        self.children : list[int] = []
+        self.round : list[int] = []
+        self.to_act : list[int] = []
+        self.round_raises : list[int] = []
+        self.committed : list[int] = []
+
+    def _add(self, node_type : NodeType, parent : int, round : Round, to_act : int, raises : int, committed : list[int]) -> int:
+        node = len(self.node_type)
+        self.node_type.append(node_type.value)
+        self.parent.append(parent)
+        self.children.extend([-1] * len(Action))
+        self.round.append(round.value)
+        self.to_act.append(to_act)
+        self.round_raises.append(raises)
+        self.committed.extend(committed)
+        return node
+
+    def decision(self, parent : int, round : Round, committed : list[int], round_committed : list[int], acted : list[bool], to_act : int, raises : int) -> int:
+        node = self._add(NodeType.Decision, parent, round, to_act, raises, committed)
+        other = 1 - to_act
+        diff = max(round_committed) - round_committed[to_act]
+        if diff > 0:
+            child = self._add(NodeType.Fold, node, round, -1, raises, committed)
+            self._set_child(node, Action.Fold, child)
+        # check or call
+        called_committed = list(committed)
+        called_committed[to_act] += diff
+        called_round = list(round_committed)
+        called_round[to_act] += diff
+        called_acted = list(acted)
+        called_acted[to_act] = True
+        if all(called_acted):
+            child = self._close_round(node, round, called_committed)
+        else:
+            child = self.decision(node, round, called_committed, called_round, called_acted, other, raises)
+        self._set_child(node, Action.CheckCall, child)
+        # bet or raise
+        if raises < self.raise_limit:
+            amount = diff + round.bet_size()
+            raised_committed = list(committed)
+            raised_committed[to_act] += amount
+            raised_round = list(round_committed)
+            raised_round[to_act] += amount
+            raised_acted = [False, False]
+            raised_acted[to_act] = True
+            child = self.decision(node, round, raised_committed, raised_round, raised_acted, other, raises + 1)
+            self._set_child(node, Action.BetRaise, child)
+        return node
+
+    def _close_round(self, parent : int, round : Round, committed : list[int]) -> int:
+        if round == Round.River:
+            return self._add(NodeType.Showdown, parent, round, -1, 0, committed)
+        next_round = round.next()
+        node = self._add(NodeType.Chance, parent, next_round, -1, 0, committed)
+        child = self.decision(node, next_round, committed, [0, 0], [False, False], 1, 0)
+        self.children[node * len(Action)] = child
+        return node
+
+    def _set_child(self, node : int, action : Action, child : int):
+        self.children[node * len(Action) + action.value] = child
@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+from src.poker.card import Card
+from src.poker.hand import Hand, Ranking
+from src.poker.evaluator import evaluate_indices
+from src.poker.batch_evaluator import evaluate_batch
+
+class TestBatchEvaluator(unittest.TestCase):
+
+    def test_matches_scalar(self):
+        rng = np.random.default_rng(3)
+        cards = np.argsort(rng.random((2000, 52)), axis=1)[:, :7].astype(np.uint8)
+        for width in (5, 6, 7):
+            strengths, rankings = evaluate_batch(cards[:, :width])
+            for row, strength, ranking in zip(cards[:, :width].tolist(), strengths, rankings):
+                self.assertEqual(strength, evaluate_indices(row))
+                self.assertEqual(ranking, Hand.from_cards(Card.from_ints(row)).ranking.value)
+
+    def test_rankings(self):
+        cards = np.array([
+            Card.to_ints(Card.from_str_list(["Ks", "Qs", "Js", "9s", "Ts", "As", "2h"])),
+            Card.to_ints(Card.from_str_list(["2c", "Jd", "8h", "Tc", "Kd", "3s", "4s"])),
+        ], dtype=np.uint8)
+        _, rankings = evaluate_batch(cards)
+        self.assertEqual(rankings.tolist(), [Ranking.ROYAL_FLUSH.value, Ranking.HIGH_CARD.value])
+
+    def test_invalid_shape(self):
+        with self.assertRaises(ValueError):
+            evaluate_batch(np.zeros((3, 4), dtype=np.uint8))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from src.poker.card import Card
+from src.poker.deck import Deck
+from src.poker.table import Table, Seat, Action, STARTING_STACK
+from src.poker.batch_table import BatchTable
+
+def _sync(table: Table, batch: BatchTable, game: int):
+    # give the table the batch's deal and fresh stacks
+    hole = batch.hole_cards[game].tolist()
+    board = batch.board[game].tolist()
+    for seat, cards in zip([Seat.One, Seat.Two], hole):
+        p = table.seats[seat]
+        p.hole_cards = Card.from_ints(cards)
+        p.chips = STARTING_STACK - p.round_committed
+    table.deck = Deck.stacked(Card.from_ints(board))
+
+class TestBatchTable(unittest.TestCase):
+
+    def test_matches_table(self):
+        size = 32
+        rng = np.random.default_rng(5)
+        batch = BatchTable(size, rng=np.random.default_rng(6))
+        tables = [Table.start() for _ in range(size)]
+        for game, table in enumerate(tables):
+            _sync(table, batch, game)
+        finished = 0
+        for _ in range(300):
+            actions = rng.choice(3, size=size, p=[0.1, 0.5, 0.4])
+            expected = []
+            for game, table in enumerate(tables):
+                hands = table.hands_played
+                table.action(Action(int(actions[game])))
+                done = table.hands_played != hands
+                # between hands the only chips committed are the next blinds
+                stacks = [p.chips + p.round_committed - STARTING_STACK for p in table.seats.values()]
+                expected.append((done, stacks))
+            rewards, done = batch.step(actions)
+            for game, table in enumerate(tables):
+                self.assertEqual(done[game], expected[game][0])
+                if done[game]:
+                    finished += 1
+                    self.assertEqual(rewards[game].tolist(), expected[game][1])
+                    _sync(table, batch, game)
+                self.assertEqual(batch.pot[game], table.pot)
+                self.assertEqual(batch.round[game], table.round.value)
+                self.assertEqual(batch.turn[game], table.turn.value - 1)
+                self.assertEqual(batch.button[game], table.button.value - 1)
+                self.assertEqual(batch.round_outstanding[game], table.round_outstanding)
+        self.assertGreater(finished, 100)
+        self.assertEqual(batch.hands_played.sum(), finished)
+
+if __name__ == '__main__':
+    unittest.main()
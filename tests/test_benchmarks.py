@@ -0,0 +1,23 @@
+import tempfile
+import unittest
+from pathlib import Path
+from benchmarks.bench import BENCHMARKS, Result, run, compare, save, load
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_every_benchmark_runs(self):
+        results = run(seconds=0.0)
+        self.assertEqual(set(results), set(BENCHMARKS))
+        self.assertTrue(all(r.ops_per_sec > 0 for r in results.values()))
+
+    def test_compare_and_round_trip(self):
+        baseline = {"a": Result(ops_per_sec=1000, peak_bytes=10), "b": Result(ops_per_sec=1000, peak_bytes=10)}
+        results = {"a": Result(ops_per_sec=850, peak_bytes=10), "b": Result(ops_per_sec=700, peak_bytes=10), "c": Result(ops_per_sec=1, peak_bytes=0)}
+        self.assertEqual(compare(results, baseline, tolerance=0.2), ["b"])
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "baseline.json"
+            save(results, path)
+            self.assertEqual(load(path), results)
+
+if __name__ == '__main__':
+    unittest.main()
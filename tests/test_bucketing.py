@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+import numpy as np
+from src.poker.card import Card
+from src.poker.table import Round
+from src.poker.cache import CACHE_DIR_ENV
+from src.poker.isomorphism import INDEXER
+from src.poker.ranges import COMBOS, combo_index
+from src.poker import bucketing, cache
+from src.poker.evaluator import evaluate_indices
+from src.poker.bucketing import BucketAbstraction, build, bucket_table, hand_features, kmeans, table_name
+
+class TestBucketing(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name)
+
+    def tearDown(self):
+        bucketing._TABLES.clear()
+        self.dir.cleanup()
+
+    def test_features(self):
+        royal = np.array([Card.to_ints(Card.from_str_list(["Ts", "3c", "As", "Ks", "Qs", "Js", "2d"]))])
+        self.assertEqual(hand_features(royal, "ehs")[0, 0], 1.0)
+        flop = np.array([Card.to_ints(Card.from_str_list(["Ah", "Kh", "Qh", "7h", "2c"]))] * 3)
+        rng = np.random.default_rng(0)
+        ehs = hand_features(flop, "ehs", rollouts=32, rng=rng)
+        self.assertEqual(ehs.shape, (3, 1))
+        self.assertTrue((hand_features(flop, "ehs2", rollouts=32, rng=rng) <= 1).all())
+        histogram = hand_features(flop, "histogram", rollouts=32, rng=rng)
+        np.testing.assert_allclose(histogram.sum(axis=1), 1.0)
+
+    def test_river_features_are_exact(self):
+        rng = np.random.default_rng(4)
+        rivers = np.array([rng.choice(52, size=7, replace=False) for _ in range(6)], dtype=np.uint8)
+        # two rows share a board with their cards swapped around
+        rivers[1, :2], rivers[1, 2:] = rivers[0, :2][::-1], rivers[0, :1:-1]
+        rivers[2, 2:] = rivers[0, 2:]
+        rivers[2, :2] = [c for c in range(52) if c not in rivers[0]][:2]
+        expected = []
+        for row in rivers.tolist():
+            hero = evaluate_indices(row)
+            rest = [c for c in range(52) if c not in row]
+            won = 0.0
+            for i in range(len(rest)):
+                for j in range(i + 1, len(rest)):
+                    villain = evaluate_indices([rest[i], rest[j]] + row[2:])
+                    won += (hero > villain) + 0.5 * (hero == villain)
+            expected.append(won / (len(rest) * (len(rest) - 1) / 2))
+        ehs = hand_features(rivers, "ehs", rollouts=1, opponents=4, rng=rng)
+        np.testing.assert_allclose(ehs[:, 0], expected, rtol=1e-6)
+        np.testing.assert_allclose(hand_features(rivers, "ehs2")[:, 0], np.square(expected), rtol=1e-6)
+        self.assertEqual(ehs[0, 0], ehs[1, 0])
+
+    def test_quantile_buckets_with_ties(self):
+        rng = np.random.default_rng(5)
+        # a few heavy ties among otherwise distinct values
+        values = np.concatenate([np.full(3000, 0.5), np.full(1000, 0.9), rng.random(2000)]).astype(np.float32)
+        labels = bucketing._quantile_buckets(values, 50)
+        self.assertEqual(len(np.unique(labels)), 50)
+        order = np.argsort(values, kind="stable")
+        self.assertTrue((np.diff(labels[order]) >= 0).all())
+        self.assertEqual(len(np.unique(labels[values == 0.5])), 1)
+        # with fewer distinct values than buckets each gets its own
+        np.testing.assert_array_equal(bucketing._quantile_buckets(np.array([0.3, 0.1, 0.3, 0.2]), 8), [2, 0, 2, 1])
+
+    def test_missing_table_is_not_built(self):
+        os.environ[CACHE_DIR_ENV] = self.dir.name
+        try:
+            with self.assertRaises(FileNotFoundError):
+                bucket_table(Round.Flop, "ehs", 5)
+            self.assertEqual(list(self.path.iterdir()), [])
+        finally:
+            del os.environ[CACHE_DIR_ENV]
+
+    def test_preflop_tables(self):
+        aces = INDEXER.index(Card.to_ints(Card.from_str_list(["As", "Ah"])))
+        trash = INDEXER.index(Card.to_ints(Card.from_str_list(["7c", "2d"])))
+        for kind in bucketing.KINDS:
+            table = build(Round.Preflop, kind, 8, path=self.path, rollouts=64, opponents=2, seed=1)
+            self.assertEqual(table.dtype, np.uint8)
+            self.assertEqual(len(table), 169)
+            self.assertEqual(table[aces], 7)
+            self.assertLess(table[trash], 3)
+            np.testing.assert_array_equal(np.load(self.path / table_name(Round.Preflop, kind, 8)), table)
+        self.assertEqual(sorted(p.name for p in self.path.iterdir()), sorted(table_name(Round.Preflop, kind, 8) for kind in bucketing.KINDS))
+
+    def test_interrupted_build_keeps_table(self):
+        table = build(Round.Preflop, "ehs", 8, path=self.path, rollouts=4, seed=1)
+        with mock.patch.object(cache.np, "save", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                build(Round.Preflop, "ehs", 8, path=self.path, rollouts=4, seed=2)
+        self.assertEqual([p.name for p in self.path.iterdir()], [table_name(Round.Preflop, "ehs", 8)])
+        np.testing.assert_array_equal(np.load(self.path / table_name(Round.Preflop, "ehs", 8)), table)
+
+    def test_kmeans(self):
+        rng = np.random.default_rng(2)
+        centers = np.array([[0.0, 0.0], [5.0, 0.0], [10.0, 5.0]])
+        truth = rng.integers(3, size=250_000)
+        np.save(self.path / "data.npy", (centers[truth] + rng.normal(scale=0.5, size=(len(truth), 2))).astype(np.float32))
+        labels = kmeans(self.path / "data.npy", 3, iterations=10, seed=3)
+        # clusters are numbered by the mean of their centers
+        np.testing.assert_array_equal(labels, truth)
+        np.testing.assert_array_equal(kmeans(self.path / "data.npy", 3, iterations=10, seed=3, processes=2), labels)
+
+    def test_abstraction(self):
+        os.environ[CACHE_DIR_ENV] = self.dir.name
+        try:
+            table = (np.arange(INDEXER.size(Round.Flop)) % 5).astype(np.uint8)
+            np.save(self.path / table_name(Round.Flop, "ehs", 5), table)
+            abstraction = BucketAbstraction(buckets=(169, 5, 5, 5), kind="ehs")
+            board = tuple(Card.to_ints(Card.from_str_list(["Ah", "Kh", "2c"])))
+            buckets = abstraction.bucket(Round.Flop, board)
+            hand = combo_index(*Card.to_ints(Card.from_str_list(["Qh", "Jh"])))
+            self.assertEqual(buckets[hand], table[INDEXER.index(COMBOS[hand].tolist() + list(board))])
+            preflop = abstraction.bucket(Round.Preflop, ())
+            aces = [combo_index(*Card.to_ints(c)) for c in (Card.from_str_list(["As", "Ah"]), Card.from_str_list(["Ad", "Ac"]))]
+            self.assertEqual(preflop[aces[0]], preflop[aces[1]])
+            self.assertEqual(len(set(preflop.tolist())), 169)
+        finally:
+            del os.environ[CACHE_DIR_ENV]
+
+if __name__ == '__main__':
+    unittest.main()
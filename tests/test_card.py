@@ -10,6 +10,30 @@ class TestCard(unittest.TestCase):
     def test_create_deck(self):
         cards = Card.deck()
         self.assertEqual(len(cards), 52)
+        self.assertEqual(len(set(cards)), 52)
+
+    def test_card_from_str(self):
+        card = Card.from_str("Th")
+        self.assertEqual(card.rank, Rank.TEN)
+        self.assertEqual(card.suit, Suit.HEARTS)
+        self.assertIs(card, Card.from_str("T♥"))
+        with self.assertRaises(ValueError):
+            Card.from_str("1h")
+
+    def test_int_encoding(self):
+        for i in range(52):
+            card = Card.from_int(i)
+            self.assertEqual(card.index, i)
+            self.assertEqual(Card(rank=card.rank, suit=card.suit), card)
+        self.assertEqual(Card.from_str("2c").index, 0)
+        self.assertEqual(Card.from_str("As").index, 51)
+
+    def test_mask_encoding(self):
+        cards = Card.from_str_list(["2c", "Td", "As"])
+        mask = Card.to_mask(cards)
+        self.assertEqual(mask, 1 | 1 << 33 | 1 << 51)
+        self.assertEqual(Card.from_mask(mask), cards)
+        self.assertEqual(Card.from_ints(Card.to_ints(cards)), cards)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
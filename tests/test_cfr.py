@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from src.poker.card import Card
+from src.poker.ranges import combo_index
+from src.poker.cfr import CFRSolver, HandStrengthAbstraction, hand_strength
+
+class TestCFR(unittest.TestCase):
+
+    def test_hand_strength(self):
+        board = tuple(Card.to_ints(Card.from_str_list(["As", "Ks", "Qs", "Js", "2d"])))
+        royal = combo_index(*Card.to_ints(Card.from_str_list(["Ts", "3c"])))
+        strength = hand_strength(board)
+        self.assertEqual(strength[royal], 1.0)
+        self.assertTrue(((strength >= 0) & (strength <= 1)).all())
+
+    def test_exploitability_falls(self):
+        solver = CFRSolver(HandStrengthAbstraction(postflop_buckets=4), raise_limit=1)
+        before = solver.exploitability(flops=2, turns=1, rivers=1)
+        progress = solver.train(20, seed=1, report_every=10, flops=2, turns=1, rivers=1)
+        self.assertEqual([p.iterations for p in progress], [10, 20])
+        self.assertLess(progress[-1].exploitability, before / 2)
+
+        strategy = solver.average_strategy()
+        np.testing.assert_allclose(strategy.sum(axis=1), 1.0)
+        root = solver.strategy(0, np.arange(169))
+        self.assertEqual(root.shape, (169, 3))
+        self.assertTrue((root >= 0).all())
+
+    def test_parallel_is_reproducible(self):
+        results = []
+        for _ in range(2):
+            solver = CFRSolver(HandStrengthAbstraction(postflop_buckets=2), raise_limit=1)
+            solver.train(8, seed=4, processes=2, sync_every=2)
+            self.assertEqual(solver.iterations, 8)
+            results.append(solver.regrets)
+        np.testing.assert_array_equal(results[0], results[1])
+        self.assertTrue(results[0].any())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import random
+import unittest
+import numpy as np
+from src.poker.card import Card
+from src.poker.deck import Deck
+
+class TestDeck(unittest.TestCase):
+
+    def test_deals_every_card_once(self):
+        deck = Deck(rng=random.Random(1))
+        cards = deck.deal_many(52)
+        self.assertEqual(len(set(cards)), 52)
+        self.assertEqual(len(deck), 0)
+
+    def test_empty(self):
+        deck = Deck(rng=random.Random(4))
+        with self.assertRaises(IndexError):
+            deck.deal_many(53)
+        self.assertEqual(len(deck), 0)
+        deck.reset()
+        self.assertEqual(len(set(deck.deal_many(52))), 52)
+
+    def test_seeded(self):
+        for make_rng in (random.Random, np.random.default_rng):
+            first = Deck(rng=make_rng(3)).deal_many(9)
+            second = Deck(rng=make_rng(3)).deal_many(9)
+            self.assertEqual(first, second)
+
+    def test_dead_cards(self):
+        dead = Card.from_str_list(["As", "Kd", "2c"])
+        deck = Deck(rng=random.Random(2), dead=dead)
+        self.assertEqual(len(deck), 49)
+        self.assertFalse(set(deck.deal_many(49)) & set(dead))
+        deck.reset(dead=dead[:1])
+        self.assertEqual(len(deck), 51)
+
+    def test_stacked(self):
+        cards = Card.from_str_list(["As", "Kd", "2c"])
+        deck = Deck.stacked(cards)
+        self.assertEqual(deck.deal_many(3), cards)
+
+if __name__ == '__main__':
+    unittest.main()
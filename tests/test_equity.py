@@ -0,0 +1,38 @@
+import unittest
+from src.poker.card import Card
+from src.poker.equity import equity
+
+class TestEquity(unittest.TestCase):
+
+    def test_river_is_exact(self):
+        result = equity(
+            Card.from_str_list(["As", "Ah"]),
+            [Card.from_str_list(["Kd", "Kc"]), Card.from_str_list(["9d", "9h"])],
+            board=Card.from_str_list(["Ks", "7c", "2h", "3h", "9c"]),
+        )
+        self.assertEqual((result.win, result.tie, result.loss), (0, 0, 2))
+
+    def test_turn_is_exact(self):
+        result = equity(
+            Card.from_str_list(["As", "Ah"]),
+            [Card.from_str_list(["Kd", "Kc"])],
+            board=Card.from_str_list(["Ks", "7c", "2h", "3h"]),
+        )
+        self.assertEqual(result.trials, 44)
+        self.assertEqual(result.win, 2)
+
+    def test_monte_carlo_is_reproducible(self):
+        hole_cards = Card.from_str_list(["As", "Ah"])
+        villain = [Card.from_str_list(["Kd", "Kc"])]
+        single = equity(hole_cards, villain, trials=60_000, seed=11)
+        pooled = equity(hole_cards, villain, trials=60_000, seed=11, processes=2)
+        self.assertEqual(single, pooled)
+        self.assertEqual(single.trials, 60_000)
+        self.assertAlmostEqual(single.equity, 0.82, delta=0.01)
+
+    def test_conflicting_cards(self):
+        with self.assertRaises(ValueError):
+            equity(Card.from_str_list(["As", "Ah"]), board=Card.from_str_list(["As", "7c", "2h"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import random
+import unittest
+from itertools import combinations
+from src.poker.card import Card
+from src.poker.hand import Hand, Ranking
+from src.poker.evaluator import evaluate, evaluate_mask, ranking_value
+
+class TestEvaluator(unittest.TestCase):
+
+    def test_rankings(self):
+        cases = [
+            (["2c", "Jd", "8h", "Tc", "Kd"], Ranking.HIGH_CARD),
+            (["Ks", "As", "8h", "Tc", "Kd"], Ranking.PAIR),
+            (["7h", "7d", "5c", "Tc", "7c"], Ranking.THREE_OF_A_KIND),
+            (["Ac", "2d", "3c", "4s", "5c"], Ranking.STRAIGHT),
+            (["6s", "Jh", "6c", "6d", "Jd", "Js", "2c"], Ranking.FULL_HOUSE),
+            (["Ks", "Qs", "Js", "9s", "Ts", "As", "Ah"], Ranking.ROYAL_FLUSH),
+            (["5s", "4s", "3s", "2s", "As", "Ad", "Ac"], Ranking.STRAIGHT_FLUSH),
+        ]
+        for strs, ranking in cases:
+            strength = evaluate(Card.from_str_list(strs))
+            self.assertEqual(Ranking(ranking_value(strength)), ranking)
+
+    def test_wheel_is_lowest_straight(self):
+        wheel = evaluate(Card.from_str_list(["Ac", "2d", "3c", "4s", "5c"]))
+        six_high = evaluate(Card.from_str_list(["6c", "2d", "3c", "4s", "5c"]))
+        self.assertLess(wheel, six_high)
+
+    def test_best_five_of_seven(self):
+        rng = random.Random(7)
+        deck = Card.deck()
+        for _ in range(200):
+            cards = rng.sample(deck, 7)
+            best = max(evaluate(list(combo)) for combo in combinations(cards, 5))
+            self.assertEqual(evaluate(cards), best)
+
+    def test_hand_view(self):
+        hand = Hand.from_cards(Card.from_str_list(["Ah", "Ks", "Ac", "Tc", "5s", "9h", "9s"]))
+        self.assertEqual(hand.ranking, Ranking.TWO_PAIR)
+        self.assertEqual(hand.description, "two pair aces and nines")
+        self.assertEqual([str(c.rank) for c in hand.cards], ["A", "A", "9", "9", "K"])
+
+    def test_too_few_cards(self):
+        with self.assertRaises(ValueError):
+            evaluate(Card.from_str_list(["Ah", "Ks", "Ac", "Tc"]))
+
+    def test_mask_matches_cards(self):
+        rng = random.Random(11)
+        deck = Card.deck()
+        for n in (5, 6, 7):
+            for _ in range(300):
+                cards = rng.sample(deck, n)
+                self.assertEqual(evaluate_mask(Card.to_mask(cards)), evaluate(cards))
+        # flushes of every suit, read from the per suit rank lookups
+        for suit in range(4):
+            suited = [c for c in deck if c.index & 3 == suit]
+            for _ in range(100):
+                cards = rng.sample(suited, rng.randint(5, 7))
+                cards += rng.sample([c for c in deck if c not in cards], 7 - len(cards))
+                self.assertEqual(evaluate_mask(Card.to_mask(cards)), evaluate(cards))
+        with self.assertRaises(ValueError):
+            evaluate_mask(Card.to_mask(Card.from_str_list(["Ah", "Ks", "Ac", "Tc"])))
+
+    def test_mask_cache(self):
+        evaluate_mask.cache_clear()
+        mask = Card.to_mask(Card.from_str_list(["Ah", "Ks", "Ac", "Tc", "5s", "9h", "9s"]))
+        evaluate_mask(mask)
+        evaluate_mask(mask)
+        info = evaluate_mask.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+
+    def test_hand_without_description(self):
+        cards = Card.from_str_list(["Ah", "Ks", "Ac", "Tc", "5s", "9h", "9s"])
+        hand = Hand.from_cards(cards, describe=False)
+        self.assertEqual(hand.description, "")
+        self.assertEqual(hand, Hand.from_cards(cards))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from math import comb
+import numpy as np
+from src.poker.cfr import CFRSolver, HandStrengthAbstraction
+from src.poker.table import Round
+from src.poker.tree import GameTree, NodeType
+from src.poker.ranges import NUM_COMBOS, ChanceBoard, compatible_sums, deal_boards, live, opponent_hands
+from src.poker.exploitability import exploitability, BestResponse
+
+# A node by node walk over the whole tree and every sampled board at once,
+# to check the round layers and the per flop split against.
+def reference(strategy, abstraction, raise_limit, flops, turns, rivers, seed):
+    tree = GameTree.build(raise_limit=raise_limit)
+    offsets, _ = tree.infoset_offsets(abstraction.buckets)
+    rng = np.random.default_rng(seed)
+    cards = [tuple(sorted(rng.choice(52, size=3, replace=False).tolist())) for _ in range(flops)]
+    root = ChanceBoard((), live(()), abstraction.bucket(Round.Preflop, ()), None, [])
+    for flop, s in zip(cards, np.random.SeedSequence(seed).spawn(flops)):
+        board = deal_boards(abstraction, flop, Round.Flop, (1, 1, turns, rivers), np.random.default_rng(s))
+        board.opponent_scale = opponent_hands(0) / opponent_hands(3)
+        board.own_scale = comb(52, 3) / comb(50, 3)
+        root.children.append(board)
+
+    def values(node, player, reach, board):
+        kind = NodeType(tree.node_type[node])
+        committed = tree.committed[node]
+        if kind == NodeType.Showdown:
+            return committed[player] * board.showdown.values(reach)
+        if kind == NodeType.Fold:
+            folder = tree.to_act[tree.parent[node]]
+            won = -committed[player] if folder == player else committed[1 - player]
+            return won * compatible_sums(reach)
+        if kind == NodeType.Chance:
+            total = np.zeros(NUM_COMBOS)
+            for child in board.children:
+                total += child.live * values(tree.children[node, 0], player, reach * child.live * child.opponent_scale, child)
+            return total * board.children[0].own_scale / len(board.children)
+        children = [(a, c) for a, c in enumerate(tree.children[node]) if c >= 0]
+        if tree.to_act[node] == player:
+            return np.max([values(c, player, reach, board) for _, c in children], axis=0)
+        probabilities = strategy[offsets[node] + board.buckets]
+        return np.sum([values(c, player, reach * probabilities[:, a], board) for a, c in children], axis=0)
+
+    uniform = np.full(NUM_COMBOS, 1 / opponent_hands(0))
+    return sum(values(0, player, uniform, root).mean() for player in (0, 1)) / 2
+
+class TestExploitability(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.solver = CFRSolver(HandStrengthAbstraction(postflop_buckets=3), raise_limit=1)
+        cls.solver.train(6, seed=2)
+        cls.strategy = cls.solver.average_strategy()
+
+    def test_matches_reference(self):
+        abstraction = self.solver.abstraction
+        for strategy in (self.strategy, np.full_like(self.strategy, 1 / 3)):
+            value = exploitability(strategy, abstraction, 1, flops=3, turns=2, rivers=2, seed=7)
+            self.assertAlmostEqual(value, reference(strategy, abstraction, 1, 3, 2, 2, 7), places=9)
+
+    def test_processes_and_storage(self):
+        abstraction = self.solver.abstraction
+        value = exploitability(self.strategy, abstraction, 1, flops=4, turns=1, rivers=1, seed=3)
+        self.assertEqual(exploitability(self.strategy, abstraction, 1, flops=4, turns=1, rivers=1, seed=3, processes=2), value)
+        self.assertEqual(self.solver.exploitability(flops=4, turns=1, rivers=1, seed=3), value)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "strategy.npy")
+            np.save(path, self.strategy)
+            self.assertEqual(exploitability(path, abstraction, 1, flops=4, turns=1, rivers=1, seed=3), value)
+
+    def test_rejects_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            BestResponse(self.strategy[:-1], self.solver.abstraction, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from src.poker.table import Table, Action, STARTING_STACK
+from src.poker.state import GameState
+from src.poker.history import HandRecorder, load_hands
+from src.poker.features import encode_state, hand_samples, history_batches, prefetched, HOLE_CARDS, BOARD, ROUND, BUTTON, POT, TO_CALL, NUM_FEATURES
+
+class TestFeatures(unittest.TestCase):
+
+    def test_encode_state(self):
+        state = GameState.start(((0, 1), (2, 3))).apply(Action.BetRaise).apply(Action.CheckCall).deal((10, 20, 30))
+        features = encode_state(state)
+        self.assertEqual(features.shape, (NUM_FEATURES,))
+        # the big blind acts first on the flop
+        self.assertEqual(list(np.flatnonzero(features[HOLE_CARDS])), [2, 3])
+        self.assertEqual(list(np.flatnonzero(features[BOARD])), [10, 20, 30])
+        self.assertEqual(list(features[ROUND]), [0, 1, 0, 0])
+        self.assertEqual(features[BUTTON], 0)
+        self.assertAlmostEqual(features[POT], 8 / STARTING_STACK)
+        self.assertEqual(features[TO_CALL], 0)
+
+    def test_history_batches(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "hands.bin"
+            rng = random.Random(5)
+            with HandRecorder(path) as recorder:
+                table = Table.start(rng=rng, recorder=recorder)
+                actions = 0
+                while table.hands_played < 200:
+                    table.action(rng.choice([Action.Fold, Action.CheckCall, Action.CheckCall, Action.BetRaise]))
+                    actions += 1
+            samples = hand_samples(load_hands(path))
+            self.assertEqual(len(samples), actions)
+            self.assertEqual(samples.features.shape, (actions, NUM_FEATURES))
+            self.assertEqual(samples.features[:, HOLE_CARDS].sum(axis=1).min(), 2)
+
+            batches = list(history_batches(path, batch_samples=64, prefetch=2))
+            self.assertTrue(all(len(b) == 64 for b in batches[:-1]))
+            np.testing.assert_array_equal(np.concatenate([b.features for b in batches]), samples.features)
+            np.testing.assert_array_equal(np.concatenate([b.actions for b in batches]), samples.actions)
+
+    def test_prefetched_raises(self):
+        def failing():
+            yield 1
+            raise RuntimeError("broken")
+        items = prefetched(failing())
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(RuntimeError):
+            next(items)
+
+if __name__ == '__main__':
+    unittest.main()
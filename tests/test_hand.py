@@ -111,5 +111,10 @@ class TestCard(unittest.TestCase):
         hand_2 = Hand.from_cards(Card.from_str_list(["2s","Kc","Js","As","Ts"]))
         self.assertLess(hand_2, hand_1)
 
+    def test_card_count(self):
+        for strs in (["2s","2c","Js","As"], ["2s","2c","Js","As","Ts","9h","8d","7c"]):
+            with self.assertRaises(ValueError):
+                Hand.from_cards(Card.from_str_list(strs))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
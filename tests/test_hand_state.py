@@ -0,0 +1,80 @@
+import random
+import unittest
+from src.poker.card import Card
+from src.poker.hand import Hand
+from src.poker.table import Table, Action
+from src.poker.evaluator import evaluate
+from src.poker.hand_state import HandState, TableHands
+
+def cards_mask(strs : list[str]) -> int:
+    return Card.to_mask(Card.from_str_list(strs))
+
+class TestHandState(unittest.TestCase):
+
+    def test_matches_evaluator(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            cards = rng.sample(Card.deck(), 7)
+            state = HandState.from_cards(cards[:2])
+            with self.assertRaises(ValueError):
+                state.strength()
+            for n in range(3, 8):
+                state.add(cards[n - 1].index)
+                if n >= 5:
+                    self.assertEqual(state.strength(), evaluate(cards[:n]))
+            self.assertEqual(state.hand(), Hand.from_cards(cards))
+            self.assertEqual(state.hand().description, Hand.from_cards(cards).description)
+
+    def test_rejects_duplicates(self):
+        state = HandState.from_cards(Card.from_str_list(["Ah", "Kh"]))
+        with self.assertRaises(ValueError):
+            state.add(Card.from_str("Ah").index)
+
+    def test_draws(self):
+        flush = HandState.from_cards(Card.from_str_list(["Ah", "Kh", "2h", "7h", "9c"])).draws()
+        self.assertEqual(flush.flush, cards_mask(["3h", "4h", "5h", "6h", "8h", "9h", "Th", "Jh", "Qh"]))
+        self.assertEqual(flush.straight, 0)
+        self.assertEqual(flush.outs(), 9)
+
+        open_ended = HandState.from_cards(Card.from_str_list(["5c", "6d", "7h", "8s", "Kc"])).draws()
+        self.assertEqual(open_ended.straight, cards_mask(["4c", "4d", "4h", "4s", "9c", "9d", "9h", "9s"]))
+        gutshot = HandState.from_cards(Card.from_str_list(["5c", "6d", "8h", "9s", "Kc", "Kd"])).draws()
+        self.assertEqual(gutshot.straight, cards_mask(["7c", "7d", "7h", "7s"]))
+        wheel = HandState.from_cards(Card.from_str_list(["Ac", "2d", "3h", "5s", "9c"])).draws()
+        self.assertEqual(wheel.straight, cards_mask(["4c", "4d", "4h", "4s"]))
+
+        # both draws share the outs that make a straight flush
+        combo = HandState.from_cards(Card.from_str_list(["5h", "6h", "7h", "8h", "Kc"])).draws()
+        self.assertEqual(combo.outs(), 9 + 6)
+
+        made = HandState.from_cards(Card.from_str_list(["5c", "6d", "7h", "8s", "9c", "2h"])).draws()
+        self.assertEqual(made.straight, 0)
+        river = HandState.from_cards(Card.from_str_list(["Ah", "Kh", "2h", "7h", "9c", "3s", "4d"])).draws()
+        self.assertEqual(river, (0, 0))
+
+    def test_table_hands(self):
+        table = Table.start(rng=random.Random(2))
+        hands = TableHands()
+        for _ in range(100):
+            states = hands.update(table)
+            for seat, p in table.seats.items():
+                self.assertEqual(states[seat].mask, Card.to_mask(p.hole_cards + table.board))
+                if table.board:
+                    self.assertEqual(states[seat].strength(), evaluate(p.hole_cards + table.board))
+            table.action(Action.CheckCall)
+        self.assertGreater(table.hands_played, 10)
+
+    def test_table_hands_new_table_per_hand(self):
+        rng = random.Random(3)
+        hands = TableHands()
+        for _ in range(20):
+            # as simulate plays, a fresh table every hand
+            table = Table.start(rng=rng)
+            while table.hands_played == 0:
+                states = hands.update(table)
+                for seat, p in table.seats.items():
+                    self.assertEqual(states[seat].mask, Card.to_mask(p.hole_cards + table.board))
+                table.action(Action.CheckCall)
+
+if __name__ == '__main__':
+    unittest.main()
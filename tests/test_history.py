@@ -0,0 +1,76 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from src.poker.table import Table, Action
+from src.poker.tree import GameTree, NodeType
+from src.poker.history import HandRecorder, read_hands, load_hands, hand_actions, NO_CARD
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "hands.bin"
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _play(self, recorder : HandRecorder, hands : int, seed : int) -> list[list[int]]:
+        rng = random.Random(seed)
+        table = Table.start(rng=rng, recorder=recorder)
+        stacks = []
+        while table.hands_played < hands:
+            before = table.hands_played
+            stacks_before = [p.chips + p.round_committed for p in table.seats.values()]
+            while table.hands_played == before:
+                # the tree used to check records has no fold when checking is free
+                facing_bet = table.round_outstanding > table.seats[table.turn].round_committed
+                table.action(rng.choice([Action.Fold] * facing_bet + [Action.CheckCall, Action.CheckCall, Action.BetRaise, Action.BetRaise]))
+            stacks.append(stacks_before)
+        return stacks
+
+    def test_round_trip(self):
+        with HandRecorder(self.path, buffer_hands=64) as recorder:
+            stacks = self._play(recorder, 500, seed=1)
+        hands = load_hands(self.path)
+        self.assertEqual(len(hands), 500)
+        np.testing.assert_array_equal(hands["stacks"], stacks)
+        np.testing.assert_array_equal(hands["hand"], np.arange(500))
+        self.assertTrue((hands["won"].sum(axis=1) == 0).all())
+        np.testing.assert_array_equal(hands["stacks"][1:], (hands["stacks"] + hands["won"])[:-1])
+
+        tree = GameTree.build()
+        for record in hands:
+            cards = np.concatenate([record["hole_cards"].ravel(), record["board"][record["board"] != NO_CARD]])
+            self.assertEqual(len(set(cards.tolist())), len(cards))
+            # the tree assumes both players can cover every bet
+            if record["stacks"].min() < 100:
+                continue
+            end = tree.follow(hand_actions(record))
+            self.assertEqual(tree.node_type[end], (NodeType.Showdown if record["showdown"] else NodeType.Fold).value)
+            self.assertEqual((record["board"] != NO_CARD).sum(), [0, 3, 4, 5][tree.round[end]])
+
+        streamed = np.concatenate(list(read_hands(self.path, batch_hands=77)))
+        np.testing.assert_array_equal(streamed, hands)
+
+    def test_append_and_truncated_tail(self):
+        with HandRecorder(self.path) as recorder:
+            self._play(recorder, 10, seed=2)
+        with HandRecorder(self.path) as recorder:
+            self._play(recorder, 5, seed=3)
+        with open(self.path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+        hands = load_hands(self.path)
+        self.assertEqual(len(hands), 15)
+        self.assertEqual(sum(len(batch) for batch in read_hands(self.path, batch_hands=4)), 15)
+
+    def test_rejects_other_files(self):
+        self.path.write_bytes(b"not a history file")
+        with self.assertRaises(ValueError):
+            load_hands(self.path)
+        with self.assertRaises(ValueError):
+            HandRecorder(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
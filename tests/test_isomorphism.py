@@ -0,0 +1,67 @@
+import random
+import unittest
+import numpy as np
+from itertools import combinations, permutations
+from src.poker.card import Card
+from src.poker.table import Round
+from src.poker.preflop import class_index
+from src.poker.isomorphism import INDEXER, canonical_index, canonical_hand
+
+class TestIsomorphism(unittest.TestCase):
+
+    def test_sizes(self):
+        self.assertEqual([INDEXER.size(r) for r in Round], [169, 1_286_792, 55_190_538, 2_428_287_420])
+
+    def test_preflop_matches_classes(self):
+        pairs = {(INDEXER.index(list(hole)), class_index(*hole)) for hole in combinations(range(52), 2)}
+        self.assertEqual(len(pairs), 169)
+        self.assertEqual({i for i, _ in pairs}, set(range(169)))
+
+    def test_flop_is_perfect(self):
+        # every flop with a fixed hand, against brute force canonical forms
+        hole = [0, 4]
+        maps = [[(c & ~3) | perm[c & 3] for c in range(52)] for perm in permutations(range(4))]
+        forms = {}
+        for flop in combinations([c for c in range(52) if c not in hole], 3):
+            form = min((tuple(sorted(m[c] for c in hole)), tuple(sorted(m[c] for c in flop))) for m in maps)
+            index = INDEXER.index(hole + list(flop))
+            self.assertEqual(forms.setdefault(form, index), index)
+        self.assertEqual(len(set(forms.values())), len(forms))
+
+    def test_round_trip(self):
+        rng = random.Random(14)
+        for round, n in ((Round.Flop, 5), (Round.Turn, 6), (Round.River, 7)):
+            for _ in range(300):
+                index = rng.randrange(INDEXER.size(round))
+                cards = INDEXER.unindex(round, index)
+                self.assertEqual(len(set(cards)), n)
+                self.assertEqual(INDEXER.index(cards), index)
+                perm = rng.sample(range(4), 4)
+                swapped = [(c & ~3) | perm[c & 3] for c in cards]
+                self.assertEqual(INDEXER.index(swapped[1::-1] + swapped[2:]), index)
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(15)
+        for round, n in ((Round.Preflop, 2), (Round.Flop, 5), (Round.Turn, 6), (Round.River, 7)):
+            hands = np.argsort(rng.random((300, 52)), axis=1)[:, :n]
+            indices = INDEXER.index_batch(hands)
+            self.assertEqual(indices.tolist(), [INDEXER.index(h) for h in hands.tolist()])
+            cards = INDEXER.unindex_batch(round, indices)
+            self.assertEqual(cards.tolist(), [INDEXER.unindex(round, i) for i in indices.tolist()])
+        with self.assertRaises(ValueError):
+            INDEXER.index_batch(np.array([[0, 0, 1, 2, 3]]))
+
+    def test_cards(self):
+        hole, board = Card.from_str_list(["Ah", "Kh"]), Card.from_str_list(["Qh", "Jh", "2c"])
+        index = canonical_index(hole, board)
+        self.assertEqual(canonical_index(Card.from_str_list(["Ks", "As"]), Card.from_str_list(["Js", "Qs", "2d"])), index)
+        self.assertNotEqual(canonical_index(hole, Card.from_str_list(["Qh", "Jh", "2h"])), index)
+        canonical_hole, canonical_board = canonical_hand(Round.Flop, index)
+        self.assertEqual(canonical_index(canonical_hole, canonical_board), index)
+        with self.assertRaises(ValueError):
+            INDEXER.index([0, 1, 2])
+        with self.assertRaises(ValueError):
+            INDEXER.index([0, 0])
+
+if __name__ == '__main__':
+    unittest.main()
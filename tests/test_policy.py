@@ -0,0 +1,54 @@
+import random
+import unittest
+import numpy as np
+from src.poker.table import Table, Action, RAISE_LIMIT
+from src.poker.features import NUM_FEATURES
+from src.poker.policy import observe, decide, sample, uniform_policy, LinearPolicy
+from src.poker.simulate import simulate_batched
+
+class TestPolicy(unittest.TestCase):
+
+    def test_one_call_per_batch(self):
+        tables = [Table.start(rng=random.Random(i)) for i in range(10)]
+        tables[3].round_raises = RAISE_LIMIT
+        calls = []
+        def policy(features, legal, rng):
+            calls.append((features.shape, legal.copy()))
+            return np.where(legal[:, Action.BetRaise.value], Action.BetRaise.value, Action.CheckCall.value)
+        actions = decide(policy, tables, np.random.default_rng(0))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][0], (10, NUM_FEATURES))
+        self.assertEqual(actions[3], Action.CheckCall)
+        self.assertEqual(actions.count(Action.BetRaise), 9)
+        self.assertEqual(decide(policy, [], np.random.default_rng(0)), [])
+
+    def test_observe(self):
+        table = Table.start(rng=random.Random(0))
+        features, legal = observe([table])
+        hole = [c.index for c in table.seats[table.turn].hole_cards]
+        self.assertEqual(sorted(np.flatnonzero(features[0, :52]).tolist()), sorted(hole))
+        self.assertTrue(legal.all())
+
+    def test_sample_respects_weights(self):
+        rng = np.random.default_rng(1)
+        weights = np.tile([0.0, 1.0, 3.0], (20_000, 1))
+        counts = np.bincount(sample(weights, rng), minlength=3)
+        self.assertEqual(counts[0], 0)
+        self.assertAlmostEqual(counts[2] / len(weights), 0.75, delta=0.02)
+        legal = np.array([[True, True, False]] * 1000)
+        self.assertTrue((uniform_policy(np.zeros((1000, NUM_FEATURES)), legal, rng) != Action.BetRaise.value).all())
+
+    def test_linear_policy(self):
+        policy = LinearPolicy.zeros()
+        policy.bias[:] = [-50.0, 0.0, 50.0]
+        legal = np.array([[True, True, True], [True, True, False]])
+        p = policy.probabilities(np.zeros((2, NUM_FEATURES)), legal)
+        np.testing.assert_allclose(p.sum(axis=1), 1)
+        self.assertEqual(p[1, Action.BetRaise.value], 0)
+        # raises whenever it may and calls otherwise, so it never folds
+        result = simulate_batched((policy, uniform_policy), hands=200, seed=1, tables=16)
+        self.assertEqual(result.actions[0][Action.Fold], 0)
+        self.assertGreater(result.actions[0][Action.BetRaise], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from src.poker.card import Card
+from src.poker import preflop
+from src.poker.cache import CACHE_DIR_ENV
+
+class TestPreflop(unittest.TestCase):
+
+    def test_hand_classes(self):
+        self.assertEqual(preflop.class_name(preflop.hand_class(Card.from_str_list(["As", "Kd"]))), "AKo")
+        self.assertEqual(preflop.class_name(preflop.hand_class(Card.from_str_list(["Kh", "Ah"]))), "AKs")
+        self.assertEqual(preflop.class_name(preflop.hand_class(Card.from_str_list(["7c", "7d"]))), "77")
+        self.assertEqual(len(set(preflop.CLASS_NAMES)), preflop.NUM_CLASSES)
+        sizes = [len(preflop.class_combos(preflop.class_from_name(n))) for n in ["AA", "AKs", "AKo"]]
+        self.assertEqual(sizes, [6, 4, 12])
+
+    def test_build_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp)
+            built, vs_random = preflop.build(path, trials=8)
+            equity = preflop.equity_table(path)
+            self.assertIsInstance(equity, np.memmap)
+            self.assertEqual(equity.shape, (169, 169))
+            np.testing.assert_allclose(equity + equity.T, 1.0, atol=1e-6)
+            aces = preflop.class_from_name("AA")
+            self.assertEqual(int(np.argmax(preflop.vs_random_table(path))), aces)
+            np.testing.assert_array_equal(built, equity)
+            self.assertEqual(sorted(p.name for p in path.iterdir()), sorted([preflop.EQUITY_FILE, preflop.VS_RANDOM_FILE]))
+
+    def test_lookup_does_not_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ[CACHE_DIR_ENV] = tmp
+            try:
+                with self.assertRaises(FileNotFoundError):
+                    preflop.preflop_equity_vs_random(Card.from_str_list(["As", "Ah"]))
+                self.assertEqual(list(Path(tmp).iterdir()), [])
+                preflop.build(Path(tmp), trials=4)
+                self.assertGreater(preflop.preflop_equity_vs_random(Card.from_str_list(["As", "Ah"])), 0.8)
+            finally:
+                del os.environ[CACHE_DIR_ENV]
+                preflop._EQUITY = preflop._VS_RANDOM = None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import pstats
+import random
+import tempfile
+import unittest
+from src.poker.table import Table, Action
+from src.poker.simulate import simulate, call_policy
+from src.poker.profiling import Instrumentation, PHASES
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_counts_phases(self):
+        with Instrumentation() as instrumentation:
+            table = Table.start(rng=random.Random(0))
+            for _ in range(8):
+                table.action(Action.CheckCall)
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(set(snapshot), set(PHASES))
+        # one full hand checked down: eight actions, one showdown, two deals
+        self.assertEqual(snapshot["action"]["calls"], 8)
+        self.assertEqual(snapshot["next"]["calls"], 8)
+        self.assertEqual(snapshot["showdown"]["calls"], 1)
+        self.assertEqual(snapshot["deal_next_hand"]["calls"], 2)
+        # both players' hands are evaluated at the showdown
+        self.assertEqual(snapshot["evaluate"]["calls"], 2)
+        self.assertGreaterEqual(snapshot["showdown"]["seconds"], snapshot["evaluate"]["seconds"])
+        self.assertGreaterEqual(snapshot["action"]["seconds"], snapshot["showdown"]["seconds"])
+
+    def test_restores_methods(self):
+        before = {name: cls.__dict__[attribute] for name, (cls, attribute) in PHASES.items()}
+        with Instrumentation() as instrumentation:
+            self.assertIsNot(Table.__dict__["action"], before["action"])
+            with self.assertRaises(RuntimeError):
+                with Instrumentation():
+                    pass
+        for name, (cls, attribute) in PHASES.items():
+            self.assertIs(cls.__dict__[attribute], before[name])
+        table = Table.start(rng=random.Random(0))
+        table.action(Action.CheckCall)
+        self.assertEqual(instrumentation.snapshot()["action"]["calls"], 0)
+
+    def test_profile_dump(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "run.prof")
+            with Instrumentation(profile=path) as instrumentation:
+                simulate((call_policy, call_policy), 20)
+            snapshot = instrumentation.snapshot()
+            self.assertEqual(snapshot["showdown"]["calls"], 20)
+            self.assertEqual(snapshot["evaluate"]["calls"], 40)
+            stats = pstats.Stats(path)
+            self.assertTrue(any(name == "_showdown" for _, _, name in stats.stats))
+
+if __name__ == '__main__':
+    unittest.main()
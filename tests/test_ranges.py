@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+from src.poker.card import Card
+from src.poker.ranges import COMBOS, COMBO_MASKS, NUM_COMBOS, Showdown, combo_index, compatible_sums, live
+from src.poker.batch_evaluator import evaluate_batch
+
+class TestRanges(unittest.TestCase):
+
+    def test_combo_index(self):
+        self.assertEqual(NUM_COMBOS, 1326)
+        for i, (a, b) in enumerate(COMBOS.tolist()):
+            self.assertEqual(combo_index(a, b), i)
+            self.assertEqual(combo_index(b, a), i)
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        board = Card.to_ints(Card.from_str_list(["As", "Td", "7h", "7c", "2s"]))
+        hands = live(board)
+        self.assertEqual(hands.sum(), 1081)
+        rows = np.concatenate([COMBOS[hands], np.tile(np.array(board, dtype=np.uint8), (hands.sum(), 1))], axis=1)
+        strengths = np.full(NUM_COMBOS, -1, dtype=np.int64)
+        strengths[hands], _ = evaluate_batch(rows)
+        reach = rng.random(NUM_COMBOS) * hands
+
+        compatible = (COMBO_MASKS[:, None] & COMBO_MASKS[None, :]) == 0
+        expected = (compatible * np.sign(strengths[:, None] - strengths[None, :]) * reach).sum(axis=1)
+        np.testing.assert_allclose(Showdown(strengths).values(reach)[hands], expected[hands], atol=1e-9)
+        np.testing.assert_allclose(compatible_sums(reach), (compatible * reach).sum(axis=1), atol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import random
+import unittest
+from src.poker.card import Card
+from src.poker.table import Table, Seat, Action
+from src.poker.deck import Deck
+from src.poker.server import GameServer, Decision, run_bot
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_match_matches_direct_play(self):
+        server = GameServer(tables=30, hands=4, seed=5)
+        _, port = await server.start()
+        result, *_ = await asyncio.gather(
+            server.run(),
+            run_bot(lambda d: Action.CheckCall, port=port),
+            run_bot(lambda d: Action.CheckCall, port=port),
+        )
+        self.assertEqual(result.hands, 120)
+        self.assertEqual(result.showdowns, 120)
+        self.assertEqual(result.timeouts, [0, 0])
+        # the same decks played without the server
+        chips = [0, 0]
+        for t in range(30):
+            deck = Deck(rng=random.Random(f"5/{t}"))
+            for hand in range(4):
+                table = Table.start(deck=deck)
+                while table.hands_played == 0:
+                    table.action(Action.CheckCall)
+                won = table.seats[Seat.One].chips + table.seats[Seat.One].round_committed - 200
+                chips[hand % 2] += won
+                chips[1 - hand % 2] -= won
+        self.assertEqual(result.chips, chips)
+
+    async def test_timeouts(self):
+        server = GameServer(tables=3, hands=2, timeout=0.05)
+        _, port = await server.start()
+        decisions = []
+        def decide(decision):
+            decisions.append(decision)
+            return Action.BetRaise
+        bot = asyncio.create_task(run_bot(decide, port=port))
+        await asyncio.sleep(0.01)
+        # the second player connects but never answers
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        result = await server.run()
+        await bot
+        writer.close()
+        self.assertGreater(result.timeouts[1], 0)
+        self.assertEqual(result.timeouts[0], 0)
+        # facing a raise the silent player folds, so no hand reaches showdown
+        self.assertEqual(result.showdowns, 0)
+        self.assertEqual(result.hands, 6)
+        self.assertEqual(sum(result.chips), 0)
+
+    async def test_late_reply_is_dropped(self):
+        server = GameServer(tables=1, hands=1, timeout=0.05)
+        _, port = await server.start()
+        bot = asyncio.create_task(run_bot(lambda d: Action.CheckCall, port=port))
+        await asyncio.sleep(0.01)
+        # the second player answers its first decision only once the next
+        # one has been sent, by then long timed out, with a fold
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        async def late():
+            decisions = []
+            async for raw in reader:
+                line = raw.decode()
+                if line.startswith("act "):
+                    decisions.append(Decision.parse(line))
+                    if len(decisions) == 2:
+                        writer.write(f"{decisions[0].table} {decisions[0].sequence} f\n".encode())
+                elif line.startswith("done"):
+                    return decisions
+        result, decisions = await asyncio.gather(server.run(), late())
+        await bot
+        writer.close()
+        self.assertEqual([d.sequence for d in decisions], [1, 2, 4, 6])
+        self.assertEqual(result.timeouts[1], 4)
+        self.assertEqual(result.actions[1][Action.Fold], 0)
+        self.assertEqual(result.showdowns, 1)
+
+    def test_decision_line(self):
+        decision = Decision(table=7, sequence=5, hand=2, hole_cards=Card.from_str_list(["Ah", "Td"]), board=[], pot=3, to_call=1, chips=199, opponent_chips=198, raises=0)
+        self.assertEqual(decision.line(), "act 7 5 2 AhTd - 3 1 199 198 0\n")
+        self.assertEqual(Decision.parse(decision.line()), decision)
+        decision.board = Card.from_str_list(["2c", "3s", "Kh"])
+        self.assertEqual(Decision.parse(decision.line()), decision)
+        with self.assertRaises(ValueError):
+            Decision.from_table(0, 0, 0, Table.start(rng=random.Random(0), seats=3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from src.poker.table import Action
+from src.poker.simulate import simulate, simulate_batched, random_policy, call_policy, raise_policy
+from src.poker.policy import uniform_policy, LinearPolicy
+
+class TestSimulate(unittest.TestCase):
+
+    def test_zero_sum(self):
+        result = simulate((random_policy, raise_policy), hands=500, seed=4)
+        self.assertEqual(result.hands, 500)
+        self.assertEqual(sum(result.chips), 0)
+        self.assertEqual(result.actions[1][Action.Fold], 0)
+
+    def test_calling_reaches_showdown(self):
+        result = simulate((call_policy, call_policy), hands=100, seed=2)
+        self.assertEqual(result.showdowns, 100)
+
+    def test_reproducible_across_processes(self):
+        single = simulate((random_policy, call_policy), hands=12_000, seed=9)
+        pooled = simulate((random_policy, call_policy), hands=12_000, seed=9, processes=2)
+        self.assertEqual(single, pooled)
+
+    def test_batched(self):
+        result = simulate_batched((uniform_policy, LinearPolicy.zeros()), hands=600, seed=3, tables=50)
+        self.assertEqual(result.hands, 600)
+        self.assertEqual(sum(result.chips), 0)
+        self.assertEqual(result, simulate_batched((uniform_policy, LinearPolicy.zeros()), hands=600, seed=3, tables=50))
+
+    def test_batched_reproducible_across_processes(self):
+        single = simulate_batched((uniform_policy, uniform_policy), hands=6_000, seed=9)
+        pooled = simulate_batched((uniform_policy, uniform_policy), hands=6_000, seed=9, processes=2)
+        self.assertEqual(single, pooled)
+
+if __name__ == '__main__':
+    unittest.main()
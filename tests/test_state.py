@@ -0,0 +1,108 @@
+import random
+import unittest
+from src.poker.table import Table, Seat, Action, Round
+from src.poker.state import GameState
+
+# Keeps the board of the last hand a table finished, for the cards a state
+# needs when the table dealt the board out within one action.
+class LastBoard:
+
+    def __init__(self):
+        self.board : list[int] = []
+
+    def start_hand(self, table : Table):
+        pass
+
+    def action(self, action : Action):
+        pass
+
+    def end_hand(self, table : Table, showdown : bool):
+        self.board = [c.index for c in table.board]
+
+class TestGameState(unittest.TestCase):
+
+    def replay(self, table : Table, last : LastBoard, actions : list[Action], rng : random.Random, steps : int):
+        # plays table and a state side by side and checks they agree
+        state = GameState.from_table(table)
+        for _ in range(steps):
+            action = rng.choice(actions)
+            before = table.hands_played
+            table.action(action)
+            state = state.apply(action)
+            if table.hands_played != before:
+                while state.pending_cards:
+                    state = state.deal(tuple(last.board[len(state.board):len(state.board) + state.pending_cards]))
+                self.assertTrue(state.finished)
+                # the table has already posted the next hand's blinds
+                stacks = tuple(p.chips + p.round_committed for p in (table.seats[Seat.One], table.seats[Seat.Two]))
+                self.assertEqual(state.chips, stacks)
+                state = state.next_hand(GameState.from_table(table).hole_cards)
+            elif state.pending_cards:
+                state = state.deal(tuple(c.index for c in table.board[len(state.board):]))
+            self.assertEqual(state, GameState.from_table(table))
+
+    def test_matches_table(self):
+        rng = random.Random(11)
+        table = Table.start(rng=rng)
+        state = GameState.from_table(table)
+        self.assertEqual(state, GameState.start(state.hole_cards))
+        self.replay(table, LastBoard(), [Action.Fold, Action.CheckCall, Action.BetRaise] + [Action.CheckCall] * 2, rng, 3000)
+
+    def test_matches_table_short_stacked(self):
+        rng = random.Random(12)
+        showdowns = 0
+        for _ in range(100):
+            last = LastBoard()
+            table = Table.start(rng=rng, recorder=last)
+            # four chips behind the posted small blind, so seat one is soon
+            # all in and the board is dealt out
+            table.seats[Seat.One].chips = 3
+            self.assertEqual(GameState.from_table(table).turn, 0)
+            self.replay(table, last, [Action.CheckCall, Action.BetRaise], rng, 12)
+            showdowns += table.hands_played
+        self.assertGreater(showdowns, 100)
+
+    def test_all_in_blind_does_not_act(self):
+        state = GameState.new_hand((1, 200), 0, ((0, 1), (2, 3)))
+        self.assertEqual(state.turn, 1)
+        state = state.apply(Action.CheckCall)
+        self.assertEqual((state.round, state.pending_cards), (Round.Flop, 3))
+        for cards in ((4, 5, 6), (7,)):
+            state = state.deal(cards)
+            self.assertFalse(state.finished)
+        state = state.deal((8,))
+        self.assertTrue(state.finished)
+        # only the blinds each matched are at stake, 1 of the big blind goes back
+        self.assertEqual(sum(state.chips), 201)
+
+    def test_is_immutable(self):
+        state = GameState.start(((0, 1), (2, 3)))
+        raised = state.apply(Action.BetRaise)
+        self.assertEqual(state.pot, 3)
+        self.assertEqual(raised.pot, 6)
+        self.assertEqual(raised.turn, 1)
+        called = raised.apply(Action.CheckCall)
+        self.assertEqual(called.round, Round.Flop)
+        self.assertEqual(called.pending_cards, 3)
+        with self.assertRaises(ValueError):
+            called.apply(Action.CheckCall)
+        with self.assertRaises(ValueError):
+            called.deal((4, 5))
+        self.assertEqual(called.deal((4, 5, 6)).turn, 1)
+
+    def test_fold(self):
+        state = GameState.start(((0, 1), (2, 3))).apply(Action.Fold)
+        self.assertTrue(state.finished)
+        self.assertEqual(state.chips, (199, 201))
+        with self.assertRaises(ValueError):
+            state.apply(Action.CheckCall)
+        next_hand = state.next_hand(((4, 5), (6, 7)))
+        self.assertEqual((next_hand.button, next_hand.turn), (1, 1))
+        self.assertEqual(next_hand.chips, (197, 200))
+
+    def test_rejects_multiway(self):
+        with self.assertRaises(ValueError):
+            GameState.from_table(Table.start(rng=random.Random(0), seats=3))
+
+if __name__ == '__main__':
+    unittest.main()
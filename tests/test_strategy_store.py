@@ -0,0 +1,128 @@
+import mmap
+import os
+import pickle
+import random
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.poker.cfr import CFRSolver, HandStrengthAbstraction
+from src.poker.table import Table, Action
+from src.poker.tree import NodeType
+from src.poker.ranges import combo_index
+from src.poker.strategy_store import StrategyStore, InfosetTracker, quantize, MAGIC, QUANTUM
+
+class TestQuantize(unittest.TestCase):
+
+    def test_rows_sum_to_quantum(self):
+        rng = np.random.default_rng(0)
+        strategy = rng.dirichlet(np.ones(3), size=1000)
+        strategy[0] = [1 / 3, 1 / 3, 1 / 3]
+        strategy[1] = [0, 0, 1]
+        quantized = quantize(strategy)
+        self.assertEqual(quantized.dtype, np.uint8)
+        self.assertTrue((quantized.sum(axis=1, dtype=np.int64) == QUANTUM).all())
+        self.assertLessEqual(np.abs(quantized / QUANTUM - strategy).max(), 1 / QUANTUM)
+        self.assertEqual(quantized[1].tolist(), [0, 0, QUANTUM])
+
+class TestStrategyStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "strategy.bin")
+        cls.solver = CFRSolver(HandStrengthAbstraction(postflop_buckets=3))
+        cls.solver.train(2, seed=1)
+        cls.solver.save(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_round_trip(self):
+        with StrategyStore(self.path, self.solver.abstraction) as store:
+            average = self.solver.average_strategy()
+            np.testing.assert_allclose(store.table / QUANTUM, average, atol=1 / QUANTUM)
+            node = self.solver.tree.follow([Action.BetRaise])
+            np.testing.assert_allclose(store.probabilities(node, 2), self.solver.strategy(node, np.array([2]))[0], atol=1 / QUANTUM)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            StrategyStore(self.path, HandStrengthAbstraction(postflop_buckets=4))
+        other = os.path.join(self.directory.name, "other.bin")
+        with open(other, "wb") as f:
+            f.write(b"not a strategy" * 10)
+        with self.assertRaises(ValueError):
+            StrategyStore(other, self.solver.abstraction)
+
+    def test_corrupt_header_closes_file(self):
+        path = os.path.join(self.directory.name, "corrupt.bin")
+        with open(self.path, "rb") as f:
+            data = bytearray(f.read())
+        # a size field that disagrees with the tree
+        data[len(MAGIC) + 20] ^= 0xFF
+        with open(path, "wb") as f:
+            f.write(data)
+        maps = []
+        original = mmap.mmap
+        def recording(*args, **kwargs):
+            maps.append(original(*args, **kwargs))
+            return maps[-1]
+        with mock.patch.object(mmap, "mmap", side_effect=recording):
+            with self.assertRaises(ValueError):
+                StrategyStore(path, self.solver.abstraction)
+        self.assertEqual(len(maps), 1)
+        self.assertTrue(maps[0].closed)
+
+    def test_tracks_table(self):
+        store = StrategyStore(self.path, self.solver.abstraction)
+        tracker = store.tracker()
+        table = Table.start(rng=random.Random(3), recorder=tracker)
+        tree = self.solver.tree
+        average = self.solver.average_strategy()
+        rng = random.Random(4)
+        actions = []
+        later_rounds = 0
+        for _ in range(300):
+            hands_played = table.hands_played
+            # the decision node the actions lead to, past the chance node
+            # that closes a round
+            node = tree.follow(actions)
+            while tree.node_type[node] == NodeType.Chance.value:
+                node = int(tree.children[node, 0])
+            self.assertEqual(tracker.node, node)
+            self.assertEqual(tree.node_type[node], NodeType.Decision.value)
+            self.assertEqual(tree.round[node], table.round.value)
+            self.assertEqual(tree.to_act[node], 0 if table.turn == table.button else 1)
+            hole = [c.index for c in table.seats[table.turn].hole_cards]
+            board = [c.index for c in table.board]
+            board = tuple(sorted(board[:3])) + tuple(board[3:])
+            bucket = self.solver.abstraction.bucket(table.round, board)[combo_index(*hole)]
+            self.assertEqual(store.bucket(table.round, tuple(c.index for c in table.board), tuple(hole)), bucket)
+            probabilities = tracker.probabilities(table)
+            np.testing.assert_allclose(probabilities, average[self.solver.offsets[node] + bucket], atol=1 / QUANTUM)
+            later_rounds += table.board != []
+            action = rng.choice([Action.CheckCall, Action.CheckCall, Action.BetRaise, Action.Fold])
+            table.action(action)
+            actions = [] if table.hands_played > hands_played else actions + [action]
+        self.assertGreater(table.hands_played, 5)
+        self.assertGreater(later_rounds, 50)
+        store.close()
+
+    def test_pickles_by_path(self):
+        with StrategyStore(self.path, self.solver.abstraction) as store:
+            copy = pickle.loads(pickle.dumps(store))
+            np.testing.assert_array_equal(copy.table, store.table)
+            self.assertIsInstance(copy.tracker(), InfosetTracker)
+            copy.close()
+
+    def test_tracker_needs_table_raise_limit(self):
+        path = os.path.join(self.directory.name, "capped.bin")
+        CFRSolver(self.solver.abstraction, raise_limit=2).save(path)
+        with StrategyStore(path, self.solver.abstraction) as store:
+            self.assertEqual(store.raise_limit, 2)
+            with self.assertRaises(ValueError):
+                store.tracker()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import random
+import unittest
+from src.poker.card import Card
+from src.poker.deck import Deck
+from src.poker.table import Table, Seat, Action, Round, RAISE_LIMIT, STARTING_STACK
+
+class TestTable(unittest.TestCase):
+
+    def test_raise_limit(self):
+        table = Table.start(rng=random.Random(1))
+        for _ in range(RAISE_LIMIT):
+            table.action(Action.BetRaise)
+        self.assertEqual(table.legal_actions(), [Action.Fold, Action.CheckCall])
+        table.action(Action.BetRaise)
+        self.assertEqual(table.round, Round.Flop)
+        self.assertEqual(table.pot, 20)
+
+    def test_fold_resets_round(self):
+        table = Table.start(rng=random.Random(1))
+        table.action(Action.BetRaise)
+        table.action(Action.Fold)
+        self.assertEqual(table.hands_played, 1)
+        self.assertEqual(table.seats[Seat.One].chips + table.seats[Seat.One].round_committed, 202)
+        self.assertEqual(table.round_outstanding, 2)
+        self.assertEqual(table.pot, 3)
+
+    def test_tie_splits_pot(self):
+        table = Table.start(rng=random.Random(1))
+        table.action(Action.CheckCall)
+        table.action(Action.CheckCall)
+        table.board = Card.from_str_list(["As", "Ks", "Qs", "Js", "Ts"])
+        for _ in range(6):
+            table.action(Action.CheckCall)
+        self.assertEqual(table.hands_played, 1)
+        for p in table.seats.values():
+            self.assertEqual(p.chips + p.round_committed, 200)
+
+    def test_seat_count(self):
+        for seats in (1, 11):
+            with self.assertRaises(ValueError):
+                Table.start(seats=seats)
+
+    def test_blinds_and_button(self):
+        table = Table.start(rng=random.Random(2), seats=6)
+        self.assertEqual([p.round_committed for p in table.seats.values()], [0, 1, 2, 0, 0, 0])
+        self.assertEqual(table.turn, Seat.Four)
+        for _ in range(5):
+            table.action(Action.Fold)
+        self.assertEqual(table.hands_played, 1)
+        self.assertEqual(table.button, Seat.Two)
+        self.assertEqual([p.round_committed for p in table.seats.values()], [0, 0, 1, 2, 0, 0])
+        self.assertEqual(table.turn, Seat.Five)
+        self.assertEqual(table.seats[Seat.Three].chips + table.seats[Seat.Three].round_committed, STARTING_STACK + 1)
+
+    def test_side_pot(self):
+        deck = Deck.stacked(Card.from_str_list(["As", "Ah", "Ks", "Kh", "7c", "2d", "Qc", "9d", "5h", "3s", "8c"]))
+        table = Table.start(deck=deck, seats=3)
+        table.seats[Seat.One].chips = 3
+        # One is all in for 3 preflop, Two and Three bet on into a side pot
+        actions = [Action.BetRaise, Action.CheckCall, Action.CheckCall, Action.BetRaise] + [Action.CheckCall] * 5
+        for action in actions:
+            table.action(action)
+        self.assertEqual(table.hands_played, 1)
+        stacks = [p.chips + p.round_committed for p in table.seats.values()]
+        self.assertEqual(stacks, [9, STARTING_STACK - 5 + 4, STARTING_STACK - 5])
+
+    def test_all_in_player_is_skipped(self):
+        table = Table.start(rng=random.Random(6), seats=3)
+        table.seats[Seat.One].chips = 3
+        table.action(Action.BetRaise)
+        self.assertTrue(table.seats[Seat.One].all_in)
+        self.assertEqual(table.round_raises, 1)
+        turns = []
+        while table.hands_played == 0:
+            turns.append(table.turn)
+            raises = table.round_raises
+            table.action(Action.BetRaise if table.round == Round.Flop and raises == 0 else Action.CheckCall)
+        # Two and Three play every later round between them
+        self.assertNotIn(Seat.One, turns)
+        self.assertEqual(turns, [Seat.Two, Seat.Three] * 4)
+        self.assertEqual(sum(p.chips for p in table.seats.values()) + table.pot, 3 * STARTING_STACK - (STARTING_STACK - 3))
+
+    def test_all_in_runs_out_the_board(self):
+        for seats in (2, 3):
+            table = Table.start(rng=random.Random(7), seats=seats)
+            # everyone but the last seat to act goes all in, which leaves
+            # nobody to bet against after the call
+            to_act = [table.turn]
+            for _ in range(seats - 1):
+                table.seats[table.turn].chips = 2
+                table.action(Action.BetRaise)
+                self.assertEqual(table.hands_played, 0)
+                to_act.append(table.turn)
+            self.assertEqual(len(set(to_act)), seats)
+            table.action(Action.CheckCall)
+            self.assertEqual(table.hands_played, 1)
+
+    def test_odd_chip(self):
+        deck = Deck.stacked(Card.from_str_list(["2c", "3d", "4c", "5d", "2h", "3h", "As", "Ks", "Qs", "Js", "Ts"]))
+        table = Table.start(deck=deck, seats=3)
+        table.action(Action.CheckCall)
+        table.action(Action.Fold)
+        for _ in range(7):
+            table.action(Action.CheckCall)
+        self.assertEqual(table.hands_played, 1)
+        # the pot of 5 is split, the odd chip to the first winner left of the button
+        stacks = [p.chips + p.round_committed for p in table.seats.values()]
+        self.assertEqual(stacks, [STARTING_STACK, STARTING_STACK - 1, STARTING_STACK + 1])
+
+    def test_chips_conserved(self):
+        rng = random.Random(5)
+        for seats in (2, 3, 6, 10):
+            table = Table.start(rng=rng, seats=seats)
+            for _ in range(3000):
+                table.action(rng.choice([Action.Fold, Action.CheckCall, Action.BetRaise, Action.BetRaise]))
+                self.assertEqual(sum(p.chips for p in table.seats.values()) + table.pot, seats * STARTING_STACK)
+            self.assertGreater(table.hands_played, 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import random
+import unittest
+import numpy as np
+from src.poker.table import Table, Action, Round
+from src.poker.tree import GameTree, NodeType
+
+class TestTree(unittest.TestCase):
+
+    def test_matches_table(self):
+        tree = GameTree.build()
+        rng = random.Random(8)
+        for _ in range(300):
+            table = Table.start(rng=rng)
+            actions : list[Action] = []
+            while True:
+                node = tree.follow(actions)
+                if tree.node_type[node] == NodeType.Chance.value:
+                    node = int(tree.children[node, 0])
+                self.assertEqual(tree.pot[node], table.pot)
+                self.assertEqual(tree.round[node], table.round.value)
+                self.assertEqual(tree.to_act[node], 0 if table.turn == table.button else 1)
+                legal = [a for a in Action if tree.legal[node, a.value]]
+                action = rng.choice(legal)
+                actions.append(action)
+                table.action(action)
+                if table.hands_played:
+                    break
+            end = tree.follow(actions)
+            expected = NodeType.Fold if actions[-1] == Action.Fold else NodeType.Showdown
+            self.assertEqual(tree.node_type[end], expected.value)
+
+    def test_structure(self):
+        tree = GameTree.build(raise_limit=1)
+        root = 0
+        self.assertEqual(tree.node_type[root], NodeType.Decision.value)
+        self.assertEqual(tree.round[root], Round.Preflop.value)
+        fold = tree.child(root, Action.Fold)
+        self.assertEqual(tree.payoff(fold), -1)
+        check = tree.follow([Action.CheckCall, Action.CheckCall])
+        self.assertEqual(tree.node_type[check], NodeType.Chance.value)
+        self.assertLess(tree.child(tree.follow([Action.CheckCall, Action.CheckCall, Action.CheckCall]), Action.Fold), 0)
+        children = tree.children[tree.decision_nodes]
+        np.testing.assert_array_equal(tree.parent[children[children >= 0]], np.repeat(tree.decision_nodes, (children >= 0).sum(axis=1)))
+
+    def test_infoset_offsets(self):
+        tree = GameTree.build(raise_limit=2)
+        offsets, size = tree.infoset_offsets((169, 10, 10, 10))
+        rounds = tree.round[tree.decision_nodes]
+        self.assertEqual(size, int(np.where(rounds == 0, 169, 10).sum()))
+        self.assertEqual(offsets[tree.decision_nodes[1]], 169)
+
+if __name__ == '__main__':
+    unittest.main()